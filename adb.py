@@ -1,6 +1,13 @@
 import subprocess
-import time
-from config import ADB_PATH
+import threading
+import atexit
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional
+from config import ADB_PATH, ADB_OUTPUT_TAIL_LINES, ADB_NATIVE, TRIMBLE_MODELS, SPECTRA_MODELS
+from adb_client import AdbClient, AdbError
+from cancellation import tracked
 import os
 import sys
 
@@ -25,6 +32,26 @@ def run_adb_command(args, log_callback=None, is_cancelled=lambda: False, capture
         )
         return result.stdout
 
+    # Only the last lines are kept for the return value, the rest is
+    # forwarded to log_callback as it arrives
+    tail = deque(maxlen=ADB_OUTPUT_TAIL_LINES)
+
+    for line in stream_adb_command(args, is_cancelled):
+        tail.append(line)
+
+        if log_callback:
+            log_callback(line)
+
+    if is_cancelled():
+        return "Command cancelled."
+
+    return "\n".join(tail)
+
+
+def stream_adb_command(args, is_cancelled=lambda: False):
+    # Yields output lines as they arrive. Stopping the iteration early
+    # (cancel, break, close()) terminates the adb process; a cancellation
+    # token kills it even while it prints nothing.
     process = subprocess.Popen(
         [ADB_PATH] + args,
         stdout=subprocess.PIPE,
@@ -34,34 +61,251 @@ def run_adb_command(args, log_callback=None, is_cancelled=lambda: False, capture
         errors="replace"
     )
 
-    output_lines = []
+    finished = False
+
+    try:
+        with tracked(is_cancelled, process):
+            while not is_cancelled():
+                line = process.stdout.readline()
+                if not line:
+                    finished = True
+                    break
+
+                yield line.strip()
 
-    while True:
-        if is_cancelled():
+    finally:
+        if not finished and process.poll() is None:
             process.terminate()
-            time.sleep(0.5)
-            if process.poll() is None:
+            try:
+                process.wait(timeout=0.5)
+            except subprocess.TimeoutExpired:
                 process.kill()
-            return "Command cancelled."
 
-        line = process.stdout.readline()
-        if not line:
-            break
+        process.wait()
+        process.stdout.close()
 
-        line = line.strip()
-        output_lines.append(line)
 
-        if log_callback:
-            log_callback(line)
+def open_adb_stream(args):
+    # Raw binary stdout of an adb command (e.g. exec-out), read by the caller
+    return subprocess.Popen(
+        [ADB_PATH] + args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        cwd=os.path.dirname(ADB_PATH)
+    )
+
+
+# Socket client for the adb server. Every helper below falls back to
+# spawning adb.exe when it is disabled or the server does not answer
+# (not started yet, old adbd without the service).
+native_client = AdbClient() if ADB_NATIVE else None
+
+
+def open_exec_stream(device, command):
+    if native_client is not None:
+        try:
+            return native_client.exec_stream(device, command)
+        except (OSError, AdbError):
+            pass
+
+    return open_adb_stream(["-s", device, "exec-out", command])
+
+
+def open_track_devices():
+    if native_client is not None:
+        try:
+            return native_client.track_devices()
+        except (OSError, AdbError):
+            pass
+
+    return open_adb_stream(["track-devices"])
+
+
+def open_shell_process(device):
+    if native_client is not None:
+        try:
+            return native_client.shell_session(device)
+        except (OSError, AdbError):
+            pass
+
+    return subprocess.Popen(
+        [ADB_PATH, "-s", device, "shell"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        bufsize=1,
+        cwd=os.path.dirname(ADB_PATH)
+    )
+
+
+SHELL_SENTINEL = "__TBU_SHELL_DONE__"
+
+
+class AdbShell:
+    # Long-lived "adb shell" process for one device. Commands are written to
+    # stdin one at a time and their output ends at a sentinel line echoed
+    # right after them, so one pipe serves any number of commands.
+
+    def __init__(self, device):
+        self.device = device
+        self.process = None
+        self.counter = 0
+        self.last_status = None
+        self.lock = threading.Lock()
+        # close() can come from another thread (GUI) while a command runs:
+        # it takes the process out under this one, stream() keeps its own
+        # reference
+        self.process_lock = threading.Lock()
+
+    def start(self):
+        process = open_shell_process(self.device)
+
+        with self.process_lock:
+            self.process = process
+
+        return process
+
+    def is_alive(self):
+        process = self.process
+        return process is not None and process.poll() is None
+
+    def run(self, command):
+        return "\n".join(self.stream(command))
+
+    def stream(self, command, is_cancelled=lambda: False):
+        # Yields the command's output lines as they arrive. The session is
+        # locked until the generator is exhausted or closed.
+        with self.lock:
+            process = self.process
+            if process is None or process.poll() is not None:
+                process = self.start()
+
+            self.counter += 1
+            marker = f"{SHELL_SENTINEL}{self.counter}"
+            self.last_status = None
+
+            try:
+                process.stdin.write(
+                    f"{{ {command}\n}} 2>/dev/null </dev/null\n"
+                    f"printf '\\n%s %s\\n' \"{marker}\" \"$?\"\n"
+                )
+                process.stdin.flush()
+            except (OSError, ValueError):
+                self.close()
+                return
+
+            finished = False
+
+            # One line of lookahead: the line right before the sentinel is
+            # the newline printed in front of it
+            pending = None
+
+            try:
+                with tracked(is_cancelled, process):
+                    while not is_cancelled():
+                        try:
+                            line = process.stdout.readline()
+                        except (OSError, ValueError):
+                            # Killed by a cancellation token or close()
+                            line = ""
+
+                        # Session died (device unplugged, adb killed)
+                        if not line:
+                            self.close()
+                            finished = True
+                            break
+
+                        line = line.rstrip("\r\n")
+
+                        if line.startswith(marker):
+                            status = line[len(marker):].strip()
+                            self.last_status = int(status) if status.isdigit() else None
+                            finished = True
+
+                            if pending:
+                                yield pending
+                            break
+
+                        if pending is not None:
+                            yield pending
+
+                        pending = line
+
+            finally:
+                # Abandoned mid-command, the pipe is out of sync: restart it
+                if not finished:
+                    self.close()
 
-    process.wait()
-    return "\n".join(output_lines)
+    def ping(self):
+        self.run("true")
+        return self.last_status == 0
+
+    def close(self):
+        with self.process_lock:
+            process, self.process = self.process, None
+
+        if process is None:
+            return
+
+        try:
+            process.stdin.close()
+        except (OSError, ValueError):
+            pass
+
+        if process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+_shell_sessions = {}
+_shell_sessions_lock = threading.Lock()
+
+
+def get_shell(device):
+    with _shell_sessions_lock:
+        shell = _shell_sessions.get(device)
+        if shell is None:
+            shell = AdbShell(device)
+            _shell_sessions[device] = shell
+        return shell
+
+
+def close_shell(device):
+    with _shell_sessions_lock:
+        shell = _shell_sessions.pop(device, None)
+
+    if shell:
+        shell.close()
+
+
+@atexit.register
+def close_all_shells():
+    with _shell_sessions_lock:
+        shells = list(_shell_sessions.values())
+        _shell_sessions.clear()
+
+    for shell in shells:
+        shell.close()
+
+
+def run_shell_command(device, command):
+    return get_shell(device).run(command)
+
+
+def stream_shell_command(device, command, is_cancelled=lambda: False):
+    return get_shell(device).stream(command, is_cancelled)
 
 
 def get_adb_version():
     try:
         result = subprocess.run(
-            [resource_path("adb/adb.exe"), "version"],
+            [ADB_PATH, "version"],
             capture_output=True,
             text=True
         )
@@ -80,21 +324,36 @@ def adb_exists():
     return os.path.exists(ADB_PATH)
 
 
-def get_connected_device():
+def get_connected_devices():
+    if native_client is not None:
+        try:
+            return [
+                serial
+                for serial, state in native_client.devices().items()
+                if state == "device"
+            ]
+        except (OSError, AdbError):
+            pass
+
     output = run_adb_command(["devices"])
     lines = output.splitlines()
 
-    devices = [
+    return [
         line.split()[0]
         for line in lines[1:]
         if line.strip().endswith("device")
     ]
 
+
+def get_connected_device():
+    devices = get_connected_devices()
+
     if not devices:
         return None
 
     return devices[0]
 
+
 def is_suspicious_serial(s: str) -> bool:
 
     if not s:
@@ -105,28 +364,112 @@ def is_suspicious_serial(s: str) -> bool:
 
     return len(s) <= 8
 
+PROBE_SECTION = "__TBU_SECTION__"
+
+GETPROP_LINE = re.compile(r"^\[(.+?)\]: \[(.*)\]$")
+
+
+@dataclass
+class DeviceInfo:
+    model: str = ""
+    manufacturer: str = ""
+    serial: str = ""
+    android_version: str = ""
+    firmware: str = ""
+    build_type: str = ""
+    fingerprint: str = ""
+    storage_total: Optional[int] = None  # bytes
+    storage_free: Optional[int] = None  # bytes
+    battery_level: Optional[int] = None  # percent
+    charging: Optional[bool] = None
+    properties: dict = field(default_factory=dict, repr=False)
+
+    @property
+    def suspicious_serial(self):
+        return is_suspicious_serial(self.serial)
+
+    @property
+    def family(self):
+        # Key of DEVICE_PROFILES, None if the model is not supported
+        if any(self.model.startswith(prefix) for prefix in TRIMBLE_MODELS):
+            return "trimble"
+        if any(self.model.startswith(prefix) for prefix in SPECTRA_MODELS):
+            return "spectra"
+        return None
+
+
+def parse_getprop(output):
+    props = {}
+
+    for line in output.splitlines():
+        match = GETPROP_LINE.match(line.strip())
+        if match:
+            props[match.group(1)] = match.group(2)
+
+    return props
+
+
+def parse_df(output):
+    # toybox "df -k": Filesystem 1K-blocks Used Available Use% Mounted on
+    lines = [line for line in output.splitlines() if line.strip()]
+
+    if len(lines) < 2:
+        return None, None
+
+    parts = lines[-1].split()
+    if len(parts) < 4 or not parts[1].isdigit() or not parts[3].isdigit():
+        return None, None
+
+    return int(parts[1]) * 1024, int(parts[3]) * 1024
+
+
+def parse_battery(output):
+    level = None
+    charging = None
+
+    for line in output.splitlines():
+        key, _, value = line.strip().partition(":")
+        value = value.strip()
+
+        if key == "level" and value.isdigit():
+            level = int(value)
+        elif key == "status" and value.isdigit():
+            # BatteryManager.BATTERY_STATUS_CHARGING / _FULL
+            charging = value in ("2", "5")
+
+    return level, charging
+
+
 def get_device_info(device):
-    def prop(name):
-        return run_adb_command(
-            ["-s", device, "shell", "getprop", name]
-        ).strip()
-
-    model = prop("ro.product.model")
-    manufacturer = prop("ro.product.manufacturer")
-    android_version = prop("ro.build.version.release")
-    firmware = prop("ro.build.display.id")
-    build_type = prop("ro.build.type")
-
-    serial = prop("sys.qc.sn")
+    # Properties, storage and battery in a single shell round trip
+    output = get_shell(device).run(
+        f"getprop; echo {PROBE_SECTION}; "
+        f"df -k /sdcard; echo {PROBE_SECTION}; "
+        f"dumpsys battery"
+    )
+
+    sections = output.split(PROBE_SECTION)
+    sections += [""] * (3 - len(sections))
+
+    props = parse_getprop(sections[0])
+    storage_total, storage_free = parse_df(sections[1])
+    battery_level, charging = parse_battery(sections[2])
+
+    serial = props.get("sys.qc.sn", "").strip()
     if not serial:
-        serial = prop("ro.serialno")
-
-    return {
-        "model": model,
-        "manufacturer": manufacturer,
-        "serial": serial,
-        "android_version": android_version,
-        "firmware": firmware,
-        "build_type": build_type,
-        "suspicious_serial": is_suspicious_serial(serial),
-    }
+        serial = props.get("ro.serialno", "").strip()
+
+    return DeviceInfo(
+        model=props.get("ro.product.model", ""),
+        manufacturer=props.get("ro.product.manufacturer", ""),
+        serial=serial,
+        android_version=props.get("ro.build.version.release", ""),
+        firmware=props.get("ro.build.display.id", ""),
+        build_type=props.get("ro.build.type", ""),
+        fingerprint=props.get("ro.build.fingerprint", ""),
+        storage_total=storage_total,
+        storage_free=storage_free,
+        battery_level=battery_level,
+        charging=charging,
+        properties=props,
+    )
@@ -0,0 +1,199 @@
+import socket
+from config import ADB_SERVER_HOST, ADB_SERVER_PORT, ADB_SERVER_TIMEOUT
+
+# Client for the adb server's host protocol on localhost:5037, so commands
+# go over a socket instead of spawning adb.exe. Requests are a 4-digit hex
+# length plus the service name, answered with OKAY or FAIL + hex-length
+# message. host:* services answer and close; after host:transport:<serial>
+# the same socket is handed to the device for one service (shell:, exec:,
+# sync:) until either side closes it.
+
+
+class AdbError(Exception):
+    pass
+
+
+def read_exact(stream, size):
+    data = b""
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+def read_frames(stream):
+    # "track-devices" sends the whole device list on every change as a
+    # 4-digit hex length followed by that many bytes. Blocks between
+    # frames, ends at EOF; a malformed header raises ValueError.
+    while True:
+        header = read_exact(stream, 4)
+        if len(header) < 4:
+            return
+
+        size = int(header, 16)
+        payload = read_exact(stream, size)
+        if len(payload) < size:
+            return
+
+        yield payload.decode("utf-8", errors="replace")
+
+
+def parse_device_states(payload):
+    # "serial<TAB>state" per line -> {serial: state}
+    states = {}
+
+    for line in payload.splitlines():
+        serial, _, state = line.partition("\t")
+        serial = serial.strip()
+        state = state.strip()
+
+        # "no permissions (user in plugdev group; ...)"
+        if state.startswith("no permissions"):
+            state = "no permissions"
+
+        if serial and state:
+            states[serial] = state
+
+    return states
+
+
+class SocketReader:
+    # read() over a socket, for read_exact/read_frames
+
+    def __init__(self, sock):
+        self.sock = sock
+
+    def read(self, size):
+        return self.sock.recv(size)
+
+
+class ServiceStream:
+    # Process-like wrapper around a service socket, so code written for
+    # subprocess.Popen (stdin/stdout, poll, kill, wait) works unchanged
+
+    def __init__(self, sock, text=False):
+        self.sock = sock
+        self.returncode = None
+
+        if text:
+            self.stdout = sock.makefile("r", encoding="utf-8", errors="replace", newline=None)
+            self.stdin = sock.makefile("w", encoding="utf-8", newline="\n")
+        else:
+            self.stdout = sock.makefile("rb")
+            self.stdin = sock.makefile("wb")
+
+    def poll(self):
+        return self.returncode
+
+    def terminate(self):
+        if self.returncode is not None:
+            return
+
+        self.returncode = 0
+
+        # Unblocks a reader in another thread before the files go away
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+        for f in (self.stdin, self.stdout):
+            try:
+                f.close()
+            except OSError:
+                pass
+
+        self.sock.close()
+
+    kill = terminate
+
+    def wait(self, timeout=None):
+        self.terminate()
+        return self.returncode
+
+
+class AdbClient:
+
+    def __init__(self, host=ADB_SERVER_HOST, port=ADB_SERVER_PORT, timeout=ADB_SERVER_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+
+    def connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def request(self, sock, service):
+        data = service.encode("utf-8")
+        sock.sendall(b"%04x" % len(data) + data)
+
+        status = read_exact(SocketReader(sock), 4)
+
+        if status == b"OKAY":
+            return
+
+        if status == b"FAIL":
+            raise AdbError(self.read_string(sock))
+
+        raise AdbError(f"{service}: respuesta inválida del servidor adb ({status!r})")
+
+    def read_string(self, sock):
+        reader = SocketReader(sock)
+        header = read_exact(reader, 4)
+
+        try:
+            size = int(header, 16)
+        except ValueError:
+            raise AdbError(f"longitud inválida del servidor adb ({header!r})")
+
+        return read_exact(reader, size).decode("utf-8", errors="replace")
+
+    def query(self, service):
+        # host:* request answered with one hex-length string
+        sock = self.connect()
+        try:
+            self.request(sock, service)
+            return self.read_string(sock)
+        finally:
+            sock.close()
+
+    def devices(self):
+        return parse_device_states(self.query("host:devices"))
+
+    def open_service(self, serial, service):
+        # Socket bound to one device service, blocking reads from here on
+        sock = self.connect()
+
+        try:
+            self.request(sock, f"host:transport:{serial}")
+            self.request(sock, service)
+        except BaseException:
+            sock.close()
+            raise
+
+        sock.settimeout(None)
+        return sock
+
+    def track_devices(self):
+        sock = self.connect()
+
+        try:
+            self.request(sock, "host:track-devices")
+        except BaseException:
+            sock.close()
+            raise
+
+        sock.settimeout(None)
+        return ServiceStream(sock)
+
+    def exec_stream(self, serial, command):
+        # Raw binary stdout, like "adb exec-out"
+        return ServiceStream(self.open_service(serial, f"exec:{command}"))
+
+    def shell_session(self, serial):
+        # Non-pty shell reading commands from stdin, like "adb shell" with
+        # a pipe. Needs adbd from Android 7+, older ones answer FAIL.
+        return ServiceStream(self.open_service(serial, "shell,raw:"), text=True)
@@ -0,0 +1,260 @@
+import os
+import socket
+import stat
+import struct
+from collections import deque
+from adb_client import AdbError, read_exact
+from cancellation import tracked
+from config import SYNC_PIPELINE, SYNC_READ_BUFFER, SYNC_WRITE_BUFFER
+
+# adb "sync:" service (what adb pull uses): 8-byte headers, a 4-char id and
+# a little-endian length/value. LIST answers DENT entries up to DONE, STAT
+# one STAT record, RECV the file as DATA chunks up to DONE. adbd handles the
+# requests of one connection in order, so many are sent ahead and their
+# answers read back in the same order (SYNC_PIPELINE in flight). A FAIL
+# ends the session on the device side: the rest is resent on a new one.
+# v1 records carry 32-bit sizes.
+
+DATA_MAX = 64 * 1024
+
+
+class SyncError(AdbError):
+    # Connection or protocol failure, the session is unusable
+    pass
+
+
+class SyncFailed(AdbError):
+    # FAIL answer for one path (missing, permission denied...)
+    pass
+
+
+class SyncConnection:
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.reader = sock.makefile("rb", buffering=SYNC_READ_BUFFER)
+
+    @classmethod
+    def open(cls, client, serial):
+        return cls(client.open_service(serial, "sync:"))
+
+    def send(self, command, path=""):
+        data = path.encode("utf-8")
+        self.sock.sendall(command + struct.pack("<I", len(data)) + data)
+
+    def read(self, size):
+        data = read_exact(self.reader, size)
+        if len(data) < size:
+            raise SyncError("conexión sync cerrada por el dispositivo")
+        return data
+
+    def read_header(self):
+        data = self.read(8)
+        return data[:4], struct.unpack("<I", data[4:])[0]
+
+    def read_fail(self, size):
+        return self.read(size).decode("utf-8", errors="replace")
+
+    def stat(self, path):
+        # (mode, size, mtime), None if it does not exist
+        self.send(b"STAT", path)
+        return self.read_stat()
+
+    def read_stat(self):
+        ident, mode = self.read_header()
+        if ident != b"STAT":
+            raise SyncError(f"respuesta STAT inválida: {ident!r}")
+
+        size, mtime = struct.unpack("<II", self.read(8))
+        if not (mode or size or mtime):
+            return None
+
+        return mode, size, mtime
+
+    def read_list(self):
+        entries = []
+
+        while True:
+            ident, mode = self.read_header()
+
+            if ident == b"FAIL":
+                raise SyncFailed(self.read_fail(mode))
+
+            size, mtime, length = struct.unpack("<III", self.read(12))
+
+            if ident == b"DONE":
+                return entries
+
+            if ident != b"DENT":
+                raise SyncError(f"respuesta LIST inválida: {ident!r}")
+
+            name = self.read(length).decode("utf-8", errors="replace")
+            if name not in (".", ".."):
+                entries.append((name, mode, size, mtime))
+
+    def list(self, path):
+        self.send(b"LIST", path)
+        return self.read_list()
+
+    def pipeline(self, items, send, receive):
+        # Yields (item, answer) in order, keeping up to SYNC_PIPELINE
+        # requests ahead of the answers. If the device closes the session
+        # (after a FAIL) sending stops and the answers already sent are
+        # still read, so the caller sees the FAIL; unsent items are left
+        inflight = deque()
+        items = iter(items)
+
+        for item in items:
+            try:
+                send(item)
+            except OSError:
+                break
+
+            inflight.append(item)
+
+            if len(inflight) >= SYNC_PIPELINE:
+                current = inflight.popleft()
+                yield current, receive(current)
+
+        while inflight:
+            current = inflight.popleft()
+            yield current, receive(current)
+
+    def walk(self, root):
+        # Regular files under root as (path, size, mtime), one pipelined
+        # LIST per directory level
+        level = [root.rstrip("/") or "/"]
+
+        while level:
+            next_level = []
+
+            for path, entries in self.pipeline(level, lambda path: self.send(b"LIST", path), lambda _: self.read_list()):
+                for name, mode, size, mtime in entries:
+                    child = f"{path.rstrip('/')}/{name}"
+
+                    if stat.S_ISDIR(mode):
+                        next_level.append(child)
+                    elif stat.S_ISREG(mode):
+                        yield child, size, mtime
+
+            level = next_level
+
+    def receive_file(self, local_file, is_cancelled, on_data=None):
+        # Reads one RECV answer into local_file, returns the bytes written
+        received = 0
+
+        with open(local_file, "wb", buffering=SYNC_WRITE_BUFFER) as f:
+            while True:
+                ident, size = self.read_header()
+
+                if ident == b"DATA":
+                    if size > DATA_MAX:
+                        raise SyncError(f"bloque DATA demasiado grande: {size}")
+
+                    f.write(self.read(size))
+                    received += size
+
+                    if on_data:
+                        on_data(received)
+
+                    if is_cancelled():
+                        raise SyncError("cancelado")
+
+                elif ident == b"DONE":
+                    return received
+
+                elif ident == b"FAIL":
+                    raise SyncFailed(self.read_fail(size))
+
+                else:
+                    raise SyncError(f"respuesta RECV inválida: {ident!r}")
+
+    def quit(self):
+        try:
+            self.send(b"QUIT")
+        except OSError:
+            pass
+
+    def kill(self):
+        # From another thread: a read blocked on the socket returns at once
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def close(self):
+        try:
+            self.reader.close()
+        finally:
+            self.sock.close()
+
+
+def recv_files(client, serial, pairs, is_cancelled, on_file=None, on_data=None):
+    # pairs: (remote file, local file). Returns (received, failed, bytes):
+    # received (remote, size) and failed (remote, message) lists. Raises
+    # SyncError / OSError when the device goes away.
+    pending = list(pairs)
+    received = []
+    failed = []
+    total = 0
+
+    while pending and not is_cancelled():
+        connection = SyncConnection.open(client, serial)
+        answers = connection.pipeline(
+            pending,
+            lambda pair: connection.send(b"RECV", pair[0]),
+            lambda pair: connection.receive_file(
+                pair[1], is_cancelled, (lambda done: on_data(pair[0], done)) if on_data else None
+            )
+        )
+        done = 0
+
+        try:
+            with tracked(is_cancelled, connection):
+                for (remote, local_file), size in answers:
+                    done += 1
+                    received.append((remote, size))
+                    total += size
+
+                    if on_file:
+                        on_file(remote, size)
+
+            if done == 0:
+                raise SyncError("el dispositivo cerró la sesión sync")
+
+            # Everything, or up to where the device stopped taking requests
+            pending = pending[done:]
+            connection.quit()
+
+        except SyncFailed as e:
+            # Answer to pending[done]: drop the partial file and go on with
+            # the rest on a new session
+            remote, local_file = pending[done]
+            failed.append((remote, str(e)))
+
+            if os.path.exists(local_file):
+                os.remove(local_file)
+
+            pending = pending[done + 1:]
+
+        except (SyncError, OSError):
+            if done < len(pending) and os.path.exists(pending[done][1]):
+                os.remove(pending[done][1])
+
+            # Session lost halfway: start over from the file being received,
+            # unless nothing at all came through on this one
+            if done == 0 or is_cancelled():
+                raise
+
+            pending = pending[done:]
+
+        except BaseException:
+            if done < len(pending) and os.path.exists(pending[done][1]):
+                os.remove(pending[done][1])
+            raise
+
+        finally:
+            answers.close()
+            connection.close()
+
+    return received, failed, total
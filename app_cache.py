@@ -0,0 +1,44 @@
+import json
+import os
+import threading
+from config import CACHE_DIR
+
+
+class JsonCache:
+    # Small JSON dict kept between runs. Written through a temporary file so
+    # a crash never leaves it half written; unreadable files start empty.
+
+    def __init__(self, name, root=CACHE_DIR):
+        self.path = os.path.join(root, name)
+        self.lock = threading.Lock()
+        self.data = self.load()
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        return data if isinstance(data, dict) else {}
+
+    def get(self, key, default=None):
+        with self.lock:
+            return self.data.get(key, default)
+
+    def set(self, key, value):
+        with self.lock:
+            self.data[key] = value
+            self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, indent=1, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except OSError:
+            # Read-only install folder: the cache just does not persist
+            pass
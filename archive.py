@@ -0,0 +1,117 @@
+import os
+import tarfile
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from config import ARCHIVE_WORKERS, ARCHIVE_ZIP_LEVEL, ARCHIVE_ZSTD_LEVEL
+
+try:
+    import zstandard
+except ImportError:  # optional, only needed for tar.zst
+    zstandard = None
+
+ARCHIVE_EXTENSIONS = {
+    "zip": ".zip",
+    "tar.zst": ".tar.zst",
+}
+
+
+def available_formats():
+    formats = ["zip"]
+    if zstandard is not None:
+        formats.append("tar.zst")
+    return formats
+
+
+def write_zip(folders, target, level):
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED, compresslevel=level) as archive:
+        for folder in folders:
+            parent = os.path.dirname(os.path.abspath(folder))
+
+            for dirpath, _, filenames in os.walk(folder):
+                for name in filenames:
+                    path = os.path.join(dirpath, name)
+                    archive.write(path, os.path.relpath(path, parent))
+
+
+def write_tar_zst(folders, target, level):
+    compressor = zstandard.ZstdCompressor(level=level)
+
+    with open(target, "wb") as f:
+        with compressor.stream_writer(f) as stream:
+            with tarfile.open(fileobj=stream, mode="w|") as archive:
+                for folder in folders:
+                    archive.add(folder, arcname=os.path.basename(os.path.abspath(folder)))
+
+
+def archive_folders(folders, target, fmt, level=None):
+    # Runs in a worker process. Written under a temporary name so a partial
+    # archive is never mistaken for a finished one
+    tmp = target + ".part"
+
+    try:
+        if fmt == "zip":
+            write_zip(folders, tmp, ARCHIVE_ZIP_LEVEL if level is None else level)
+        elif fmt == "tar.zst":
+            if zstandard is None:
+                raise RuntimeError("tar.zst requiere el paquete 'zstandard'")
+            write_tar_zst(folders, tmp, ARCHIVE_ZSTD_LEVEL if level is None else level)
+        else:
+            raise ValueError(f"Formato de archivo desconocido: {fmt}")
+
+        os.replace(tmp, target)
+
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+    return target, os.path.getsize(target)
+
+
+def archive_path_for(name, fmt, root):
+    return os.path.join(root, name + ARCHIVE_EXTENSIONS[fmt])
+
+
+class Archiver:
+    # Compresses finished backups in a process pool so it overlaps with the
+    # next transfers. on_done(target, size, error) is called from a pool
+    # thread, callers hop back to their own thread if needed
+
+    def __init__(self, workers=ARCHIVE_WORKERS):
+        self.workers = workers
+        self.executor = None
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    def submit(self, folders, target, fmt, on_done, level=None):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            self.pending += 1
+
+        future = self.executor.submit(archive_folders, list(folders), target, fmt, level)
+
+        def done(f):
+            with self.lock:
+                self.pending -= 1
+
+            error = f.exception()
+            if error is not None:
+                on_done(target, 0, error)
+            else:
+                on_done(*f.result(), None)
+
+        future.add_done_callback(done)
+
+    def busy(self):
+        with self.lock:
+            return self.pending > 0
+
+    def shutdown(self, wait=True):
+        with self.lock:
+            executor = self.executor
+            self.executor = None
+
+        if executor is not None:
+            executor.shutdown(wait=wait)
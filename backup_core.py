@@ -1,101 +1,574 @@
 import os
+import posixpath
+import tarfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from config import BACKUP_ROOT, EXTRA_BACKUP_EXTENSIONS, BLOCKED_DIRECTORIES
-from adb import run_adb_command, get_connected_device
+from config import (
+    BACKUP_ROOT, PULL_BATCH_MAX_FILES, PULL_BATCH_MAX_CHARS, TRANSFER_STRATEGY, DEDUP_STORE,
+    VERIFY_BACKUP, PULL_RETRIES, PULL_RETRY_BACKOFF, RESUME_BACKUPS, PLAN_BACKUPS,
+    TRANSFER_LANES, TRANSFER_LANES_DEFAULT, TRANSFER_LANE_FILE_COST
+)
+from adb import (
+    run_adb_command, run_shell_command, stream_shell_command, get_shell, open_exec_stream,
+    native_client, AdbError
+)
+from adb_sync import recv_files
+from manifest import BackupManifest, list_device_files, find_previous_backup, local_file_for, quote_paths
+from journal import TransferJournal, find_resumable_backup
+from object_store import ObjectStore
+from inventory import SCAN_ROOT, scan_extra_files
+from verify import verify_backup
+from progress import ProgressTracker, format_rate, watch_files
+from plan import build_plan
+from throughput import throughput_history
+from strategy_selector import StrategySelector, listing_size
+from cancellation import CancellationToken, tracked, cancellable_sleep
+
+
+# Deep scan finds, inside the backup folder
+EXTRA_DIRECTORIES = "Directorios extra"
+
+
+def batch_files(files, remote_root, local_root):
+    # Group files by their local target directory, since a multi-source
+    # "adb pull" drops every source straight into one destination folder
+    by_dir = {}
+
+    for file in files:
+        rel = file[len(remote_root):].lstrip("/")
+        local_dir = os.path.dirname(os.path.join(local_root, rel))
+        by_dir.setdefault(local_dir, []).append(file)
+
+    for local_dir in sorted(by_dir):
+        batch = []
+        batch_chars = 0
+
+        for file in by_dir[local_dir]:
+            if batch and (
+                len(batch) >= PULL_BATCH_MAX_FILES
+                or batch_chars + len(file) + 3 > PULL_BATCH_MAX_CHARS
+            ):
+                yield local_dir, batch
+                batch = []
+                batch_chars = 0
+
+            batch.append(file)
+            batch_chars += len(file) + 3
+
+        if batch:
+            yield local_dir, batch
+
+
+def pull_files(device, files, remote_root, local_root, log, is_cancelled, progress=None):
+    for local_dir, batch in batch_files(files, remote_root, local_root):
 
+        if is_cancelled():
+            return False
 
-def scan_and_pull_extra_directories(
+        os.makedirs(local_dir, exist_ok=True)
+
+        with watch_files(progress, [(file, local_file_for(file, remote_root, local_root)) for file in batch]):
+            run_adb_command(
+                ["-s", device, "pull"] + batch + [local_dir],
+                log_callback=progress or log,
+                is_cancelled=is_cancelled
+            )
+
+    return not is_cancelled()
+
+
+def sync_pull_files(device, files, remote_root, local_root, log, is_cancelled, progress=None):
+    # Same as pull_files over the sync protocol: one connection for all the
+    # files, exact byte counts for the progress
+    if native_client is None:
+        return pull_files(device, files, remote_root, local_root, log, is_cancelled, progress)
+
+    pairs = [(file, local_file_for(file, remote_root, local_root)) for file in files]
+
+    for local_dir in {os.path.dirname(local_file) for _, local_file in pairs}:
+        os.makedirs(local_dir, exist_ok=True)
+
+    def on_file(remote, size):
+        log(remote)
+        if progress:
+            progress.file_done(remote, size)
+
+    on_data = progress.file_progress if progress else None
+    start = time.monotonic()
+
+    try:
+        received, failed, total_bytes = recv_files(
+            native_client, device, pairs, is_cancelled, on_file, on_data
+        )
+
+    except (OSError, AdbError) as e:
+        if is_cancelled():
+            return False
+
+        if not any(os.path.exists(local_file) for _, local_file in pairs):
+            log(f"sync no disponible ({e}), usando adb pull.")
+            return pull_files(device, files, remote_root, local_root, log, is_cancelled, progress)
+
+        # Interrupted midway: what is missing is retried or resumed later
+        log(f"Error en sync de {remote_root}: {e}")
+        return True
+
+    for remote, message in failed:
+        log(f"No se pudo copiar {remote}: {message}")
+
+    elapsed = max(time.monotonic() - start, 0.001)
+    log(
+        f"{remote_root}: {len(received)} archivos copiados por sync "
+        f"({total_bytes / elapsed / 1024 / 1024:.1f} MB/s, {total_bytes} bytes en {elapsed:.3f}s)"
+    )
+
+    return not is_cancelled()
+
+
+def shard_files(files, lanes, sizes=None):
+    # Largest first onto the least loaded lane, so the lanes end together
+    sizes = sizes or {}
+    shards = [[] for _ in range(min(lanes, len(files)))]
+    loads = [0] * len(shards)
+
+    for file in sorted(files, key=lambda file: sizes.get(file, 0), reverse=True):
+        lane = loads.index(min(loads))
+        shards[lane].append(file)
+        loads[lane] += sizes.get(file, 0) + TRANSFER_LANE_FILE_COST
+
+    return shards
+
+
+def transfer_files(
     device,
-    backup_path,
-    selected_folders,
-    log_callback,
+    files,
+    remote_root,
+    local_root,
+    log,
     is_cancelled,
-    device_family
+    strategy=TRANSFER_STRATEGY,
+    progress=None,
+    lanes=1,
+    sizes=None
 ):
-    log_callback("\nBuscando archivos adicionales...")
-
-    result = run_adb_command(
-        ["-s", device, "shell", "ls", "-R", "/sdcard"],
-        capture_output=True
-    )
+    # Transfer of an explicit file list with the strategies that support it.
+    # lanes > 1: the list is split into shards transferred at the same time
+    # into the same layout (sizes: remote -> size, to balance them)
+    if lanes > 1 and len(files) > 1:
+        # Created up front, the lanes would race for them otherwise
+        for local_dir in {os.path.dirname(local_file_for(file, remote_root, local_root)) for file in files}:
+            os.makedirs(local_dir, exist_ok=True)
+
+        shards = shard_files(files, lanes, sizes)
+
+        with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+            results = list(pool.map(
+                lambda shard: transfer_files(
+                    device, shard, remote_root, local_root, log, is_cancelled, strategy, progress
+                ),
+                shards
+            ))
+
+        return all(results) and not is_cancelled()
+
+    if strategy == "sync":
+        return sync_pull_files(device, files, remote_root, local_root, log, is_cancelled, progress)
+
+    if strategy in ("tar", "tar.gz"):
+        return tar_stream_files(
+            device, files, remote_root, local_root, log, is_cancelled, progress, strategy == "tar.gz"
+        )
 
-    if not result:
-        log_callback("No se pudo escanear almacenamiento.")
-        return True
+    return pull_files(device, files, remote_root, local_root, log, is_cancelled, progress)
 
-    current_dir = ""
-    directories_to_pull = set()
-    root_files_to_pull = set()
 
-    for line in result.splitlines():
+def auto_transfer(
+    device,
+    selector,
+    listing,
+    remote_root,
+    local_root,
+    log,
+    is_cancelled,
+    progress=None,
+    whole=False,
+    lanes=1
+):
+    # Strategy per part of the listing as the selector sees fit; every part
+    # is timed so the next choice learns from it. whole: the listing is the
+    # entire folder remote_root, copied into local_root (only used in one
+    # lane, several lanes always take shards of the file list).
+    whole = whole and lanes == 1
+    parts = selector.choose(listing, whole)
+
+    log(f"Estrategia {remote_root}: " + " + ".join(
+        f"{strategy} ({len(part)} archivos, {listing_size(part) / 1024 / 1024:.1f} MB)"
+        for strategy, part in parts
+    ))
+
+    for strategy, part in parts:
         if is_cancelled():
             return False
 
-        # Detect directory headers from ls -R
-        if line.endswith(":"):
-            current_dir = line[:-1]
-            continue
+        whole_part = whole and len(parts) == 1
+        start = time.monotonic()
+
+        if whole_part and strategy == "pull":
+            with watch_files(progress, [
+                (remote, local_file_for(remote, remote_root, local_root)) for remote, _, _ in part
+            ]):
+                run_adb_command(
+                    ["-s", device, "pull", remote_root, os.path.dirname(local_root)],
+                    log_callback=progress or log,
+                    is_cancelled=is_cancelled
+                )
+            success = True
+
+        elif whole_part and strategy in ("tar", "tar.gz"):
+            success = tar_stream_folder(
+                device, remote_root, os.path.dirname(local_root), log, is_cancelled, progress, strategy == "tar.gz"
+            )
 
-        for ext in EXTRA_BACKUP_EXTENSIONS:
-            if line.lower().endswith(ext):
-                if current_dir.rstrip("/") == "/sdcard":
-                    full_file_path = f"/sdcard/{line}"
-                    root_files_to_pull.add(full_file_path)
+        else:
+            success = transfer_files(
+                device, [remote for remote, _, _ in part], remote_root, local_root,
+                log, is_cancelled, strategy, progress, lanes, {remote: size for remote, size, _ in part}
+            )
 
-                full_dir = current_dir
+        if not success or is_cancelled():
+            return False
 
-                # Skip excluded folders
-                if any(full_dir.startswith(blocked) for blocked in BLOCKED_DIRECTORIES):
-                    break
+        selector.record(strategy, part, time.monotonic() - start, whole_part)
 
-                # Skip if already included in selected folders
-                if any(full_dir.startswith(folder) for folder in selected_folders):
-                    break
+    return True
 
-                if not full_dir.startswith("/"):
-                    break
 
-                if any(full_dir.startswith(existing + "/") or full_dir == existing for existing in directories_to_pull):
-                    break
+def record_listing(manifest, listing, remote_root, local_root):
+    for remote, size, mtime in listing:
+        manifest.add(remote, size, mtime, local_file_for(remote, remote_root, local_root))
 
-                directories_to_pull.add(full_dir)
-                break
 
-    if not directories_to_pull and not root_files_to_pull:
-        log_callback("No se encontraron archivos adicionales.")
+def pull_remaining_files(
+    device,
+    listing,
+    remote_root,
+    local_root,
+    log,
+    is_cancelled,
+    previous=None,
+    journal=None,
+    progress=None,
+    strategy=TRANSFER_STRATEGY,
+    lanes=1
+):
+    # Files already journaled (resumed backup) are kept, unchanged files are
+    # linked from the previous backup, the rest is pulled in batches
+    to_pull = []
+    kept = 0
+    linked = 0
+
+    for remote, size, mtime in listing:
+        local_file = local_file_for(remote, remote_root, local_root)
+
+        if journal is not None and journal.is_done(remote, size, mtime, local_file):
+            kept += 1
+        elif previous is not None and previous.link_unchanged(remote, size, mtime, local_file):
+            linked += 1
+            if journal is not None:
+                journal.record(remote, size, mtime)
+        else:
+            to_pull.append((remote, size))
+
+    if kept:
+        log(f"{kept} archivos ya copiados antes de la interrupción.")
+
+    if previous is not None:
+        log(f"{linked} archivos sin cambios, {len(to_pull)} nuevos o modificados.")
+
+    if progress:
+        progress.begin_folder(remote_root, to_pull)
+
+    if not to_pull:
         return True
 
-    extras_root = os.path.join(backup_path, "Directorios extra")
-    os.makedirs(extras_root, exist_ok=True)
+    if isinstance(strategy, StrategySelector):
+        sizes = dict(to_pull)
+        return auto_transfer(
+            device,
+            strategy,
+            [entry for entry in listing if entry[0] in sizes],
+            remote_root,
+            local_root,
+            log,
+            is_cancelled,
+            progress,
+            lanes=lanes
+        )
 
-    for remote_dir in sorted(directories_to_pull, key=lambda x: x.count("/")):
+    return transfer_files(
+        device,
+        [remote for remote, _ in to_pull],
+        remote_root,
+        local_root,
+        log,
+        is_cancelled,
+        strategy,
+        progress,
+        lanes,
+        dict(to_pull)
+    )
 
-        if is_cancelled():
-            return False
 
-        log_callback(f"Respaldando: {remote_dir}")
+def retry_missing_files(device, journal, listing, remote_root, local_root, log, is_cancelled):
+    # Journals what landed and pulls the rest again with exponential backoff.
+    # Returns the files still missing.
+    missing = journal.sweep(listing, remote_root, local_root)
+    delay = PULL_RETRY_BACKOFF
+
+    for attempt in range(PULL_RETRIES):
+        if not missing or is_cancelled():
+            break
+
+        log(f"Reintentando {len(missing)} archivos en {delay:g}s (intento {attempt + 1}/{PULL_RETRIES})...")
+        cancellable_sleep(is_cancelled, delay)
+        delay *= 2
+
+        # Disconnected: leave them for a resumed backup
+        if not get_shell(device).ping():
+            break
+
+        pull_files(device, [remote for remote, _, _ in missing], remote_root, local_root, log, is_cancelled)
+        missing = journal.sweep(missing, remote_root, local_root)
+
+    return missing
+
+
+def tar_stream(device, parent, names, local_path, label, log, is_cancelled, progress=None, compress=False):
+    # "tar -C parent names" on the device, extracted into local_path
+    # stderr is dropped on the device so it cannot corrupt the stream
+    process = open_exec_stream(
+        device,
+        f"tar -c{'z' if compress else ''}f - -C \"{parent}\" {quote_paths(names)} 2>/dev/null"
+    )
+
+    start = time.monotonic()
+    files = 0
+    total_bytes = 0
+
+    try:
+        with tracked(is_cancelled, process), \
+                tarfile.open(fileobj=process.stdout, mode="r|gz" if compress else "r|") as archive:
+            for member in archive:
+                if is_cancelled():
+                    return False
+
+                if hasattr(tarfile, "data_filter"):
+                    archive.extract(member, local_path, filter="data")
+                else:
+                    archive.extract(member, local_path)
+
+                if member.isfile():
+                    files += 1
+                    total_bytes += member.size
+                    path = posixpath.join(parent, member.name)
+                    log(path)
+
+                    if progress:
+                        progress.file_done(path, member.size)
+
+    except (tarfile.TarError, EOFError, OSError, ValueError) as e:
+        # Stream killed by a cancellation token
+        if not is_cancelled():
+            log(f"Error en stream tar de {label}: {e}")
+        return False
+
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+
+    elapsed = max(time.monotonic() - start, 0.001)
+    log(
+        f"{label}: {files} archivos extraídos "
+        f"({total_bytes / elapsed / 1024 / 1024:.1f} MB/s, {total_bytes} bytes en {elapsed:.3f}s)"
+    )
+
+    return True
+
+
+def tar_stream_folder(device, remote_path, local_path, log, is_cancelled, progress=None, compress=False):
+    remote_path = remote_path.rstrip("/")
+    parent = posixpath.dirname(remote_path) or "/"
+    base_name = posixpath.basename(remote_path)
+
+    return tar_stream(device, parent, [base_name], local_path, remote_path, log, is_cancelled, progress, compress)
+
+
+def tar_stream_files(device, files, remote_root, local_root, log, is_cancelled, progress=None, compress=False):
+    # Files relative to remote_root, one stream per command-line-sized batch
+    remote_root = remote_root.rstrip("/") or "/"
+    names = [file[len(remote_root):].lstrip("/") for file in files]
+    batch = []
+    batch_chars = 0
+
+    for name in names:
+        if batch and (len(batch) >= PULL_BATCH_MAX_FILES or batch_chars + len(name) + 3 > PULL_BATCH_MAX_CHARS):
+            if not tar_stream(device, remote_root, batch, local_root, remote_root, log, is_cancelled, progress, compress):
+                return False
+            batch = []
+            batch_chars = 0
+
+        batch.append(name)
+        batch_chars += len(name) + 3
+
+    if batch:
+        return tar_stream(device, remote_root, batch, local_root, remote_root, log, is_cancelled, progress, compress)
+
+    return True
+
+
+def device_has_tar(device):
+    return bool(run_shell_command(device, "command -v tar").strip())
+
+
+# device -> strategies it supports, probed once
+device_strategies = {}
+
+
+def available_strategies(device, device_family):
+    strategies = device_strategies.get(device)
+
+    if strategies is None:
+        # Spectra folders are always pulled file by file
+        if device_family == "spectra":
+            strategies = ["batch"]
+        else:
+            strategies = ["pull", "batch"]
+
+            if device_has_tar(device):
+                strategies.append("tar")
+                if run_shell_command(device, "command -v gzip").strip():
+                    strategies.append("tar.gz")
+
+            if native_client is not None:
+                strategies.append("sync")
+
+        device_strategies[device] = strategies
+
+    return strategies
+
+
+def resolve_strategy(strategy, device, device_family, model="", firmware="", lanes=1):
+    # "auto" becomes a StrategySelector for the device, the rest as is
+    if strategy != "auto":
+        return strategy
+
+    return StrategySelector(model or device_family, firmware, available_strategies(device, device_family), lanes)
+
+
+def transfer_lanes(model):
+    return TRANSFER_LANES.get(model, TRANSFER_LANES_DEFAULT)
+
+
+def scan_and_pull_extra_directories(
+    device,
+    backup_path,
+    selected_folders,
+    log_callback,
+    is_cancelled,
+    device_family,
+    transfer_strategy=TRANSFER_STRATEGY,
+    manifest=None,
+    previous=None,
+    progress=None,
+    journal=None,
+    plan=None,
+    lanes=1
+):
+    log_callback("\nBuscando archivos adicionales...")
+
+    transfer_strategy = resolve_strategy(transfer_strategy, device, device_family, lanes=lanes)
 
-        run_adb_command(
-            ["-s", device, "pull", remote_dir, extras_root],
-            log_callback=log_callback,
-            is_cancelled=is_cancelled
+    if plan is not None and plan.deep_scan:
+        # Already found by the pre-flight listing
+        result = (
+            [entry.remote_path for entry in plan.extra_dirs],
+            [remote for remote, _, _ in plan.root_files.listing]
         )
+    else:
+        result = scan_extra_files(device, selected_folders, is_cancelled)
+
+    if is_cancelled():
+        return False
+
+    if result is None:
+        log_callback("No se pudo escanear almacenamiento.")
+        return True
+
+    directories_to_pull, root_files_to_pull = result
+
+    if not directories_to_pull and not root_files_to_pull:
+        log_callback("No se encontraron archivos adicionales.")
+        return True
+
+    extras_root = os.path.join(backup_path, EXTRA_DIRECTORIES)
+    os.makedirs(extras_root, exist_ok=True)
 
-    for remote_file in sorted(root_files_to_pull):
+    for remote_dir in directories_to_pull:
 
         if is_cancelled():
             return False
 
-        log_callback(f"Respaldando archivo raíz adicional: {remote_file}")
+        if not pull_folder(
+            device,
+            remote_dir,
+            extras_root,
+            log_callback,
+            is_cancelled,
+            device_family,
+            transfer_strategy,
+            manifest,
+            previous,
+            progress,
+            journal,
+            plan.listing_for(remote_dir) if plan is not None else None,
+            lanes
+        ):
+            return False
 
-        file_name = os.path.basename(remote_file)
-        local_target = os.path.join(extras_root, file_name)
+    if root_files_to_pull:
+        log_callback(f"Respaldando {len(root_files_to_pull)} archivos raíz adicionales")
+
+        if plan is not None and plan.deep_scan:
+            listing = plan.root_files.listing
+        else:
+            listing = list_device_files(device, root_files_to_pull, is_cancelled)
+
+        if manifest is not None:
+            record_listing(manifest, listing, "/sdcard", extras_root)
+
+        if not pull_remaining_files(
+            device,
+            listing,
+            "/sdcard",
+            extras_root,
+            log_callback,
+            is_cancelled,
+            previous,
+            journal,
+            progress,
+            transfer_strategy,
+            lanes
+        ):
+            return False
 
-        run_adb_command(
-            ["-s", device, "pull", remote_file, local_target],
-            log_callback=log_callback,
-            is_cancelled=is_cancelled
-        )
+        missing = []
+        if journal is not None:
+            missing = retry_missing_files(device, journal, listing, "/sdcard", extras_root, log_callback, is_cancelled)
+
+        if progress:
+            progress.end_folder(not missing and not is_cancelled())
 
     return True
 
@@ -122,61 +595,202 @@ def create_backup_directory(model, serial, ot, technician, android_version):
     return backup_path
 
 
-def pull_folder(device, remote_path, local_path, log, is_cancelled, device_family):
+def append_resume_info(backup_path, technician):
+    # The folder keeps who started it, each resume is added below
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    with open(os.path.join(backup_path, "backup_info.txt"), "a") as f:
+        f.write(f"Reanudado: {timestamp} (Técnico: {technician})\n")
+
+
+def pull_folder(
+    device,
+    remote_path,
+    local_path,
+    log,
+    is_cancelled,
+    device_family,
+    strategy=TRANSFER_STRATEGY,
+    manifest=None,
+    previous=None,
+    progress=None,
+    journal=None,
+    listing=None,
+    lanes=1
+):
     log(f"Respaldando {remote_path}...")
 
-    # Use find to detect files (not directories)
-    result = run_adb_command(
-        ["-s", device, "shell", f"find \"{remote_path}\" -type f"],
-        capture_output=True
-    )
+    strategy = resolve_strategy(strategy, device, device_family, lanes=lanes)
+    selected = isinstance(strategy, StrategySelector)
+
+    if listing is None and (manifest is not None or journal is not None or selected):
+        # Size and mtime are needed for the manifest, the journal and the
+        # strategy selector
+        listing = list_device_files(device, [remote_path], is_cancelled)
 
-    files = [
-        line.strip()
-        for line in result.splitlines()
-        if line.strip()
-    ]
+    if listing is not None:
+        files = [remote for remote, _, _ in listing]
+    else:
+        # Use find to detect files (not directories)
+        files = [
+            line.strip()
+            for line in stream_shell_command(device, f"find \"{remote_path}\" -type f", is_cancelled)
+            if line.strip()
+        ]
+
+    if is_cancelled():
+        log(f"Respaldo de {remote_path} cancelado.")
+        return False
 
     if not files:
         log(f"Saltando {remote_path} (carpeta vacía o inexistente)")
         return True
 
     base_name = os.path.basename(remote_path.rstrip("/"))
+    folder_root = os.path.join(local_path, base_name)
+
+    if manifest is not None:
+        record_listing(manifest, listing, remote_path, folder_root)
 
-    if device_family == "spectra":
-        for file in files:
-            rel = file[len(remote_path):].lstrip("/")
+    # Resumed backup: only what is not journaled yet is transferred
+    resuming = journal is not None and any(
+        journal.done.get(remote) == (size, mtime) for remote, size, mtime in listing
+    )
 
-            local_file = os.path.join(local_path, base_name, rel)
+    if strategy in ("tar", "tar.gz") and strategy not in available_strategies(device, device_family):
+        log(f"{strategy} no disponible en el dispositivo, usando adb pull.")
+        strategy = "pull"
 
-            os.makedirs(os.path.dirname(local_file), exist_ok=True)
+    # adb output goes through the progress parser before reaching the log
+    output = progress or log
 
-            run_adb_command(
-                ["-s", device, "pull", file, local_file],
-                log_callback=log,
-                is_cancelled=is_cancelled
+    success = True
+
+    if previous is not None or resuming:
+        success = pull_remaining_files(
+            device, listing, remote_path, folder_root, log, is_cancelled, previous, journal, progress, strategy, lanes
+        )
+
+    else:
+        if progress:
+            if listing is not None:
+                progress.begin_folder(remote_path, [(remote, size) for remote, size, _ in listing])
+            else:
+                progress.begin_folder(remote_path, [(file, None) for file in files])
+
+        if selected:
+            success = auto_transfer(
+                device, strategy, listing, remote_path, folder_root, log, is_cancelled, progress, True, lanes
             )
-        return True
 
-    # Pull folder (ADB handles recursion)
-    run_adb_command(
-        ["-s", device, "pull", remote_path, local_path],
-        log_callback=log,
-        is_cancelled=is_cancelled
-    )
+        elif strategy in ("tar", "tar.gz") and lanes == 1:
+            success = tar_stream_folder(
+                device, remote_path, local_path, log, is_cancelled, progress, strategy == "tar.gz"
+            )
+
+        elif strategy in ("sync", "batch", "tar", "tar.gz") or device_family == "spectra" or lanes > 1:
+            # Several lanes: shards of the file list instead of the directory
+            success = transfer_files(
+                device,
+                files,
+                remote_path,
+                folder_root,
+                log,
+                is_cancelled,
+                strategy,
+                progress,
+                lanes,
+                {remote: size for remote, size, _ in listing} if listing is not None else None
+            )
+
+        else:
+            # Pull folder (ADB handles recursion)
+            with watch_files(progress, [(file, local_file_for(file, remote_path, folder_root)) for file in files]):
+                run_adb_command(
+                    ["-s", device, "pull", remote_path, local_path],
+                    log_callback=output,
+                    is_cancelled=is_cancelled
+                )
+
+    if not success:
+        if is_cancelled():
+            log(f"Respaldo de {remote_path} cancelado.")
+            return False
+        # Broken stream: whatever is missing is retried below
+        if journal is None:
+            log(f"Respaldo de {remote_path} incompleto.")
+            return False
+
+    missing = []
+
+    if journal is not None and not is_cancelled():
+        missing = retry_missing_files(device, journal, listing, remote_path, folder_root, log, is_cancelled)
+
+        if missing and get_shell(device).ping():
+            log(f"ADVERTENCIA: {len(missing)} archivos de {remote_path} no se pudieron copiar:")
+            for remote, _, _ in missing:
+                log(f"  {remote}")
+
+    if progress:
+        stats = progress.end_folder(not missing and not is_cancelled())
+        if stats and stats[1]:
+            log(f"Velocidad {remote_path}: {format_rate(stats[1], stats[2])}")
 
     if is_cancelled():
         log(f"Respaldo de {remote_path} cancelado.")
         return False
 
-    connected_device = get_connected_device()
-    if connected_device != device:
+    # Reuse the device shell session instead of spawning "adb devices"
+    if not get_shell(device).ping():
         log(f"Respaldo de {remote_path} interrumpido: dispositivo desconectado.")
         return False
 
     return True
 
 
+def plan_backup(device, model, selected_folders, deep_scan, strategy, log, is_cancelled, previous=None, journal=None):
+    log("Calculando tamaño del respaldo...")
+
+    def copied(remote_path):
+        # Same layout pull_folder and scan_and_pull_extra_directories use
+        local_root = None
+
+        if journal is not None:
+            backup_path = os.path.dirname(journal.path)
+            extras_root = os.path.join(backup_path, EXTRA_DIRECTORIES)
+            base_name = os.path.basename(remote_path.rstrip("/"))
+
+            if remote_path in selected_folders:
+                local_root = os.path.join(backup_path, base_name)
+            elif remote_path == SCAN_ROOT:
+                local_root = extras_root
+            else:
+                local_root = os.path.join(extras_root, base_name)
+
+        def is_copied(remote, size, mtime):
+            if local_root is not None and journal.is_done(
+                remote, size, mtime, local_file_for(remote, remote_path, local_root)
+            ):
+                return True
+            return previous is not None and previous.unchanged_file(remote, size, mtime) is not None
+
+        return is_copied
+
+    plan = build_plan(
+        device, selected_folders, deep_scan, is_cancelled, copied, throughput_history.rate(model, strategy)
+    )
+
+    if plan is None:
+        if not is_cancelled():
+            log("No se pudo calcular el tamaño del respaldo.")
+        return None
+
+    for line in plan.describe():
+        log(line)
+
+    return plan
+
+
 def run_backup(
     device,
     model,
@@ -188,20 +802,102 @@ def run_backup(
     android_version,
     selected_folders,
     deep_scan,
-    device_family
+    device_family,
+    transfer_strategy=TRANSFER_STRATEGY,
+    incremental=False,
+    dedup=DEDUP_STORE,
+    verify=VERIFY_BACKUP,
+    on_backup_created=None,
+    progress_callback=None,
+    resume=RESUME_BACKUPS,
+    dry_run=False,
+    firmware="",
+    lanes=None
 ):
+    # dry_run: only lists and logs the plan, nothing is created or copied.
+    # lanes: concurrent transfers, by default the model's TRANSFER_LANES
+    journal = None
+
+    if lanes is None:
+        lanes = transfer_lanes(model)
+
+    # Throughput history key, lanes change it
+    history_strategy = transfer_strategy if lanes == 1 else f"{transfer_strategy}x{lanes}"
+
     try:
         log_callback("\nComenzando Respaldo.")
 
-        backup_path = create_backup_directory(
-            model,
-            serial,
-            ot,
-            technician,
-            android_version,
+        progress = ProgressTracker(
+            progress_callback,
+            log_callback,
+            steps=len(selected_folders) + (1 if deep_scan else 0)
         )
 
-        log_callback(f"Directorio de respaldo creado: {backup_path}\n")
+        previous = None
+
+        if incremental:
+            previous_path = find_previous_backup(model, serial)
+
+            if previous_path:
+                previous = BackupManifest.load(previous_path)
+                log_callback(f"Respaldo incremental sobre: {previous_path}")
+            else:
+                log_callback("No hay respaldo previo de este serial, se hará un respaldo completo.")
+
+        backup_path = find_resumable_backup(model, serial, ot) if resume else None
+
+        if backup_path:
+            journal = TransferJournal(backup_path)
+
+        plan = None
+
+        if PLAN_BACKUPS or dry_run:
+            plan = plan_backup(
+                device, model, selected_folders, deep_scan, history_strategy,
+                log_callback, is_cancelled, previous, journal
+            )
+
+            if is_cancelled():
+                log_callback("Respaldo cancelado por el usuario.")
+                return False
+
+            if dry_run:
+                return plan is not None
+
+            if plan is not None and not plan.fits:
+                log_callback(
+                    f"ERROR: espacio insuficiente en {os.path.abspath(BACKUP_ROOT)}: "
+                    f"se necesitan {plan.required_bytes / 1024 / 1024:.1f} MB y hay "
+                    f"{plan.free_bytes / 1024 / 1024:.1f} MB libres."
+                )
+                return False
+
+        if backup_path:
+            log_callback(f"Reanudando respaldo interrumpido: {backup_path}\n")
+            append_resume_info(backup_path, technician)
+        else:
+            backup_path = create_backup_directory(
+                model,
+                serial,
+                ot,
+                technician,
+                android_version,
+            )
+
+            log_callback(f"Directorio de respaldo creado: {backup_path}\n")
+
+        if on_backup_created:
+            on_backup_created(backup_path)
+
+        manifest = BackupManifest(backup_path)
+
+        if journal is None:
+            journal = TransferJournal(backup_path)
+
+        strategy = resolve_strategy(transfer_strategy, device, device_family, model, firmware, lanes)
+
+        if lanes > 1:
+            log_callback(f"Transferencias simultáneas: {lanes}")
 
         for folder in selected_folders:
 
@@ -215,12 +911,21 @@ def run_backup(
                 backup_path,
                 log_callback,
                 is_cancelled,
-                device_family
+                device_family,
+                strategy,
+                manifest,
+                previous,
+                progress,
+                journal,
+                plan.listing_for(folder) if plan is not None else None,
+                lanes
             )
 
             if not success:
                 return False
 
+            progress.next_step()
+
             #log_callback(f"\nRespaldando: {folder}")
         # Deep scan
         if deep_scan and not is_cancelled():
@@ -230,14 +935,68 @@ def run_backup(
                 selected_folders,
                 log_callback,
                 is_cancelled,
-                device_family
+                device_family,
+                strategy,
+                manifest,
+                previous,
+                progress,
+                journal,
+                plan,
+                lanes
             )
 
             if not success:
                 return False
 
+            progress.next_step()
+
+        total_bytes, total_seconds = progress.totals()
+        if total_bytes:
+            log_callback(
+                f"Velocidad promedio: {format_rate(total_bytes, total_seconds)} "
+                f"({total_bytes / 1024 / 1024:.1f} MB en {total_seconds:.1f}s)"
+            )
+
+            # ETA of the next plans
+            throughput_history.record(model, history_strategy, total_bytes, total_seconds)
+
+        if verify and not is_cancelled():
+            progress.set_phase("verify")
+            verified = verify_backup(device, manifest, log_callback, is_cancelled, previous)
+
+            if verified is False:
+                return False
+            if verified is None:
+                log_callback("ADVERTENCIA: el respaldo terminó sin verificar contra el dispositivo.")
+
+        if dedup:
+            progress.set_phase("dedup")
+            skip = previous.linked if previous is not None else ()
+
+            if not ObjectStore().dedupe_backup(backup_path, log_callback, is_cancelled, skip):
+                return False
+
+        manifest.save()
+        journal.mark_complete()
+        progress.set_phase("done")
+
         return True
 
     except Exception as e:
-        log_callback(f"ERROR: {str(e)}")
+        # A stream killed by cancel() can fail in odd ways, that is no error
+        if is_cancelled():
+            log_callback("Respaldo cancelado por el usuario.")
+        else:
+            log_callback(f"ERROR: {str(e)}")
         return False
+
+    finally:
+        if journal is not None:
+            # Stopped on purpose: the next backup of this OT starts over. A
+            # dry run only reads the journal of the one it previews.
+            if is_cancelled() and not journal.complete and not dry_run:
+                journal.mark_cancelled()
+            journal.close()
+
+        if isinstance(is_cancelled, CancellationToken) and is_cancelled():
+            log_callback(f"Respaldo detenido {is_cancelled.latency():.2f}s después de cancelar.")
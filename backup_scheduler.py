@@ -0,0 +1,146 @@
+from collections import deque
+
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+
+from backup_worker import BackupWorker
+from config import MAX_CONCURRENT_BACKUPS, TRANSFER_STRATEGY, DEDUP_STORE, VERIFY_BACKUP
+
+
+class BackupJob:
+    def __init__(self, device, model, serial, ot, technician, android_version, selected_folders, deep_scan, device_family, transfer_strategy=TRANSFER_STRATEGY, incremental=False, dedup=DEDUP_STORE, verify=VERIFY_BACKUP, firmware=""):
+        self.device = device
+        self.model = model
+        self.serial = serial
+        self.ot = ot
+        self.technician = technician
+        self.android_version = android_version
+        self.selected_folders = selected_folders
+        self.deep_scan = deep_scan
+        self.device_family = device_family
+        self.transfer_strategy = transfer_strategy
+        self.incremental = incremental
+        self.dedup = dedup
+        self.verify = verify
+        self.firmware = firmware
+        self.worker = None
+        self.thread = None
+
+
+# Runs one BackupWorker per device, at most max_concurrent at a time
+class BackupScheduler(QObject):
+    job_queued = pyqtSignal(str)
+    job_started = pyqtSignal(str)
+    job_finished = pyqtSignal(str, bool)
+    job_log = pyqtSignal(str, str)
+    job_backup_created = pyqtSignal(str, str)
+    job_progress = pyqtSignal(str, object)
+    all_finished = pyqtSignal()
+
+    # Relays worker results back to the scheduler thread
+    _worker_finished = pyqtSignal(str, bool)
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT_BACKUPS, parent=None):
+        super().__init__(parent)
+        self.max_concurrent = max(1, max_concurrent)
+        self.pending = deque()
+        self.running = {}
+
+        self._worker_finished.connect(self._on_finished)
+
+    def submit(self, job):
+        if self.is_scheduled(job.device):
+            return False
+
+        self.pending.append(job)
+        self.job_queued.emit(job.device)
+        self._start_next()
+        return True
+
+    def is_scheduled(self, device):
+        return device in self.running or any(job.device == device for job in self.pending)
+
+    def has_jobs_for_ot(self, ot):
+        return any(job.ot == ot for job in list(self.running.values()) + list(self.pending))
+
+    def is_running(self, device):
+        return device in self.running
+
+    def has_jobs(self):
+        return bool(self.running or self.pending)
+
+    def cancel(self, device):
+        for job in list(self.pending):
+            if job.device == device:
+                self.pending.remove(job)
+                self.job_finished.emit(device, False)
+                self._check_all_finished()
+                return True
+
+        job = self.running.get(device)
+        if job:
+            job.worker.cancel()
+            return True
+
+        return False
+
+    def cancel_all(self):
+        while self.pending:
+            job = self.pending.popleft()
+            self.job_finished.emit(job.device, False)
+
+        for job in list(self.running.values()):
+            job.worker.cancel()
+
+        self._check_all_finished()
+
+    def _start_next(self):
+        while self.pending and len(self.running) < self.max_concurrent:
+            job = self.pending.popleft()
+            self._start(job)
+
+    def _start(self, job):
+        device = job.device
+
+        job.thread = QThread()
+        job.worker = BackupWorker(
+            job.device,
+            job.model,
+            job.serial,
+            job.ot,
+            job.technician,
+            job.android_version,
+            job.selected_folders,
+            job.deep_scan,
+            job.device_family,
+            job.transfer_strategy,
+            job.incremental,
+            job.dedup,
+            job.verify,
+            job.firmware
+        )
+
+        job.worker.moveToThread(job.thread)
+
+        job.thread.started.connect(job.worker.run)
+        job.worker.log_signal.connect(lambda message, d=device: self.job_log.emit(d, message))
+        job.worker.backup_created.connect(lambda path, d=device: self.job_backup_created.emit(d, path))
+        job.worker.progress_signal.connect(lambda event, d=device: self.job_progress.emit(d, event))
+        job.worker.finished.connect(lambda success, d=device: self._worker_finished.emit(d, success))
+
+        job.worker.finished.connect(job.thread.quit)
+        job.worker.finished.connect(job.worker.deleteLater)
+        job.thread.finished.connect(job.thread.deleteLater)
+
+        self.running[device] = job
+        job.thread.start()
+        self.job_started.emit(device)
+
+    def _on_finished(self, device, success):
+        self.running.pop(device, None)
+        self.job_finished.emit(device, success)
+        self._start_next()
+        self._check_all_finished()
+
+    def _check_all_finished(self):
+        if not self.has_jobs():
+            self.all_finished.emit()
@@ -1,15 +1,18 @@
 from PyQt6.QtCore import QObject, pyqtSignal
 from backup_core import run_backup
-from adb import run_adb_command
+from cancellation import CancellationToken
+from config import TRANSFER_STRATEGY, DEDUP_STORE, VERIFY_BACKUP
 
 
 class BackupWorker(QObject):
     finished = pyqtSignal(bool)
     log_signal = pyqtSignal(str)
+    backup_created = pyqtSignal(str)
+    progress_signal = pyqtSignal(object)  # progress.TransferProgress
 
-    def __init__(self, device, model, serial, ot, technician, android_version, selected_folders, deep_scan, device_family):
+    def __init__(self, device, model, serial, ot, technician, android_version, selected_folders, deep_scan, device_family, transfer_strategy=TRANSFER_STRATEGY, incremental=False, dedup=DEDUP_STORE, verify=VERIFY_BACKUP, firmware=""):
         super().__init__()
-        self._is_cancelled = False
+        self.token = CancellationToken()
         self.device = device
         self.model = model
         self.serial = serial
@@ -19,15 +22,19 @@ class BackupWorker(QObject):
         self.selected_folders = selected_folders
         self.deep_scan = deep_scan
         self.device_family = device_family
+        self.transfer_strategy = transfer_strategy
+        self.incremental = incremental
+        self.dedup = dedup
+        self.verify = verify
+        self.firmware = firmware
 
     def cancel(self):
-        if not self._is_cancelled:
-            self._is_cancelled = True
+        # Kills the adb processes and streams the backup has open
+        if self.token.cancel():
             self.log_signal.emit("Cancelando respaldo...")
-            run_adb_command(["disconnect", self.device])  # Break ADB transfers
 
     def is_cancelled(self):
-        return self._is_cancelled
+        return self.token()
 
     def run(self):
         try:
@@ -38,11 +45,18 @@ class BackupWorker(QObject):
                 self.ot,
                 self.technician,
                 self.log_signal.emit,
-                lambda: self._is_cancelled,
+                self.token,
                 self.android_version,
                 self.selected_folders,
                 self.deep_scan,
-                self.device_family
+                self.device_family,
+                self.transfer_strategy,
+                self.incremental,
+                self.dedup,
+                self.verify,
+                self.backup_created.emit,
+                self.progress_signal.emit,
+                firmware=self.firmware
             )
             self.finished.emit(success)
         except Exception as e:
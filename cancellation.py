@@ -0,0 +1,89 @@
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class CancellationToken:
+    # Cancel flag of one backup job, called like the is_cancelled lambdas it
+    # replaces. adb processes, exec streams, shell sessions and sync
+    # connections opened for the job are registered while they run and
+    # killed by cancel(), so a read blocked on them returns right away
+    # instead of at the next output line.
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.lock = threading.Lock()
+        self.resources = set()
+        self.cancelled_at = None
+
+    def __call__(self):
+        return self.event.is_set()
+
+    def cancel(self):
+        # Returns False when it was already cancelled
+        with self.lock:
+            if self.event.is_set():
+                return False
+
+            self.cancelled_at = time.monotonic()
+            self.event.set()
+            resources = list(self.resources)
+            self.resources.clear()
+
+        for resource in resources:
+            kill(resource)
+
+        return True
+
+    def wait(self, timeout=None):
+        return self.event.wait(timeout)
+
+    def latency(self):
+        # Seconds since cancel(), None if not cancelled
+        if self.cancelled_at is None:
+            return None
+        return time.monotonic() - self.cancelled_at
+
+    def register(self, resource):
+        with self.lock:
+            if not self.event.is_set():
+                self.resources.add(resource)
+                return
+
+        # Opened after cancel() went through the list
+        kill(resource)
+
+    def unregister(self, resource):
+        with self.lock:
+            self.resources.discard(resource)
+
+    @contextmanager
+    def track(self, resource):
+        self.register(resource)
+        try:
+            yield resource
+        finally:
+            self.unregister(resource)
+
+
+def kill(resource):
+    # Popen, adb_client.ServiceStream, adb_sync.SyncConnection
+    try:
+        resource.kill()
+    except (OSError, ValueError):
+        pass
+
+
+def tracked(is_cancelled, resource):
+    # Registers resource for the duration of a with block when is_cancelled
+    # is a token; plain callables keep checking between reads only
+    if isinstance(is_cancelled, CancellationToken):
+        return is_cancelled.track(resource)
+    return nullcontext(resource)
+
+
+def cancellable_sleep(is_cancelled, seconds):
+    if isinstance(is_cancelled, CancellationToken):
+        is_cancelled.wait(seconds)
+    else:
+        time.sleep(seconds)
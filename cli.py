@@ -0,0 +1,254 @@
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from adb import get_connected_devices, get_device_info, close_all_shells
+from backup_core import run_backup
+from cancellation import CancellationToken
+from device_cache import DeviceCache
+from config import (
+    DEVICE_PROFILES, TRANSFER_STRATEGIES, TRANSFER_STRATEGY, DEDUP_STORE, VERIFY_BACKUP,
+    MAX_CONCURRENT_BACKUPS, APP_VER
+)
+
+# Headless backups: no Qt, no update check. Logs go to stderr, results as
+# JSON to --json (or stdout with "-").
+#
+#   python main.py --cli --ot 70648 --technician T-37 --deep-scan --json -
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_NO_DEVICES = 2
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="tbu",
+        description="Trimble Backup Utility sin interfaz gráfica"
+    )
+    parser.add_argument("--ot", required=True, help="orden de trabajo")
+    parser.add_argument("--technician", required=True, help="técnico, ej: T-37")
+    parser.add_argument(
+        "--device", action="append", default=[],
+        help="serial adb a respaldar (repetible, por defecto todos los conectados)"
+    )
+    parser.add_argument(
+        "--folder", action="append", default=[],
+        help="carpeta a respaldar, ej: \"Trimble Data\" o /sdcard/Documents (repetible, "
+             "por defecto las marcadas en el perfil del equipo)"
+    )
+    parser.add_argument("--all-folders", action="store_true", help="todas las carpetas del perfil")
+    parser.add_argument("--deep-scan", action="store_true", help="búsqueda adicional de archivos de proyecto")
+    parser.add_argument("--strategy", choices=sorted(TRANSFER_STRATEGIES), default=TRANSFER_STRATEGY)
+    parser.add_argument(
+        "--lanes", type=int,
+        help="transferencias simultáneas por equipo (por defecto según el modelo)"
+    )
+    parser.add_argument("--incremental", action="store_true")
+    parser.add_argument("--dedup", action="store_true", default=DEDUP_STORE)
+    parser.add_argument("--verify", action="store_true", default=VERIFY_BACKUP)
+    parser.add_argument(
+        "--dry-run", action="store_true",
+        help="solo mostrar el plan (archivos, tamaño, espacio libre y tiempo estimado), sin copiar nada"
+    )
+    parser.add_argument(
+        "--serial", action="append", default=[], metavar="DEVICE=SN",
+        help="serial manual para un equipo con serial inválido"
+    )
+    parser.add_argument("--jobs", type=int, default=MAX_CONCURRENT_BACKUPS, help="respaldos simultáneos")
+    parser.add_argument("--json", metavar="PATH", help="resultados en JSON (\"-\" para stdout)")
+    parser.add_argument("--quiet", action="store_true", help="sin log, solo resultados")
+    parser.add_argument("--version", action="version", version=APP_VER)
+
+    args = parser.parse_args(argv)
+
+    args.serial_overrides = {}
+    for item in args.serial:
+        device, sep, serial = item.partition("=")
+        if not sep or not device or not serial:
+            parser.error(f"--serial espera DEVICE=SN: {item}")
+        args.serial_overrides[device] = serial.strip().upper()
+
+    return args
+
+
+def select_folders(args, device_family):
+    profile = DEVICE_PROFILES[device_family]["folders"]
+
+    if args.folder:
+        return [
+            folder if folder.startswith("/") else f"/sdcard/{folder.strip('/')}"
+            for folder in args.folder
+        ]
+
+    return [folder for folder, checked in profile if checked or args.all_folders]
+
+
+class Console:
+    # Serializes log lines from the backup threads
+
+    def __init__(self, quiet):
+        self.quiet = quiet
+        self.lock = threading.Lock()
+
+    def log(self, device, line):
+        if self.quiet:
+            return
+
+        with self.lock:
+            for part in str(line).splitlines() or [""]:
+                print(f"[{device}] {part}", file=sys.stderr, flush=True)
+
+
+def backup_device(device, args, console, cancelled, device_cache):
+    # cancelled: the device's CancellationToken
+    log = lambda line: console.log(device, line)
+
+    result = {
+        "device": device,
+        "model": None,
+        "serial": None,
+        "device_family": None,
+        "ot": args.ot,
+        "technician": args.technician,
+        "folders": [],
+        "backup_path": None,
+        "success": False,
+        "error": None,
+        "seconds": None,
+    }
+
+    if cancelled():
+        result["error"] = "Cancelado"
+        return result
+
+    start = time.monotonic()
+
+    try:
+        info = get_device_info(device)
+
+        # Serials corrected by hand in the GUI hold while the build and unit
+        # ids are the same. A bogus detected serial can be shared by several
+        # units: with no other id to tell them apart it is only suggested.
+        cached = device_cache.lookup(device)
+        previous_override = None
+
+        if device not in args.serial_overrides and cached and cached[1] and device_cache.matches(device, info):
+            if info.suspicious_serial and not device_cache.identifies(device):
+                previous_override = cached[1]
+            else:
+                args.serial_overrides[device] = cached[1]
+
+        result["model"] = info.model
+        result["serial"] = args.serial_overrides.get(device, info.serial)
+        result["device_family"] = info.family
+
+        if device not in args.serial_overrides and info.suspicious_serial:
+            log(f"ADVERTENCIA: serial inusual '{info.serial}', use --serial {device}=SN para corregirlo.")
+
+            if previous_override:
+                log(f"La última vez se ingresó {previous_override} a mano: --serial {device}={previous_override}")
+
+        if not info.family:
+            result["error"] = f"Dispositivo no compatible: {info.model}"
+            log(result["error"])
+            return result
+
+        result["folders"] = select_folders(args, info.family)
+
+        created = []
+        result["success"] = run_backup(
+            device,
+            info.model,
+            result["serial"],
+            args.ot,
+            args.technician,
+            log,
+            cancelled,
+            info.android_version,
+            result["folders"],
+            args.deep_scan,
+            info.family,
+            args.strategy,
+            args.incremental,
+            args.dedup,
+            args.verify,
+            created.append,
+            dry_run=args.dry_run,
+            firmware=info.firmware,
+            lanes=args.lanes
+        )
+
+        result["backup_path"] = created[0] if created else None
+
+        if not result["success"]:
+            result["error"] = "Cancelado" if cancelled() else "Respaldo fallido, ver log"
+
+    except Exception as e:
+        result["error"] = str(e)
+        log(f"ERROR: {e}")
+
+    finally:
+        result["seconds"] = round(time.monotonic() - start, 3)
+
+    return result
+
+
+def write_results(path, results):
+    text = json.dumps({"version": APP_VER, "results": results}, indent=2, ensure_ascii=False)
+
+    if path == "-":
+        print(text)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    console = Console(args.quiet)
+    devices = args.device or get_connected_devices()
+
+    if not devices:
+        console.log("adb", "Ningún dispositivo detectado.")
+        if args.json:
+            write_results(args.json, [])
+        return EXIT_NO_DEVICES
+
+    pool = ThreadPoolExecutor(max_workers=max(1, args.jobs))
+    device_cache = DeviceCache()
+    tokens = {device: CancellationToken() for device in devices}
+    futures = [
+        pool.submit(backup_device, device, args, console, tokens[device], device_cache)
+        for device in devices
+    ]
+
+    try:
+        # Polling keeps Ctrl+C responsive on Windows
+        while not all(future.done() for future in futures):
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        console.log("tbu", "Cancelando respaldos...")
+        for token in tokens.values():
+            token.cancel()
+
+    pool.shutdown(wait=True)
+    close_all_shells()
+
+    results = [future.result() for future in futures]
+
+    for result in results:
+        status = "OK" if result["success"] else f"ERROR ({result['error']})"
+        console.log(result["device"], f"{status} {result['backup_path'] or ''}".rstrip())
+
+    if args.json:
+        write_results(args.json, results)
+
+    return EXIT_OK if all(result["success"] for result in results) else EXIT_FAILED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -18,9 +18,135 @@ BLOCKED_DIRECTORIES = [
     "/sdcard/LOST.DIR"
 ]
 
-ADB_PATH = resource_path("adb/adb.exe")
+# TBU_ADB_PATH points the utility at another adb (e.g. tools/fake_adb.py)
+ADB_PATH = os.environ.get("TBU_ADB_PATH") or resource_path("adb/adb.exe")
 BACKUP_ROOT = "backups"
 
+# Data kept between runs (adb version, last update check)
+CACHE_DIR = "cache"
+UPDATE_CHECK_INTERVAL = 24 * 60 * 60  # seconds
+
+# GUI log: lines are appended in batches every LOG_FLUSH_INTERVAL_MS, the
+# widget keeps the last LOG_MAX_LINES and the full log is written to LOG_DIR
+LOG_DIR = "logs"
+LOG_FLUSH_INTERVAL_MS = 100
+LOG_MAX_LINES = 5000
+
+# Talk to the adb server over its socket instead of spawning adb.exe
+# (TBU_ADB_NATIVE=0 disables it); falls back to adb.exe when unavailable
+ADB_NATIVE = os.environ.get("TBU_ADB_NATIVE", "1") != "0"
+ADB_SERVER_HOST = "127.0.0.1"
+ADB_SERVER_PORT = int(os.environ.get("ANDROID_ADB_SERVER_PORT") or 5037)
+ADB_SERVER_TIMEOUT = 5.0  # seconds, connect and request answers
+
+# The device watcher restarts the adb server when track-devices ends,
+# waiting from ADB_RESTART_BACKOFF_MIN up to ADB_RESTART_BACKOFF_MAX seconds
+ADB_RESTART_BACKOFF_MIN = 0.5
+ADB_RESTART_BACKOFF_MAX = 30.0
+
+# Lines of adb output kept as return value of run_adb_command
+ADB_OUTPUT_TAIL_LINES = 50
+
+# Max devices backed up at the same time (USB hub bench)
+MAX_CONCURRENT_BACKUPS = 4
+
+# Per-file pulls are grouped into one "adb pull f1 f2 ... dir" per directory,
+# split so the command line stays well under the Windows limit
+PULL_BATCH_MAX_FILES = 200
+PULL_BATCH_MAX_CHARS = 8000
+
+# Folder transfer strategy:
+#   "auto"   -> picked per folder by strategy_selector.py from the file
+#               sizes and what was measured before on the same model
+#   "pull"   -> adb pull (per directory, or batched per file on Spectra)
+#   "batch"  -> adb pull of the files in batches (PULL_BATCH_MAX_FILES)
+#   "tar"    -> tar stream over "adb exec-out", extracted as it arrives
+#   "tar.gz" -> same, gzip-compressed on the device
+#   "sync"   -> sync protocol over the adb server socket, many files per
+#               connection (falls back to adb pull without the socket client)
+TRANSFER_STRATEGIES = {
+    "auto": "Automática (por carpeta)",
+    "pull": "adb pull",
+    "batch": "adb pull por lotes de archivos",
+    "tar": "Stream tar (exec-out)",
+    "tar.gz": "Stream tar comprimido (exec-out)",
+    "sync": "Protocolo sync (socket)",
+}
+# "auto" only once STRATEGY_COSTS is backed by measurements on real units
+TRANSFER_STRATEGY = "pull"
+
+# Selector cost model before anything is measured, per strategy: seconds
+# per adb call (batch or stream), seconds per file and bytes per second.
+# Measured transfers scale these per model, firmware and kind of folder,
+# weighted against STRATEGY_PRIOR_SECONDS of the prior. Files from
+# STRATEGY_LARGE_FILE bytes up can go with another strategy than the
+# small ones of the same folder. A strategy not measured yet is tried once
+# when it is expected within STRATEGY_EXPLORE_MARGIN times the best.
+STRATEGY_COSTS = {
+    "pull": (0.1, 0.003, 30 * 1024 * 1024),
+    "batch": (0.1, 0.003, 30 * 1024 * 1024),
+    "tar": (0.1, 0.0005, 25 * 1024 * 1024),
+    "tar.gz": (0.1, 0.0007, 15 * 1024 * 1024),
+    "sync": (0.05, 0.001, 30 * 1024 * 1024),
+}
+STRATEGY_PRIOR_SECONDS = 5.0
+STRATEGY_LARGE_FILE = 4 * 1024 * 1024
+STRATEGY_EXPLORE_MARGIN = 1.5
+
+# Concurrent transfer lanes per model: a folder's file list is split into
+# that many shards copied at the same time (adb pull batches, tar streams or
+# sync connections), which can keep USB 3 collectors busy with small files.
+# Shards are balanced by size plus TRANSFER_LANE_FILE_COST bytes per file.
+# Off until measured on the real model: tools/benchmark.py --lanes 1,2,4
+# against the device, then e.g. {"TSC510": 2} here, or --lanes in the CLI.
+TRANSFER_LANES = {}
+TRANSFER_LANES_DEFAULT = 1
+TRANSFER_LANE_FILE_COST = 64 * 1024
+
+# sync: requests sent ahead of their answers, socket read and file write
+# buffer sizes in bytes
+SYNC_PIPELINE = 32
+SYNC_READ_BUFFER = 256 * 1024
+SYNC_WRITE_BUFFER = 1024 * 1024
+
+# Content-addressed store under BACKUP_ROOT, backup folders hardlink into it
+DEDUP_STORE = False
+OBJECT_STORE_DIR = ".objects"
+
+# Files written by the utility itself in every backup folder
+BACKUP_METADATA_FILES = (
+    "backup_info.txt", "manifest.tsv", "checksums.md5", "checksums.unverified.md5", "journal.tsv"
+)
+
+# Interrupted backups continue into the same folder (same device and OT,
+# not when the operator cancelled them), files that failed to copy are
+# pulled again with exponential backoff
+RESUME_BACKUPS = True
+PULL_RETRIES = 3
+PULL_RETRY_BACKOFF = 1.0
+
+# Pre-flight plan: sizes of everything to copy are listed before the first
+# pull and the backup does not start unless the free space under
+# BACKUP_ROOT covers it plus PLAN_FREE_SPACE_RESERVE bytes. The ETA comes
+# from the last THROUGHPUT_HISTORY_SAMPLES backups of the same model and
+# strategy.
+PLAN_BACKUPS = True
+PLAN_FREE_SPACE_RESERVE = 512 * 1024 * 1024
+THROUGHPUT_HISTORY_SAMPLES = 10
+
+# Integrity check: md5sum on the device in batches, local hashing in threads
+VERIFY_BACKUP = False
+VERIFY_BATCH_MAX_FILES = 200
+VERIFY_LOCAL_WORKERS = 4
+
+# Post-backup archival of finished folders (runs in a process pool)
+#   None -> no archive, "zip", "tar.zst" (needs the zstandard package)
+ARCHIVE_FORMAT = None
+ARCHIVE_BUNDLE_OT = False
+ARCHIVE_WORKERS = 2
+ARCHIVE_ZIP_LEVEL = 6
+ARCHIVE_ZSTD_LEVEL = 10
+
 TRIMBLE_MODELS = [
     # Trimble
     "TSC5", "TSC510", "TSC710",
@@ -0,0 +1,75 @@
+import time
+from adb import DeviceInfo, is_suspicious_serial
+from app_cache import JsonCache
+
+DEVICE_CACHE = "devices.json"
+
+# Identity of a collector, kept per adb transport serial. Storage and
+# battery change between connections and are never cached.
+DESCRIPTOR_FIELDS = (
+    "model", "manufacturer", "serial", "android_version",
+    "firmware", "build_type", "fingerprint"
+)
+
+# Serial properties other than the one shown, to tell apart units that
+# share a bogus detected serial (TDC600 on Android 8)
+UNIT_ID_PROPERTIES = ("ro.serialno", "ro.boot.serialno")
+
+
+def unit_ids(info):
+    return [info.properties.get(name, "").strip() for name in UNIT_ID_PROPERTIES]
+
+
+class DeviceCache(JsonCache):
+
+    def __init__(self, name=DEVICE_CACHE):
+        super().__init__(name)
+
+    def lookup(self, device):
+        # Returns (DeviceInfo, manual serial or None), or None if unknown
+        entry = self.get(device)
+
+        if not entry or not entry.get("fingerprint"):
+            return None
+
+        info = DeviceInfo(**{name: entry.get(name, "") for name in DESCRIPTOR_FIELDS})
+        return info, entry.get("serial_override")
+
+    def store(self, device, info, serial_override=None):
+        entry = {name: getattr(info, name) for name in DESCRIPTOR_FIELDS}
+        entry["unit_ids"] = unit_ids(info)
+        entry["serial_override"] = serial_override
+        entry["updated_at"] = int(time.time())
+        self.set(device, entry)
+
+    def set_override(self, device, serial_override):
+        entry = self.get(device)
+        if entry is None:
+            return
+
+        self.set(device, dict(entry, serial_override=serial_override))
+
+    def matches(self, device, info):
+        # Same build, detected serial and unit ids: the cached identity holds
+        entry = self.get(device)
+        return (
+            entry is not None
+            and entry.get("fingerprint") == info.fingerprint
+            and entry.get("serial") == info.serial
+            # Entries cached before unit ids were kept
+            and entry.get("unit_ids", unit_ids(info)) == unit_ids(info)
+        )
+
+    def identifies(self, device):
+        # The cached identity holds a plausible unit serial: its manual
+        # serial can be applied even if the detected one is bogus. Otherwise
+        # another unit of the same firmware could look exactly the same.
+        entry = self.get(device)
+        return entry is not None and any(
+            not is_suspicious_serial(value) for value in entry.get("unit_ids", ())
+        )
+
+    def forget(self, device):
+        with self.lock:
+            if self.data.pop(device, None) is not None:
+                self.save()
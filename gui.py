@@ -1,8 +1,7 @@
-import subprocess
+import threading
 import time
 import sys
 import os
-import requests
 import webbrowser
 
 from PyQt6.QtGui import (
@@ -13,35 +12,41 @@ from PyQt6.QtWidgets import (
     QHBoxLayout, QPushButton, QLabel,
     QPlainTextEdit, QLineEdit, QMessageBox,
     QSplitter, QGraphicsOpacityEffect, QStackedLayout,
-    QCheckBox, QDialog, QGroupBox, QInputDialog, QApplication
+    QCheckBox, QDialog, QGroupBox, QInputDialog, QApplication,
+    QListWidget, QListWidgetItem, QComboBox, QProgressBar
 )
 from PyQt6.QtCore import (
-    Qt, QThread, pyqtSignal,
+    Qt, QThread, QObject, QTimer, pyqtSignal,
     QPropertyAnimation, QT_VERSION_STR)
 from adb import (
-    get_adb_version,
-    get_connected_device,
-    get_device_info
+    run_adb_command,
+    open_track_devices,
+    get_device_info,
+    close_shell
+)
+from adb_client import read_frames, parse_device_states
+from config import (
+    DEVICE_PROFILES, MODEL_IMAGES, APP_VER,
+    TRANSFER_STRATEGIES, TRANSFER_STRATEGY, DEDUP_STORE, VERIFY_BACKUP,
+    BACKUP_ROOT, ARCHIVE_FORMAT, ARCHIVE_BUNDLE_OT,
+    ADB_RESTART_BACKOFF_MIN, ADB_RESTART_BACKOFF_MAX
+)
+from backup_scheduler import BackupScheduler, BackupJob
+from archive import Archiver, available_formats, archive_path_for
+from progress import format_rate
+from log_sink import LogSink
+from device_cache import DeviceCache
+from startup import (
+    cached_adb_version, refresh_adb_version, start_adb_server,
+    cached_update, refresh_update
 )
-from config import TRIMBLE_MODELS, SPECTRA_MODELS, DEVICE_PROFILES, MODEL_IMAGES, APP_VER, VERSION_URL
-from backup_worker import BackupWorker
-from packaging import version
-
-
-def check_for_updates():
-    try:
-        response = requests.get(VERSION_URL, timeout=3)
-        data = response.json()
-
-        latest_version = data["version"]
-
-        if version.parse(latest_version) > version.parse(APP_VER):
-            return data
 
-    except Exception as e:
-        print("Update check failed:", e)
+def format_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} {unit}"
+        size /= 1024
 
-    return None
 
 def resource_path(relative_path):
     if hasattr(sys, '_MEIPASS'):
@@ -49,11 +54,69 @@ def resource_path(relative_path):
     return os.path.join(os.path.abspath("."), relative_path)
 
 
+_pixmaps = {}
+
+
+def load_pixmap(relative_path):
+    # Decoded on first use only, then reused
+    pixmap = _pixmaps.get(relative_path)
+
+    if pixmap is None:
+        pixmap = QPixmap(resource_path(relative_path))
+        _pixmaps[relative_path] = pixmap
+
+    return pixmap
+
+
+class StartupTasks(QObject):
+    # Runs the slow startup work in a daemon thread and reports through
+    # queued signals. The window starts from the cached values instead.
+    adb_ready = pyqtSignal()
+    adb_version_ready = pyqtSignal(str)
+    update_available = pyqtSignal(object)
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def run(self):
+        # Pre-warm the server before anything else talks to adb
+        start_adb_server()
+        self.adb_ready.emit()
+
+        self.adb_version_ready.emit(refresh_adb_version())
+
+        fresh, update = cached_update()
+        if not fresh:
+            update = refresh_update()
+
+        if update:
+            self.update_available.emit(update)
+
+
+# adb states worth telling the operator about
+DEVICE_STATES = {
+    "unauthorized": "sin autorizar, acepta la depuración USB en la colectora.",
+    "offline": "sin respuesta (offline), reconecta el cable USB.",
+    "recovery": "en modo recovery.",
+    "sideload": "en modo sideload.",
+    "bootloader": "en modo bootloader.",
+    "no permissions": "sin permisos de USB en este equipo.",
+}
+
+PROGRESS_PHASES = {
+    "transfer": "Transfiriendo",
+    "verify": "Verificando",
+    "dedup": "Deduplicando",
+    "done": "Finalizando",
+}
+
+
 class AboutDialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, adb_version=None):
         super().__init__(parent)
 
-        adb_version = get_adb_version()
+        if adb_version is None:
+            adb_version = "ADB (consultando versión...)"
 
         self.setWindowFlags(
             Qt.WindowType.Window |
@@ -135,78 +198,89 @@ class AboutDialog(QDialog):
 class AdbWatcher(QThread):
     device_connected = pyqtSignal(str)
     device_disconnected = pyqtSignal(str)
+    # serial, new state ("device", "offline", "unauthorized", "recovery"...,
+    # empty when it is gone)
+    device_state_changed = pyqtSignal(str, str)
 
-    def __init__(self, adb_path=None):
+    def __init__(self):
         super().__init__()
 
-        if adb_path is None:
-            adb_path = resource_path("adb/adb.exe")
-
-        self.adb_path = adb_path
         self.running = True
-        self.current_device = None  # track currently connected device
+        self.states = {}  # serial -> state of every device adb reports
         self.process = None
+        self.stop_event = threading.Event()
 
     def run(self):
-        self.process = subprocess.Popen(
-            [self.adb_path, "track-devices"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
+        backoff = ADB_RESTART_BACKOFF_MIN
 
         while self.running:
-            line = self.process.stdout.readline()
-            if not line:
-                time.sleep(0.05)
-                continue
+            started = time.monotonic()
+            self.process = open_track_devices()
 
-            line = line.strip()
-            if not line:
-                continue
+            try:
+                # Blocking reads: idle while nothing changes
+                for payload in read_frames(self.process.stdout):
+                    self.update_states(parse_device_states(payload))
+            except (OSError, ValueError):
+                pass  # garbled or reset stream (server restart), start over
+            finally:
+                if self.process.poll() is None:
+                    self.process.kill()
+                self.process.wait()
 
-            if len(line) > 4:
-                line = line[4:]  # Empieza con 4 numeros, eliminar para obtener serial
+            if not self.running:
+                break
 
-            # No hay dispositivos conectados
-            if line == "0000":
-                if self.current_device is not None:
-                    self.device_disconnected.emit(self.current_device)
-                    self.current_device = None
-                continue
+            # Server gone: nothing is attached until it is back
+            self.update_states({})
+
+            if time.monotonic() - started > ADB_RESTART_BACKOFF_MAX:
+                backoff = ADB_RESTART_BACKOFF_MIN
+
+            if self.stop_event.wait(backoff):
+                break
 
-            parts = line.split()
-            if len(parts) != 2:
+            backoff = min(backoff * 2, ADB_RESTART_BACKOFF_MAX)
+            run_adb_command(["start-server"], capture_output=True)
+
+    def update_states(self, states):
+        for serial in sorted(set(self.states) | set(states)):
+            old = self.states.get(serial)
+            new = states.get(serial)
+
+            if old == new:
                 continue
 
-            serial, status = parts
+            self.device_state_changed.emit(serial, new or "")
 
-            # Device connected
-            if status == "device" and serial != self.current_device:
-                self.current_device = serial
+            if new == "device":
                 self.device_connected.emit(serial)
+            elif old == "device":
+                self.device_disconnected.emit(serial)
 
-            # Device offline → treat as disconnected
-            elif status == "offline" and self.current_device == serial:
-                self.device_disconnected.emit(self.current_device)
-                self.current_device = None
+        self.states = states
 
     def stop(self):
         self.running = False
+        self.stop_event.set()
 
-        if self.process:
+        if self.process and self.process.poll() is None:
             self.process.terminate()
-            self.process.wait()
 
         self.quit()
         self.wait()
 
 
 class MainWindow(QMainWindow):
+    # target, size, error (emitted from the archive pool thread)
+    archive_done = pyqtSignal(str, object, str)
+    # adb serial, fresh DeviceInfo (emitted from the validation thread)
+    device_probed = pyqtSignal(str, object)
+
     def __init__(self):
         super().__init__()
-        self.worker = None
-        self.thread = None
+        self.devices = {}  # adb serial -> detected device info
+        self.current_device_family = None
         self.current_manufacturer = None
         self.current_build_type = None
         self.current_firmware = None
@@ -214,20 +288,37 @@ class MainWindow(QMainWindow):
         self.current_serial = None
         self.current_model = None
         self.current_device = None
-        self.backup_active = False
-        self.last_detected_device = None
-        self.device_compatible = None
-        self.user_cancelled = False
         self.closing_after_cancel = False
         self.original_serial = None
 
+        self.scheduler = BackupScheduler(parent=self)
+        self.scheduler.job_queued.connect(self.on_backup_queued)
+        self.scheduler.job_started.connect(self.on_backup_started)
+        self.scheduler.job_log.connect(self.append_log)
+        self.scheduler.job_finished.connect(self.on_backup_finished)
+        self.scheduler.all_finished.connect(self.on_all_backups_finished)
+        self.scheduler.job_backup_created.connect(self.on_backup_created)
+        self.scheduler.job_progress.connect(self.on_backup_progress)
+
+        self.archiver = Archiver()
+        self.archive_done.connect(self.on_archive_done)
+        self.backup_paths = {}  # device -> backup folder of its current job
+        self.job_archive = {}  # device -> (format, bundle per OT, OT)
+        self.ot_bundles = {}  # OT -> finished backup folders waiting to be bundled
+
+        self.device_cache = DeviceCache()
+        self.device_probed.connect(self.on_device_probed)
+
         self.setWindowTitle(f"Trimble Backup Utility {APP_VER}")
         self.setWindowIcon(QIcon(resource_path("assets/trimble-backup-utility.ico")))
 
         self.resize(900, 600)
         self.setMinimumSize(800, 600)
 
+        self.adb_version = cached_adb_version()
+
         self._build_ui()
+        self.start_background_init()
 
     def _build_ui(self):
         central_widget = QWidget()
@@ -281,6 +372,13 @@ class MainWindow(QMainWindow):
         self.ot_input.textChanged.connect(self.update_backup_button_state)
         self.tech_input.textChanged.connect(self.update_backup_button_state)
 
+        # -------------------------
+        # Device List (Left)
+        # -------------------------
+        self.device_list = QListWidget()
+        self.device_list.setMaximumHeight(110)
+        self.device_list.currentItemChanged.connect(self.on_device_list_changed)
+
         # -------------------------
         # Device Info Box (Left)
         # -------------------------
@@ -292,6 +390,7 @@ class MainWindow(QMainWindow):
         # -------------------------
         self.log_box = QPlainTextEdit()
         self.log_box.setReadOnly(True)
+        self.log_sink = LogSink(self.log_box, parent=self)
 
         # -------------------------
         # Left Container
@@ -315,9 +414,8 @@ class MainWindow(QMainWindow):
         self.placeholder_label = QLabel()
         self.placeholder_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
-        self.placeholder_label.setPixmap(
-            QPixmap(resource_path("assets/disconnected.png"))
-        )
+        # Placeholder image is set once the window is up
+        QTimer.singleShot(0, lambda: self.placeholder_label.setPixmap(load_pixmap("assets/disconnected.png")))
 
         self.device_image_label = QLabel()
         self.device_image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
@@ -327,6 +425,7 @@ class MainWindow(QMainWindow):
 
         self.image_stack = image_layout
 
+        left_layout.addWidget(self.device_list)         # devices
         left_layout.addWidget(self.device_info_box)     # info
         left_layout.addWidget(self.image_container)   # image
 
@@ -349,7 +448,18 @@ class MainWindow(QMainWindow):
         right_layout = QVBoxLayout(right_container)
 
         right_layout.addWidget(self.log_box)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 1000)
+        self.progress_bar.setTextVisible(False)
+        self.progress_label = QLabel()
+        self.progress_bar.setVisible(False)
+        self.progress_label.setVisible(False)
+
+        right_layout.addWidget(self.progress_bar)
+        right_layout.addWidget(self.progress_label)
         self.backup_button = QPushButton("Empezar Respaldo")
+        self.backup_all_button = QPushButton("Respaldar todos")
         self.cancel_button = QPushButton("Cancelar")
 
         self.cancel_button.setEnabled(False)
@@ -373,6 +483,41 @@ class MainWindow(QMainWindow):
         self.extra_files_check.setChecked(True)
         advanced_layout.addWidget(self.extra_files_check)
 
+        self.incremental_check = QCheckBox("Respaldo incremental (solo cambios)")
+        self.incremental_check.setChecked(False)
+        advanced_layout.addWidget(self.incremental_check)
+
+        self.dedup_check = QCheckBox("Almacén deduplicado")
+        self.dedup_check.setChecked(DEDUP_STORE)
+        advanced_layout.addWidget(self.dedup_check)
+
+        self.verify_check = QCheckBox("Verificar integridad (MD5)")
+        self.verify_check.setChecked(VERIFY_BACKUP)
+        advanced_layout.addWidget(self.verify_check)
+
+        self.archive_combo = QComboBox()
+        self.archive_combo.addItem("Sin comprimir", None)
+        for fmt in available_formats():
+            self.archive_combo.addItem(fmt, fmt)
+        self.archive_combo.setCurrentIndex(
+            max(0, self.archive_combo.findData(ARCHIVE_FORMAT))
+        )
+        advanced_layout.addWidget(QLabel("Comprimir al terminar:"))
+        advanced_layout.addWidget(self.archive_combo)
+
+        self.bundle_ot_check = QCheckBox("Un archivo por OT")
+        self.bundle_ot_check.setChecked(ARCHIVE_BUNDLE_OT)
+        advanced_layout.addWidget(self.bundle_ot_check)
+
+        self.strategy_combo = QComboBox()
+        for key, label in TRANSFER_STRATEGIES.items():
+            self.strategy_combo.addItem(label, key)
+        self.strategy_combo.setCurrentIndex(
+            self.strategy_combo.findData(TRANSFER_STRATEGY)
+        )
+        advanced_layout.addWidget(QLabel("Modo de transferencia:"))
+        advanced_layout.addWidget(self.strategy_combo)
+
         groups_row.addWidget(self.options_group)
         groups_row.addWidget(self.advanced_group)
 
@@ -382,12 +527,14 @@ class MainWindow(QMainWindow):
 
         button_row = QHBoxLayout()
         button_row.addWidget(self.backup_button)
+        button_row.addWidget(self.backup_all_button)
         button_row.addWidget(self.cancel_button)
         right_layout.addLayout(button_row)
 
         self.options_group.setVisible(False)
         self.advanced_group.setVisible(False)
         self.device_info_box.setVisible(False)
+        self.device_list.setVisible(False)
 
         # -------------------------
         # Splitter
@@ -412,6 +559,7 @@ class MainWindow(QMainWindow):
         self.current_model = None
 
         self.backup_button.setEnabled(False)
+        self.backup_all_button.setEnabled(False)
 
         mono = QFont("Consolas", 12)
         self.log_box.setFont(mono)
@@ -419,6 +567,7 @@ class MainWindow(QMainWindow):
 
         # Connections
         self.backup_button.clicked.connect(self.start_backup)
+        self.backup_all_button.clicked.connect(self.start_all_backups)
         self.cancel_button.clicked.connect(self.cancel_backup)
         self.about_button.clicked.connect(self.show_about)
         self.edit_sn_button.clicked.connect(self.edit_serial)
@@ -427,15 +576,19 @@ class MainWindow(QMainWindow):
         self.adb_watcher = AdbWatcher()
         self.adb_watcher.device_connected.connect(self.on_device_connected)
         self.adb_watcher.device_disconnected.connect(self.on_device_disconnected)
-        self.adb_watcher.start()
-        self.update_check()
+        self.adb_watcher.device_state_changed.connect(self.on_device_state_changed)
 
-    def update_check(self):
-        update = check_for_updates()
+    def start_background_init(self):
+        self.startup_tasks = StartupTasks(self)
+        self.startup_tasks.adb_ready.connect(self.adb_watcher.start)
+        self.startup_tasks.adb_version_ready.connect(self.on_adb_version)
+        self.startup_tasks.update_available.connect(self.show_update)
+        self.startup_tasks.start()
 
-        if not update:
-            return
+    def on_adb_version(self, adb_version):
+        self.adb_version = adb_version
 
+    def show_update(self, update):
         reply = QMessageBox.question(
             self,
             "Actualización disponible",
@@ -451,19 +604,13 @@ class MainWindow(QMainWindow):
             return
 
         self.current_serial = self.original_serial
+        self.store_current_serial()
 
         self.device_status_label.setText(
             f"Dispositivo: {self.current_model} | SN: {self.current_serial}"
         )
 
-        self.show_device_info(
-            self.current_model,
-            self.current_serial,
-            self.current_android_version,
-            self.current_manufacturer,
-            self.current_firmware,
-            self.current_build_type
-        )
+        self.show_device_info(self.devices[self.current_device])
 
         self.log(f"Serial restaurado al original: {self.current_serial}")
 
@@ -484,6 +631,7 @@ class MainWindow(QMainWindow):
             new_serial = text.strip().upper()
 
             self.current_serial = new_serial
+            self.store_current_serial()
 
             if self.original_serial and new_serial != self.original_serial:
                 self.restore_sn_button.setEnabled(True)
@@ -494,14 +642,7 @@ class MainWindow(QMainWindow):
             )
 
             # Update device info box
-            self.show_device_info(
-                self.current_model,
-                self.current_serial,
-                self.current_android_version,
-                self.current_manufacturer,
-                self.current_firmware,
-                self.current_build_type
-            )
+            self.show_device_info(self.devices[self.current_device])
 
             self.log(f"Serial modificado manualmente: {self.current_serial}")
 
@@ -510,10 +651,22 @@ class MainWindow(QMainWindow):
             self.start_backup()
 
     def show_about(self):
-        dialog = AboutDialog(self)
+        dialog = AboutDialog(self, self.adb_version)
         dialog.exec()
 
-    def build_folder_options(self, device_family):
+    def store_current_serial(self):
+        entry = self.devices.get(self.current_device)
+        if not entry:
+            return
+
+        entry["serial"] = self.current_serial
+        self.update_device_item(self.current_device)
+
+        # Remembered for the next time this collector is plugged in
+        override = self.current_serial if self.current_serial != self.original_serial else None
+        self.device_cache.set_override(self.current_device, override)
+
+    def build_folder_options(self, device_family, selection=None):
         # Clear old checkboxes
         while self.folder_container_layout.count():
             item = self.folder_container_layout.takeAt(0)
@@ -528,15 +681,26 @@ class MainWindow(QMainWindow):
             return
 
         for full_path, checked in profile["folders"]:
+            if selection is not None:
+                checked = selection.get(full_path, checked)
+
             checkbox = QCheckBox(full_path.split("/")[-1])
             checkbox.setChecked(checked)
 
             # Store real device path
             checkbox.full_path = full_path
+            checkbox.toggled.connect(
+                lambda state, path=full_path: self.on_folder_toggled(path, state)
+            )
 
             self.folder_container_layout.addWidget(checkbox)
             self.folder_checks.append(checkbox)
 
+    def on_folder_toggled(self, full_path, checked):
+        entry = self.devices.get(self.current_device)
+        if entry:
+            entry["folders"][full_path] = checked
+
     # -------------------------
     # Image animation
     # -------------------------
@@ -554,12 +718,16 @@ class MainWindow(QMainWindow):
 
     def closeEvent(self, event):
 
-        if self.backup_active:
+        if self.scheduler.has_jobs():
             event.ignore()
 
-            confirmed = self.cancel_backup()
+            confirmed = self.confirm_cancel()
 
             if confirmed:
+                for entry in self.devices.values():
+                    entry["user_cancelled"] = True
+                self.scheduler.cancel_all()
+                self.cancel_button.setEnabled(False)
                 self.closing_after_cancel = True
             else:
                 self.closing_after_cancel = False
@@ -569,16 +737,28 @@ class MainWindow(QMainWindow):
         if hasattr(self, "adb_watcher"):
             self.adb_watcher.stop()
 
+        if self.archiver.busy():
+            self.log("Esperando a que termine la compresión de respaldos...")
+            QApplication.processEvents()
+
+        self.archiver.shutdown(wait=True)
+        self.log_sink.close()
+
         event.accept()
 
     # -------------------------
     # Handlers
     # -------------------------
 
-    def on_device_connected(self):
-        self.handle_detect()
+    def on_device_connected(self, device):
+        self.handle_detect(device)
+
+    def on_device_state_changed(self, device, state):
+        message = DEVICE_STATES.get(state)
+        if message:
+            self.log(f"{device}: {message}")
 
-    def on_device_disconnected(self):
+    def on_device_disconnected(self, device):
 
         input_dialogs = [
             w for w in QApplication.topLevelWidgets()
@@ -587,20 +767,56 @@ class MainWindow(QMainWindow):
         for d in input_dialogs:
             d.reject()
 
+        close_shell(device)
+
+        entry = self.devices.pop(device, None)
+        if entry is None:
+            if self.current_device is None:
+                self.clear_device_view()
+            return
+
+        self.log(f"Dispositivo desconectado: {entry['serial']}")
+
+        if device == self.current_device:
+            self.clear_device_view()
+
+        self.refresh_device_list()
+
+        if self.current_device is None and self.devices:
+            self.select_device(next(iter(self.devices)))
+
+        self.update_backup_button_state()
+
+        if self.scheduler.is_scheduled(device) and not entry.get("user_cancelled"):
+            QMessageBox.warning(
+                self,
+                "Dispositivo desconectado",
+                f"El dispositivo {entry['serial']} fue desconectado durante el respaldo."
+                " El proceso se detendrá automaticamente."
+            )
+
+    def on_device_list_changed(self, current, previous):
+        if current is None:
+            return
+
+        device = current.data(Qt.ItemDataRole.UserRole)
+        if device != self.current_device:
+            self.select_device(device)
+
+    def clear_device_view(self):
         self.edit_sn_button.setEnabled(False)
+        self.restore_sn_button.setEnabled(False)
         self.device_info_box.setVisible(False)
         self.options_group.setVisible(False)
         self.advanced_group.setVisible(False)
 
-        self.log(f"Dispositivo desconectado: {self.current_serial}")
         self.device_status_label.setText("Dispositivo: Desconectado")
         self.device_info_box.clear()
         self.current_device = None
         self.current_model = None
         self.current_serial = None
-        self.last_detected_device = None
+        self.current_device_family = None
         self.original_serial = None
-        self.update_backup_button_state()
 
         self.device_image_label.clear()
         self.image_stack.setCurrentIndex(0)
@@ -612,28 +828,31 @@ class MainWindow(QMainWindow):
                 widget.deleteLater()
 
         self.folder_checks.clear()
-        self.device_compatible = None
-
-        if self.backup_active and hasattr(self, "worker") and not self.user_cancelled:
-            QMessageBox.warning(
-                self,
-                "Dispositivo desconectado",
-                "El dispositivo fue desconectado durante el respaldo."
-                " El proceso se detendrá automaticamente."
-            )
+        self.update_backup_button_state()
 
     def update_backup_button_state(self):
-        device_ready = self.current_device is not None
         ot_ready = bool(self.ot_input.text().strip())
         tech_ready = bool(self.tech_input.text().strip())
 
-        self.backup_button.setEnabled(device_ready and ot_ready and tech_ready)
-
-    def cancel_backup(self):
+        device_ready = (
+            self.current_device is not None
+            and not self.scheduler.is_scheduled(self.current_device)
+        )
+        any_ready = any(
+            not self.scheduler.is_scheduled(device)
+            for device in self.devices
+        )
 
-        if not hasattr(self, "worker"):
-            return False
+        self.backup_button.setEnabled(device_ready and ot_ready and tech_ready)
+        self.backup_all_button.setEnabled(
+            len(self.devices) > 1 and any_ready and ot_ready and tech_ready
+        )
+        self.cancel_button.setEnabled(
+            self.current_device is not None
+            and self.scheduler.is_scheduled(self.current_device)
+        )
 
+    def confirm_cancel(self):
         reply = QMessageBox.question(
             self,
             "Confirmar Cancelación",
@@ -642,9 +861,19 @@ class MainWindow(QMainWindow):
             QMessageBox.StandardButton.No
         )
 
-        if reply == QMessageBox.StandardButton.Yes:
-            self.worker.cancel()
-            self.user_cancelled = True
+        return reply == QMessageBox.StandardButton.Yes
+
+    def cancel_backup(self):
+        device = self.current_device
+
+        if not device or not self.scheduler.is_scheduled(device):
+            return False
+
+        if self.confirm_cancel():
+            entry = self.devices.get(device)
+            if entry:
+                entry["user_cancelled"] = True
+            self.scheduler.cancel(device)
             self.cancel_button.setEnabled(False)
             return True
 
@@ -662,206 +891,430 @@ class MainWindow(QMainWindow):
 
         return None
 
-    def handle_detect(self):
-
-        device = get_connected_device()
+    def handle_detect(self, device):
 
         if not device:
             self.log("Ningún dispositivo detectado.")
             self.update_backup_button_state()
             return
 
-        if device == self.last_detected_device and self.device_compatible:
+        if device in self.devices:
             return
 
-        info = get_device_info(device)
+        # Known collector: identity from the cache right away, the probe
+        # runs in the background to validate it
+        cached = self.device_cache.lookup(device)
+        previous_override = None
+
+        if cached and cached[1] and cached[0].suspicious_serial and not self.device_cache.identifies(device):
+            # A bogus serial can be shared by several units: without other
+            # ids telling them apart, the serial typed last time is only
+            # offered, not assumed
+            previous_override = cached[1]
+            cached = None
+
+        if cached:
+            info, serial_override = cached
+            self.log(f"Dispositivo conocido: {serial_override or info.serial}")
+            self.register_device(device, info, serial_override or info.serial)
+            threading.Thread(target=self.probe_device, args=(device,), daemon=True).start()
+            return
 
-        model = info["model"]
-        serial = info["serial"]
-        self.original_serial = serial
-        android_version = info["android_version"]
-        manufacturer = info["manufacturer"]
-        firmware = info["firmware"]
-        build_type = info["build_type"]
+        info = get_device_info(device)
+        serial = info.serial
 
-        if info.get("suspicious_serial"):
+        if info.suspicious_serial:
 
             text, ok = QInputDialog.getText(
                 self,
                 "Serial sospechoso",
                 f"El serial detectado parece inusual: {serial}\n"
-                "Ingresa el serial manual (o deja vacío/cancela para usar el detectado)."
+                "Ingresa el serial manual (o deja vacío/cancela para usar el detectado).",
+                text=previous_override or ""
             )
 
             if ok and text.strip():
                 serial = text.strip().upper()
 
-        if get_connected_device() != device:
+        if self.adb_watcher.states.get(device) != "device":
             self.log("Dispositivo desconectado durante detección.")
             return
 
-        self.log(f"Dispositivo conectado: {serial}")
+        if self.register_device(device, info, serial):
+            self.device_cache.store(device, info, serial if serial != info.serial else None)
 
-        device_family = None
+    def register_device(self, device, info, serial):
+        self.log(f"Dispositivo conectado: {serial}")
 
-        if any(model.startswith(prefix) for prefix in TRIMBLE_MODELS):
-            device_family = "trimble"
-            self.device_family = device_family
-        elif any(model.startswith(prefix) for prefix in SPECTRA_MODELS):
-            device_family = "spectra"
-            self.device_family = device_family
+        model = info.model
+        device_family = info.family
 
         if not device_family:
-            self.log(f"Dispositivo no compatible.")
+            self.log(f"Dispositivo no compatible: {model}")
 
-            self.current_device = None
-            self.current_serial = None
-            self.current_model = None
-            self.backup_button.setEnabled(False)
-            self.edit_sn_button.setEnabled(False)
+            if self.current_device is None:
+                self.device_status_label.setText("Dispositivo: No compatible")
+
+                unknown_path = resource_path("assets/unknown.png")
+                if os.path.exists(unknown_path):
+                    self.device_image_label.setPixmap(load_pixmap("assets/unknown.png"))
+                    self.fade_in_image()
+                else:
+                    self.device_image_label.clear()
+
+            return False
+
+        self.devices[device] = {
+            "model": model,
+            "serial": serial,
+            "original_serial": info.serial,
+            "android_version": info.android_version,
+            "manufacturer": info.manufacturer,
+            "firmware": info.firmware,
+            "build_type": info.build_type,
+            "device_family": device_family,
+            "info": info,
+            "folders": dict(DEVICE_PROFILES[device_family]["folders"]),
+            "status": None,
+            "progress": None,
+            "user_cancelled": False,
+        }
+
+        self.refresh_device_list()
+
+        if self.current_device is None:
+            self.select_device(device)
+        else:
             self.update_backup_button_state()
 
-            self.device_status_label.setText("Dispositivo: No compatible")
+        return True
 
-            unknown_path = resource_path("assets/unknown.png")
-            if os.path.exists(unknown_path):
-                self.device_image_label.setPixmap(QPixmap(unknown_path))
-                self.fade_in_image()
-            else:
-                self.device_image_label.clear()
+    def probe_device(self, device):
+        try:
+            info = get_device_info(device)
+        except Exception:
+            return
+
+        if info.fingerprint:
+            self.device_probed.emit(device, info)
+
+    def on_device_probed(self, device, info):
+        entry = self.devices.get(device)
+        if not entry:
+            return
 
-            self.last_detected_device = device
+        if self.device_cache.matches(device, info):
+            # Same identity, only storage and battery are new
+            entry["info"] = info
+            if device == self.current_device:
+                self.show_device_info(entry)
             return
 
-        # self.log(f"Dispositivo detectado: {device}")
-        self.show_device_info(model, serial, android_version, manufacturer, firmware, build_type)
+        self.device_cache.forget(device)
+
+        if self.scheduler.is_scheduled(device):
+            # Keep the identity the job was started with
+            return
+
+        self.log(f"El dispositivo {entry['serial']} cambió desde la última conexión, identificando de nuevo...")
+
+        del self.devices[device]
+        if device == self.current_device:
+            self.current_device = None
+
+        self.refresh_device_list()
+        self.handle_detect(device)
+
+    def select_device(self, device):
+        entry = self.devices.get(device)
+        if not entry:
+            return
 
         self.current_device = device
-        self.current_serial = serial
-        self.current_model = model
-        self.current_android_version = android_version
-        self.current_manufacturer = manufacturer
-        self.current_firmware = firmware
-        self.current_build_type = build_type
+        self.current_serial = entry["serial"]
+        self.original_serial = entry["original_serial"]
+        self.current_model = entry["model"]
+        self.current_android_version = entry["android_version"]
+        self.current_manufacturer = entry["manufacturer"]
+        self.current_firmware = entry["firmware"]
+        self.current_build_type = entry["build_type"]
+        self.current_device_family = entry["device_family"]
 
+        self.show_device_info(self.devices[self.current_device])
 
-        self.device_status_label.setText(f"Dispositivo: {model} | SN: {serial}")
-        self.update_backup_button_state()
+        self.device_status_label.setText(
+            f"Dispositivo: {self.current_model} | SN: {self.current_serial}"
+        )
 
-        self.last_detected_device = device
-        self.device_compatible = True
         self.edit_sn_button.setEnabled(True)
-        self.restore_sn_button.setEnabled(False)
+        self.restore_sn_button.setEnabled(self.current_serial != self.original_serial)
 
-        self.build_folder_options(device_family )
+        self.build_folder_options(self.current_device_family, entry["folders"])
 
         self.options_group.setVisible(True)
         self.advanced_group.setVisible(True)
         self.device_info_box.setVisible(True)
 
+        self.refresh_device_list()
+        self.update_backup_button_state()
+        self.show_progress(entry.get("progress"))
+
+    # -------------------------
+    # Device list
+    # -------------------------
+
+    def device_label(self, device):
+        entry = self.devices[device]
+        text = f"{entry['model']} | SN: {entry['serial']}"
+
+        if entry["status"]:
+            text += f"  —  {entry['status']}"
+
+        return text
+
+    def refresh_device_list(self):
+        self.device_list.blockSignals(True)
+        self.device_list.clear()
+
+        for device in self.devices:
+            item = QListWidgetItem(self.device_label(device))
+            item.setData(Qt.ItemDataRole.UserRole, device)
+            self.device_list.addItem(item)
+
+            if device == self.current_device:
+                self.device_list.setCurrentItem(item)
+
+        self.device_list.blockSignals(False)
+        self.device_list.setVisible(bool(self.devices))
+
+    def update_device_item(self, device):
+        if device not in self.devices:
+            return
+
+        for row in range(self.device_list.count()):
+            item = self.device_list.item(row)
+            if item.data(Qt.ItemDataRole.UserRole) == device:
+                item.setText(self.device_label(device))
+                return
+
+    def set_device_status(self, device, status):
+        entry = self.devices.get(device)
+        if not entry:
+            return
+
+        entry["status"] = status
+        self.update_device_item(device)
+
     # -------------------------
     # Logging
     # -------------------------
 
     def log(self, message: str):
-        self.log_box.appendPlainText(message)
-        self.log_box.verticalScrollBar().setValue(
-            self.log_box.verticalScrollBar().maximum()
-        )
+        self.log_sink.append(message)
+
+    def show_device_info(self, entry):
+        info = entry["info"]
 
-    def show_device_info(self, model, serial, android_version, manufacturer, firmware, build_type):
         self.device_info_box.clear()
 
-        self.device_info_box.appendPlainText(f"{'Modelo:':12} {model}")
-        self.device_info_box.appendPlainText(f"{'Fabricante:':12} {manufacturer}")
-        self.device_info_box.appendPlainText(f"{'Serial:':12} {serial}")
-        self.device_info_box.appendPlainText(f"{'Android:':12} {android_version}")
-        self.device_info_box.appendPlainText(f"{'Firmware:':12} {firmware}")
-        self.device_info_box.appendPlainText(f"{'Build:':12} {build_type}")
+        self.device_info_box.appendPlainText(f"{'Modelo:':12} {entry['model']}")
+        self.device_info_box.appendPlainText(f"{'Fabricante:':12} {entry['manufacturer']}")
+        self.device_info_box.appendPlainText(f"{'Serial:':12} {entry['serial']}")
+        self.device_info_box.appendPlainText(f"{'Android:':12} {entry['android_version']}")
+        self.device_info_box.appendPlainText(f"{'Firmware:':12} {entry['firmware']}")
+        self.device_info_box.appendPlainText(f"{'Build:':12} {entry['build_type']}")
 
-        model = model.split("_")[0]
+        if info.storage_total:
+            self.device_info_box.appendPlainText(
+                f"{'Espacio:':12} {format_size(info.storage_free)} libres de {format_size(info.storage_total)}"
+            )
+
+        if info.battery_level is not None:
+            charging = " (cargando)" if info.charging else ""
+            self.device_info_box.appendPlainText(f"{'Batería:':12} {info.battery_level}%{charging}")
+
+        model = entry["model"].split("_")[0]
         image_path = MODEL_IMAGES.get(model)
 
         if image_path:
-            self.device_image_label.setPixmap(QPixmap(resource_path(image_path)))
+            self.device_image_label.setPixmap(load_pixmap(image_path))
         else:
             self.device_image_label.clear()
 
         self.fade_in_image()
 
-    def set_ui_enabled(self, enabled: bool):
-        self.ot_input.setEnabled(enabled)
-        self.tech_input.setEnabled(enabled)
-
-        if enabled:
-            self.update_backup_button_state()
-        else:
-            self.backup_button.setEnabled(False)
-
-    def start_backup(self):
-        self.backup_active = True
-        self.set_ui_enabled(False)
-        self.cancel_button.setEnabled(True)
-
-        if not self.current_device:
-            self.log("No hay dispositivo.")
-            return
+    # -------------------------
+    # Backup
+    # -------------------------
 
-        ot = self.ot_input.text().strip()
-        technician = self.tech_input.text().strip()
-        android_version = self.current_android_version
+    def build_job(self, device, ot, technician):
+        entry = self.devices[device]
 
-        self.backup_button.setEnabled(False)
-        # self.log("Respaldando...")
         selected_folders = [
-            cb.full_path
-            for cb in self.folder_checks
-            if cb.isChecked()
+            full_path
+            for full_path, checked in entry["folders"].items()
+            if checked
         ]
 
         deep_scan = self.extra_files_check.isChecked() if self.extra_files_check else False
 
-        self.thread = QThread()
-        self.worker = BackupWorker(
-            self.current_device,
-            self.current_model,
-            self.current_serial,
+        entry["user_cancelled"] = False
+
+        self.job_archive[device] = (
+            self.archive_combo.currentData(),
+            self.bundle_ot_check.isChecked(),
+            ot
+        )
+
+        return BackupJob(
+            device,
+            entry["model"],
+            entry["serial"],
             ot,
             technician,
-            android_version,
+            entry["android_version"],
             selected_folders,
             deep_scan,
-            self.device_family
+            entry["device_family"],
+            self.strategy_combo.currentData(),
+            self.incremental_check.isChecked(),
+            self.dedup_check.isChecked(),
+            self.verify_check.isChecked(),
+            entry["firmware"]
         )
 
-        self.worker.moveToThread(self.thread)
+    def start_backup(self):
+        if not self.current_device:
+            self.log("No hay dispositivo.")
+            return
 
-        self.thread.started.connect(self.worker.run)
-        self.worker.log_signal.connect(self.append_log)
-        self.worker.finished.connect(self.on_backup_finished)
+        ot = self.ot_input.text().strip()
+        technician = self.tech_input.text().strip()
+
+        self.scheduler.submit(self.build_job(self.current_device, ot, technician))
+        self.update_backup_button_state()
+
+    def start_all_backups(self):
+        ot = self.ot_input.text().strip()
+        technician = self.tech_input.text().strip()
+
+        for device in list(self.devices):
+            if not self.scheduler.is_scheduled(device):
+                self.scheduler.submit(self.build_job(device, ot, technician))
+
+        self.update_backup_button_state()
 
-        self.worker.finished.connect(self.thread.quit)
-        self.worker.finished.connect(self.worker.deleteLater)
-        self.thread.finished.connect(self.thread.deleteLater)
+    def append_log(self, device, message):
+        entry = self.devices.get(device)
 
-        self.thread.start()
+        # Prefix lines once more than one device is attached
+        if len(self.devices) > 1 and entry:
+            message = f"[{entry['serial']}] {message}"
 
-    def append_log(self, message):
         self.log(message)
 
-    def restore(self):
-        self.backup_button.setEnabled(True)
-        self.set_ui_enabled(True)
-        self.cancel_button.setEnabled(False)
+    def on_backup_queued(self, device):
+        self.set_device_status(device, "En cola")
+        self.update_backup_button_state()
+
+    def on_backup_started(self, device):
+        self.set_device_status(device, "Respaldando")
+        self.update_backup_button_state()
 
-    def on_backup_finished(self, success):
-        self.backup_active = False
-        self.restore()
-        self.user_cancelled = False
+    def on_backup_finished(self, device, success):
+        entry = self.devices.get(device)
+
+        backup_path = self.backup_paths.pop(device, None)
+        fmt, bundle, ot = self.job_archive.pop(device, (None, False, None))
+
+        if entry:
+            entry["progress"] = None
+        if device == self.current_device:
+            self.show_progress(None)
 
         if success:
-            self.log("Respaldo completado exitosamente.")
+            self.set_device_status(device, "Completado")
+            serial = entry["serial"] if entry else device
+            self.log(f"Respaldo completado exitosamente: {serial}")
+
+            if fmt and backup_path:
+                if bundle:
+                    self.ot_bundles.setdefault(ot, []).append(backup_path)
+                else:
+                    self.archive_backups([backup_path], os.path.basename(backup_path), fmt)
+        elif entry and entry.get("user_cancelled"):
+            self.set_device_status(device, "Cancelado")
+        else:
+            self.set_device_status(device, "Error")
+
+        self.update_backup_button_state()
+
+        # Bundle once the last backup of the OT is done
+        if fmt and bundle and ot in self.ot_bundles and not self.scheduler.has_jobs_for_ot(ot):
+            folders = self.ot_bundles.pop(ot)
+            if folders:
+                name = f"OT{ot}_{time.strftime('%Y%m%d_%H%M%S')}"
+                self.archive_backups(folders, name, fmt)
+
+    def on_backup_progress(self, device, progress):
+        entry = self.devices.get(device)
+        if not entry:
+            return
+
+        entry["progress"] = progress
+
+        status = f"{PROGRESS_PHASES.get(progress.phase, 'Respaldando')} {progress.percent:.0f}%"
+        if progress.phase == "transfer" and progress.rate:
+            status += f" · {format_rate(progress.rate, 1)}"
+        self.set_device_status(device, status)
+
+        if device == self.current_device:
+            self.show_progress(progress)
+
+    def show_progress(self, progress):
+        if progress is None:
+            self.progress_bar.setVisible(False)
+            self.progress_label.setVisible(False)
+            return
+
+        self.progress_bar.setVisible(True)
+        self.progress_label.setVisible(True)
+        self.progress_bar.setValue(int(progress.percent * 10))
+
+        text = f"{PROGRESS_PHASES.get(progress.phase, '')} {progress.folder}"
+
+        if progress.phase == "transfer":
+            if progress.files_total:
+                text += f" · {progress.files_done}/{progress.files_total} archivos"
+            if progress.rate:
+                text += f" · {format_rate(progress.rate, 1)}"
+            if progress.eta is not None:
+                minutes, seconds = divmod(int(progress.eta), 60)
+                text += f" · ETA {minutes:02d}:{seconds:02d}"
+
+        self.progress_label.setText(text)
+
+    def on_backup_created(self, device, backup_path):
+        self.backup_paths[device] = backup_path
+
+    def archive_backups(self, folders, name, fmt):
+        target = archive_path_for(name, fmt, BACKUP_ROOT)
+        self.log(f"Comprimiendo en segundo plano: {target}")
+
+        self.archiver.submit(
+            folders,
+            target,
+            fmt,
+            lambda path, size, error: self.archive_done.emit(path, size, str(error) if error else "")
+        )
+
+    def on_archive_done(self, target, size, error):
+        if error:
+            self.log(f"ERROR al comprimir {target}: {error}")
+        else:
+            self.log(f"Archivo creado: {target} ({format_size(size)})")
 
+    def on_all_backups_finished(self):
         if self.closing_after_cancel:
             self.closing_after_cancel = False
             self.close()
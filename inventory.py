@@ -0,0 +1,117 @@
+import posixpath
+from config import EXTRA_BACKUP_EXTENSIONS, BLOCKED_DIRECTORIES
+from adb import get_shell
+
+SCAN_ROOT = "/sdcard"
+
+# str.endswith accepts a tuple, one C-level call per name
+EXTRA_SUFFIXES = tuple(sorted({ext.lower() for ext in EXTRA_BACKUP_EXTENSIONS}))
+
+
+def matches_extra_extension(name):
+    return name.lower().endswith(EXTRA_SUFFIXES)
+
+
+class PathTrie:
+    # Directory prefix set: covers(path) is True when path or one of its
+    # ancestors was added, in O(depth) instead of a scan over every prefix
+
+    def __init__(self, paths=()):
+        self.root = {}
+        for path in paths:
+            self.add(path)
+
+    @staticmethod
+    def split(path):
+        return [part for part in path.split("/") if part]
+
+    def add(self, path):
+        node = self.root
+        for part in self.split(path):
+            node = node.setdefault(part, {})
+        node[None] = True
+
+    def covers(self, path):
+        node = self.root
+        if None in node:
+            return True
+
+        for part in self.split(path):
+            node = node.get(part)
+            if node is None:
+                return False
+            if None in node:
+                return True
+
+        return False
+
+
+def build_find_command(root, pruned):
+    prune = " -o ".join(f"-path \"{path.rstrip('/')}\"" for path in pruned)
+    names = " -o ".join(f"-iname \"*{ext}\"" for ext in EXTRA_SUFFIXES)
+
+    # -H: /sdcard is usually a symlink to /storage/emulated/0
+    if prune:
+        return f"find -H \"{root}\" \\( {prune} \\) -prune -o -type f \\( {names} \\) -print"
+
+    return f"find -H \"{root}\" -type f \\( {names} \\) -print"
+
+
+def scan_extra_files(device, selected_folders, is_cancelled=lambda: False, root=SCAN_ROOT):
+    # Returns (directories, root_files), or None when the scan failed or was
+    # cancelled. Blocked and selected folders are pruned on the device, only
+    # files with a matching extension come back over the pipe, and they are
+    # consumed line by line as find prints them
+    shell = get_shell(device)
+    paths = []
+
+    command = build_find_command(root.rstrip("/"), BLOCKED_DIRECTORIES + list(selected_folders))
+
+    for line in shell.stream(command, is_cancelled):
+        paths.append(line.strip())
+
+    if is_cancelled() or (shell.last_status != 0 and not paths):
+        return None
+
+    return choose_extra_files(paths, selected_folders, root)
+
+
+def choose_extra_files(paths, selected_folders, root=SCAN_ROOT):
+    # Device paths -> (directories, root_files): every directory holding a
+    # file with a project extension is backed up whole, outside the blocked
+    # and selected folders
+    skipped = PathTrie(BLOCKED_DIRECTORIES)
+    for folder in selected_folders:
+        skipped.add(folder)
+
+    root = root.rstrip("/")
+    root_files = set()
+    candidate_dirs = set()
+
+    for path in paths:
+        if not path.startswith("/") or not matches_extra_extension(path):
+            continue
+
+        directory = posixpath.dirname(path)
+
+        if directory == root:
+            root_files.add(path)
+            continue
+
+        if skipped.covers(directory):
+            continue
+
+        candidate_dirs.add(directory)
+
+    # Parents first, so nested hits are folded into the already chosen parent
+    chosen = PathTrie()
+    directories = []
+
+    for directory in sorted(candidate_dirs, key=lambda path: (path.count("/"), path)):
+        if chosen.covers(directory):
+            continue
+
+        chosen.add(directory)
+        directories.append(directory)
+
+    return directories, sorted(root_files)
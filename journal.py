@@ -0,0 +1,126 @@
+import os
+import threading
+from config import BACKUP_ROOT
+from manifest import local_file_for
+
+JOURNAL_FILE = "journal.tsv"
+COMPLETE_MARK = "#complete"
+CANCELLED_MARK = "#cancelled"
+
+
+class TransferJournal:
+    # Append-only record of files that landed complete in the backup folder:
+    # "size<TAB>mtime<TAB>remote path", plus a final #complete line, or
+    # #cancelled when the operator stopped it. An interrupted backup can be
+    # resumed into the same folder from it, a cancelled one is left alone.
+
+    def __init__(self, backup_path):
+        self.path = os.path.join(backup_path, JOURNAL_FILE)
+        self.done = {}
+        self.complete = False
+        self.lock = threading.Lock()
+
+        self.load()
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def load(self):
+        if not os.path.isfile(self.path):
+            return
+
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                line = line.rstrip("\n")
+
+                if line == COMPLETE_MARK:
+                    self.complete = True
+                    continue
+
+                if line == CANCELLED_MARK:
+                    continue
+
+                parts = line.split("\t", 2)
+                if len(parts) != 3 or not parts[0].isdigit() or not parts[1].isdigit():
+                    # Torn last line from a crash
+                    continue
+
+                self.done[parts[2]] = (int(parts[0]), int(parts[1]))
+
+    def is_done(self, remote, size, mtime, local_file):
+        return (
+            self.done.get(remote) == (size, mtime)
+            and os.path.isfile(local_file)
+            and os.path.getsize(local_file) == size
+        )
+
+    def record(self, remote, size, mtime):
+        with self.lock:
+            self.done[remote] = (size, mtime)
+            self.file.write(f"{size}\t{mtime}\t{remote}\n")
+            self.file.flush()
+
+    def sweep(self, listing, remote_root, local_root):
+        # Journals every listed file that is now on disk with its full size,
+        # returns the ones that are not
+        missing = []
+
+        for remote, size, mtime in listing:
+            if self.done.get(remote) == (size, mtime):
+                continue
+
+            local_file = local_file_for(remote, remote_root, local_root)
+
+            if os.path.isfile(local_file) and os.path.getsize(local_file) == size:
+                self.record(remote, size, mtime)
+            else:
+                missing.append((remote, size, mtime))
+
+        return missing
+
+    def mark_complete(self):
+        with self.lock:
+            self.complete = True
+            self.file.write(COMPLETE_MARK + "\n")
+            self.file.flush()
+
+    def mark_cancelled(self):
+        with self.lock:
+            self.file.write(CANCELLED_MARK + "\n")
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def is_resumable(backup_path):
+    path = os.path.join(backup_path, JOURNAL_FILE)
+
+    if not os.path.isfile(path):
+        return False
+
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 64))
+        tail = f.read().rstrip()
+
+    return not tail.endswith((COMPLETE_MARK.encode(), CANCELLED_MARK.encode()))
+
+
+def find_resumable_backup(model, serial, ot):
+    # Newest unfinished backup of the same device and OT
+    prefix = f"{model}_{serial}_OT{ot}_"
+
+    if not os.path.isdir(BACKUP_ROOT):
+        return None
+
+    candidates = [
+        entry.path
+        for entry in os.scandir(BACKUP_ROOT)
+        if entry.is_dir()
+        and entry.name.startswith(prefix)
+        and is_resumable(entry.path)
+    ]
+
+    if not candidates:
+        return None
+
+    return max(candidates, key=lambda path: os.path.basename(path)[-15:])
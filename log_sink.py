@@ -0,0 +1,100 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+from PyQt6.QtCore import QObject, QTimer
+
+from config import LOG_DIR, LOG_FLUSH_INTERVAL_MS, LOG_MAX_LINES
+
+
+class LogFileWriter:
+    # Writes every log line to disk from a background thread, so the GUI
+    # thread never blocks on file I/O
+
+    def __init__(self, path):
+        self.path = path
+        self.queue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def write(self, line):
+        self.queue.put(line)
+
+    def run(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                line = self.queue.get()
+                if line is None:
+                    break
+
+                f.write(line + "\n")
+
+                # Drain whatever else is waiting before touching the disk
+                while True:
+                    try:
+                        line = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if line is None:
+                        f.flush()
+                        return
+                    f.write(line + "\n")
+
+                f.flush()
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join(timeout=2)
+
+
+class LogSink(QObject):
+    # Coalesces log lines and appends them to the widget in one call per
+    # timer tick. The widget keeps at most max_lines blocks, the full log
+    # goes to disk through LogFileWriter.
+
+    def __init__(self, widget, log_path=None, interval_ms=LOG_FLUSH_INTERVAL_MS, max_lines=LOG_MAX_LINES, parent=None):
+        super().__init__(parent)
+        self.widget = widget
+        self.widget.setMaximumBlockCount(max_lines)
+
+        # Only what fits on screen is kept between ticks
+        self.pending = deque(maxlen=max_lines)
+
+        if log_path is None:
+            log_path = os.path.join(LOG_DIR, time.strftime("tbu_%Y%m%d_%H%M%S.log"))
+
+        self.writer = LogFileWriter(log_path)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.flush)
+        self.timer.start()
+
+    def append(self, line):
+        self.pending.append(line)
+        self.writer.write(line)
+
+    def flush(self):
+        if not self.pending:
+            return
+
+        scrollbar = self.widget.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 4
+
+        text = "\n".join(self.pending)
+        self.pending.clear()
+
+        self.widget.appendPlainText(text)
+
+        # Keep following the output unless the user scrolled up to read
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def close(self):
+        self.timer.stop()
+        self.flush()
+        self.writer.close()
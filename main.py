@@ -1,10 +1,17 @@
 import sys
-from PyQt6.QtWidgets import QApplication
-from PyQt6.QtGui import QFont
-from gui import MainWindow
+import multiprocessing
 
 
 def main():
+    # Qt is only imported for the GUI, "--cli" runs headless
+    if len(sys.argv) > 1 and sys.argv[1] == "--cli":
+        from cli import main as cli_main
+        sys.exit(cli_main(sys.argv[2:]))
+
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtGui import QFont
+    from gui import MainWindow
+
     app = QApplication(sys.argv)
 
     font = QFont()
@@ -17,4 +24,6 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # Archive workers are separate processes, required in the frozen .exe
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,129 @@
+import os
+import shutil
+from config import BACKUP_ROOT
+from adb import stream_shell_command
+
+MANIFEST_FILE = "manifest.tsv"
+
+
+def quote_paths(paths):
+    return " ".join(f"\"{path}\"" for path in paths)
+
+
+def list_device_files(device, remote_paths, is_cancelled=lambda: False, pruned=()):
+    # One shell round trip: size, mtime and path of every file, skipping the
+    # pruned directories
+    prune = " -o ".join(f"-path \"{path.rstrip('/')}\"" for path in pruned)
+    selection = f"\\( {prune} \\) -prune -o -type f" if prune else "-type f"
+
+    lines = stream_shell_command(
+        device,
+        f"find -H {quote_paths(remote_paths)} {selection} -exec stat -c '%s %Y %n' {{}} +",
+        is_cancelled
+    )
+
+    files = []
+
+    for line in lines:
+        parts = line.split(" ", 2)
+        if len(parts) != 3 or not parts[0].isdigit() or not parts[1].isdigit():
+            continue
+
+        files.append((parts[2], int(parts[0]), int(parts[1])))
+
+    return files
+
+
+def local_file_for(remote, remote_root, local_root):
+    return os.path.join(local_root, remote[len(remote_root):].lstrip("/"))
+
+
+def link_or_copy(src, dst):
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+
+    if os.path.exists(dst):
+        os.remove(dst)
+
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+class BackupManifest:
+    # remote path -> (size, mtime, path relative to the backup folder)
+
+    def __init__(self, root):
+        self.root = root
+        self.entries = {}
+        self.linked = set()  # local files linked from this manifest
+
+    def add(self, remote, size, mtime, local_file):
+        self.entries[remote] = (size, mtime, os.path.relpath(local_file, self.root))
+
+    def unchanged_file(self, remote, size, mtime):
+        # Local copy of remote in this backup if it is still the same file,
+        # else None
+        entry = self.entries.get(remote)
+        if not entry or entry[0] != size or entry[1] != mtime:
+            return None
+
+        src = os.path.join(self.root, entry[2])
+        if not os.path.isfile(src) or os.path.getsize(src) != size:
+            return None
+
+        return src
+
+    def link_unchanged(self, remote, size, mtime, local_file):
+        src = self.unchanged_file(remote, size, mtime)
+        if src is None:
+            return False
+
+        link_or_copy(src, local_file)
+        self.linked.add(os.path.normpath(local_file))
+        return True
+
+    def save(self):
+        path = os.path.join(self.root, MANIFEST_FILE)
+
+        with open(path, "w", encoding="utf-8") as f:
+            for remote in sorted(self.entries):
+                size, mtime, rel = self.entries[remote]
+                f.write(f"{size}\t{mtime}\t{remote}\t{rel}\n")
+
+    @classmethod
+    def load(cls, root):
+        manifest = cls(root)
+        path = os.path.join(root, MANIFEST_FILE)
+
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) != 4:
+                    continue
+
+                size, mtime, remote, rel = parts
+                manifest.entries[remote] = (int(size), int(mtime), rel)
+
+        return manifest
+
+
+def find_previous_backup(model, serial):
+    # Backup folders are "{model}_{serial}_OT{ot}_{YYYYmmdd_HHMMSS}"
+    prefix = f"{model}_{serial}_OT"
+
+    if not os.path.isdir(BACKUP_ROOT):
+        return None
+
+    candidates = [
+        entry.path
+        for entry in os.scandir(BACKUP_ROOT)
+        if entry.is_dir()
+        and entry.name.startswith(prefix)
+        and os.path.isfile(os.path.join(entry.path, MANIFEST_FILE))
+    ]
+
+    if not candidates:
+        return None
+
+    return max(candidates, key=lambda path: os.path.basename(path)[-15:])
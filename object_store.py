@@ -0,0 +1,102 @@
+import hashlib
+import os
+from config import BACKUP_ROOT, OBJECT_STORE_DIR, BACKUP_METADATA_FILES
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path, algorithm="sha256"):
+    digest = hashlib.new(algorithm)
+
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class ObjectStore:
+    # Content-addressed store: each distinct file body is kept once under
+    # BACKUP_ROOT/.objects/ab/cdef..., backup folders keep the usual layout
+    # but their files are hardlinks to the stored object
+
+    def __init__(self, root=None):
+        self.root = root or os.path.join(BACKUP_ROOT, OBJECT_STORE_DIR)
+
+    def object_path(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:])
+
+    def store(self, path):
+        # Returns True if the content was already in the store, None when
+        # it cannot be hardlinked there (FAT/exFAT, another volume): a copy
+        # would only double the space used
+        target = self.object_path(hash_file(path))
+
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+
+            try:
+                os.link(path, target)
+                return False
+            except FileExistsError:
+                # Stored by another backup running in parallel
+                pass
+            except OSError:
+                return None
+
+        if not os.path.samefile(path, target):
+            self.replace_with_link(target, path)
+
+        return True
+
+    def replace_with_link(self, target, path):
+        tmp = path + ".tbu-link"
+
+        try:
+            os.link(target, tmp)
+        except OSError:
+            # Different volume or no hardlink support, keep the pulled copy
+            return
+
+        os.replace(tmp, path)
+
+    def dedupe_backup(self, backup_path, log, is_cancelled, skip=()):
+        files = 0
+        duplicates = 0
+        saved = 0
+
+        for dirpath, _, filenames in os.walk(backup_path):
+            for name in filenames:
+                if is_cancelled():
+                    return False
+
+                if dirpath == backup_path and name in BACKUP_METADATA_FILES:
+                    continue
+
+                path = os.path.join(dirpath, name)
+
+                # Linked from a previous backup, already deduplicated there
+                if os.path.normpath(path) in skip:
+                    continue
+
+                files += 1
+
+                stored = self.store(path)
+
+                if stored is None:
+                    log(f"Deduplicación desactivada: {self.root} no admite enlaces duros.")
+                    return True
+
+                if stored:
+                    duplicates += 1
+                    saved += os.path.getsize(path)
+
+        log(
+            f"Almacén deduplicado: {files} archivos procesados, {duplicates} ya existentes "
+            f"({saved / 1024 / 1024:.1f} MB sin duplicar)"
+        )
+
+        return True
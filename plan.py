@@ -0,0 +1,198 @@
+import os
+import posixpath
+import shutil
+from dataclasses import dataclass, field
+from typing import Optional
+from config import BACKUP_ROOT, BLOCKED_DIRECTORIES, PLAN_FREE_SPACE_RESERVE
+from inventory import SCAN_ROOT, scan_extra_files
+from manifest import list_device_files
+from progress import format_duration
+
+
+@dataclass
+class PlanEntry:
+    remote_path: str
+    listing: list = field(default_factory=list)  # (remote, size, mtime)
+    to_copy: int = 0  # bytes not already in a previous or interrupted backup
+
+    @property
+    def size(self):
+        return sum(size for _, size, _ in self.listing)
+
+
+@dataclass
+class TransferPlan:
+    folders: list  # PlanEntry per selected folder
+    deep_scan: bool = False
+    extra_dirs: list = field(default_factory=list)  # PlanEntry per extra directory
+    root_files: Optional[PlanEntry] = None
+    free_bytes: Optional[int] = None
+    rate: Optional[float] = None  # bytes per second measured before
+
+    @property
+    def entries(self):
+        extra = [self.root_files] if self.root_files is not None else []
+        return self.folders + self.extra_dirs + extra
+
+    @property
+    def files(self):
+        return sum(len(entry.listing) for entry in self.entries)
+
+    @property
+    def size(self):
+        return sum(entry.size for entry in self.entries)
+
+    @property
+    def to_copy(self):
+        return sum(entry.to_copy for entry in self.entries)
+
+    @property
+    def required_bytes(self):
+        return self.to_copy + PLAN_FREE_SPACE_RESERVE
+
+    @property
+    def fits(self):
+        return self.free_bytes is None or self.free_bytes >= self.required_bytes
+
+    @property
+    def eta(self):
+        return self.to_copy / self.rate if self.rate else None
+
+    def listing_for(self, remote_path):
+        for entry in self.folders + self.extra_dirs:
+            if entry.remote_path == remote_path:
+                return entry.listing
+        return None
+
+    def describe(self):
+        lines = ["Plan de respaldo:"]
+
+        for entry in self.folders:
+            lines.append(f"  {entry.remote_path}: {len(entry.listing)} archivos, {entry.size / 1024 / 1024:.1f} MB")
+
+        if self.deep_scan:
+            files = sum(len(entry.listing) for entry in self.extra_dirs)
+            size = sum(entry.size for entry in self.extra_dirs)
+            lines.append(
+                f"  Directorios extra: {len(self.extra_dirs)} carpetas, {files} archivos, {size / 1024 / 1024:.1f} MB"
+            )
+
+            for entry in self.extra_dirs:
+                lines.append(f"    {entry.remote_path}: {len(entry.listing)} archivos, {entry.size / 1024 / 1024:.1f} MB")
+
+            if self.root_files is not None:
+                lines.append(
+                    f"  Archivos raíz adicionales: {len(self.root_files.listing)} archivos, "
+                    f"{self.root_files.size / 1024 / 1024:.1f} MB"
+                )
+
+        lines.append(
+            f"Total: {self.files} archivos, {self.size / 1024 / 1024:.1f} MB, "
+            f"{self.to_copy / 1024 / 1024:.1f} MB por copiar"
+        )
+
+        if self.free_bytes is not None:
+            lines.append(
+                f"Espacio libre: {self.free_bytes / 1024 / 1024:.1f} MB "
+                f"(necesario {self.required_bytes / 1024 / 1024:.1f} MB)"
+            )
+
+        if self.eta is not None:
+            lines.append(
+                f"Tiempo estimado de copia: {format_duration(self.eta)} "
+                f"({self.rate / 1024 / 1024:.1f} MB/s en respaldos anteriores)"
+            )
+        else:
+            lines.append("Tiempo estimado de copia: sin datos de respaldos anteriores")
+
+        return lines
+
+
+def is_under(path, root):
+    root = root.rstrip("/")
+    return path == root or path.startswith(root + "/")
+
+
+def group_listing(listing, roots):
+    # Each file goes to the innermost root holding it, files outside every
+    # root are dropped
+    groups = {root.rstrip("/"): [] for root in roots}
+
+    for entry in listing:
+        directory = posixpath.dirname(entry[0])
+
+        while directory not in groups and directory not in ("/", ""):
+            directory = posixpath.dirname(directory)
+
+        if directory in groups:
+            groups[directory].append(entry)
+
+    return groups
+
+
+def bytes_to_copy(listing, is_copied=None):
+    # is_copied(remote, size, mtime): the file is not copied again (still on
+    # disk from an interrupted backup, linkable from the previous one)
+    return sum(
+        size for remote, size, mtime in listing
+        if is_copied is None or not is_copied(remote, size, mtime)
+    )
+
+
+def free_space(path=BACKUP_ROOT):
+    # Nearest existing folder: BACKUP_ROOT is created with the first backup
+    path = os.path.abspath(path)
+
+    while not os.path.isdir(path) and os.path.dirname(path) != path:
+        path = os.path.dirname(path)
+
+    try:
+        return shutil.disk_usage(path).free
+    except OSError:
+        return None
+
+
+def build_plan(device, selected_folders, deep_scan, is_cancelled=lambda: False, copied=None, rate=None):
+    # With deep_scan the extension-filtered find of scan_extra_files runs
+    # first, then one find + stat pass lists the selected folders and only
+    # the extra directories and root files it found. copied(entry remote
+    # path) gives the is_copied check of bytes_to_copy for that entry
+    # (SCAN_ROOT for the root files). Returns None when cancelled or the
+    # scan failed.
+    extra_dirs = []
+    root_files = []
+
+    if deep_scan:
+        result = scan_extra_files(device, selected_folders, is_cancelled)
+        if result is None:
+            return None
+
+        extra_dirs, root_files = result
+
+    roots = list(selected_folders) + extra_dirs + root_files
+    listing = list_device_files(device, roots, is_cancelled, BLOCKED_DIRECTORIES if deep_scan else ())
+
+    if is_cancelled():
+        return None
+
+    # An extra directory can hold a selected folder: its files once
+    listing = list({entry[0]: entry for entry in listing}.values())
+
+    groups = group_listing(listing, list(selected_folders) + extra_dirs)
+
+    def entry(remote_path, files):
+        return PlanEntry(remote_path, files, bytes_to_copy(files, copied(remote_path) if copied else None))
+
+    plan = TransferPlan(
+        folders=[entry(folder, groups[folder.rstrip("/")]) for folder in selected_folders],
+        deep_scan=deep_scan,
+        extra_dirs=[entry(directory, groups[directory]) for directory in extra_dirs],
+        free_bytes=free_space(),
+        rate=rate
+    )
+
+    if deep_scan:
+        root_set = set(root_files)
+        plan.root_files = entry(SCAN_ROOT, [item for item in listing if item[0] in root_set])
+
+    return plan
@@ -0,0 +1,286 @@
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from typing import Optional
+
+# "/sdcard/Trimble Data/: 12 files pulled, 0 skipped. 8.3 MB/s (1234567 bytes in 0.142s)"
+SUMMARY_LINE = re.compile(
+    r"(\d+) files? pulled(?:, (\d+) skipped)?\.?"
+    r"(?:\s+([\d.]+) MB/s \((\d+) bytes in ([\d.]+)s\))?"
+)
+
+EMIT_INTERVAL = 0.1  # seconds between progress events
+DISK_POLL_INTERVAL = 0.5  # seconds between looks at the files adb pull writes
+
+
+@dataclass
+class TransferProgress:
+    phase: str
+    step: int = 0
+    steps: int = 0
+    folder: str = ""
+    current_file: str = ""
+    files_done: int = 0
+    files_total: int = 0
+    bytes_done: int = 0
+    bytes_total: int = 0
+    rate: float = 0.0  # bytes per second, current folder
+    eta: Optional[float] = None  # seconds left in the current folder
+
+    @property
+    def percent(self):
+        # Overall progress: finished steps plus the fraction of the current one
+        if not self.steps:
+            return 0.0
+
+        fraction = self.bytes_done / self.bytes_total if self.bytes_total else 0.0
+        return min(100.0, 100.0 * (self.step + min(fraction, 1.0)) / self.steps)
+
+
+def parse_pull_line(line):
+    # Returns ("summary", files, bytes, seconds) or None. adb pull prints
+    # per-file percentages only on a terminal, through a pipe just this.
+    match = SUMMARY_LINE.search(line)
+    if match:
+        files = int(match.group(1))
+        size = int(match.group(4)) if match.group(4) else None
+        seconds = float(match.group(5)) if match.group(5) else None
+        return "summary", files, size, seconds
+
+    return None
+
+
+class ProgressTracker:
+    # Turns transfers into TransferProgress events and keeps measured
+    # throughput per folder. sync and tar report each file, adb pull is
+    # followed by polling what it wrote (watch). Call it like a log
+    # callback: adb output is parsed for the pull summary and forwarded to
+    # log. Parallel transfer lanes report to the same tracker, so updates
+    # go through a lock.
+
+    def __init__(self, on_progress, log, steps=0):
+        self.on_progress = on_progress
+        self.log = log
+        self.state = TransferProgress(phase="idle", steps=steps)
+        self.sizes = {}
+        self.completed = set()
+        self.completed_bytes = 0
+        self.current_fraction = 0.0
+        self.partials = {}  # watch -> bytes of files still being written
+        self.folder_start = None
+        self.last_emit = 0.0
+        self.folder_stats = []  # (folder, bytes, seconds)
+        self.lock = threading.RLock()
+
+    def __call__(self, line):
+        with self.lock:
+            self.feed(line)
+        self.log(line)
+
+    def emit(self, force=False):
+        if not self.on_progress:
+            return
+
+        now = time.monotonic()
+        if not force and now - self.last_emit < EMIT_INTERVAL:
+            return
+
+        self.last_emit = now
+        self.on_progress(TransferProgress(**vars(self.state)))
+
+    def set_phase(self, phase):
+        self.state.phase = phase
+        self.emit(force=True)
+
+    def begin_folder(self, folder, listing):
+        # listing: (remote path, size) pairs for the files about to move
+        self.sizes = dict(listing)
+        self.completed = set()
+        self.completed_bytes = 0
+        self.current_fraction = 0.0
+        self.partials = {}
+        self.folder_start = time.monotonic()
+
+        self.state.phase = "transfer"
+        self.state.folder = folder
+        self.state.current_file = ""
+        self.state.files_done = 0
+        self.state.files_total = len(self.sizes)
+        self.state.bytes_done = 0
+        self.state.bytes_total = sum(size or 0 for size in self.sizes.values())
+        self.state.rate = 0.0
+        self.state.eta = None
+        self.emit(force=True)
+
+    def complete(self, path, size=None):
+        if path in self.completed:
+            return
+
+        self.completed.add(path)
+
+        known = self.sizes.get(path)
+        self.completed_bytes += known if known is not None else (size or 0)
+
+    def file_done(self, path, size=None):
+        with self.lock:
+            self.complete(path, size)
+            self.state.files_done = len(self.completed)
+            self.state.current_file = path
+            self.current_fraction = 0.0
+            self.update_bytes()
+
+    def file_progress(self, path, done):
+        # Bytes received so far of a file still in transfer
+        with self.lock:
+            size = self.sizes.get(path)
+            self.state.current_file = path
+            self.current_fraction = min(done / size, 1.0) if size else 0.0
+            self.update_bytes()
+
+    @contextmanager
+    def watch(self, pairs):
+        # pairs: (remote, local file) an adb pull is writing. Files that
+        # reached their listed size are complete, the rest count as far as
+        # they got.
+        pending = dict(pairs)
+        key = object()
+        stop = threading.Event()
+
+        def poll():
+            while not stop.wait(DISK_POLL_INTERVAL):
+                self.poll_files(key, pending)
+
+        thread = threading.Thread(target=poll, daemon=True)
+        thread.start()
+
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+            self.poll_files(key, pending)
+
+            with self.lock:
+                self.partials.pop(key, None)
+                self.update_bytes()
+
+    def poll_files(self, key, pending):
+        finished = []
+        partial = 0
+
+        for remote, local_file in pending.items():
+            try:
+                size = os.path.getsize(local_file)
+            except OSError:
+                continue
+
+            expected = self.sizes.get(remote)
+
+            if expected is not None and size >= expected:
+                finished.append(remote)
+            else:
+                partial += size
+
+        with self.lock:
+            for remote in finished:
+                del pending[remote]
+                self.complete(remote)
+                self.state.current_file = remote
+
+            self.partials[key] = partial
+            self.state.files_done = len(self.completed)
+            self.update_bytes()
+
+    def update_bytes(self):
+        partial = (self.sizes.get(self.state.current_file) or 0) * self.current_fraction
+        partial += sum(self.partials.values())
+        self.state.bytes_done = int(self.completed_bytes + partial)
+
+        self.update_rate()
+        self.emit()
+
+    def update_rate(self):
+        elapsed = time.monotonic() - self.folder_start if self.folder_start else 0
+        if elapsed <= 0:
+            return
+
+        self.state.rate = self.state.bytes_done / elapsed
+
+        remaining = self.state.bytes_total - self.state.bytes_done
+        self.state.eta = remaining / self.state.rate if self.state.rate and remaining > 0 else None
+
+    def feed(self, line):
+        parsed = parse_pull_line(line)
+        if not parsed or self.folder_start is None:
+            return
+
+        _, files, size, _ = parsed
+
+        self.state.files_done = max(self.state.files_done, len(self.completed))
+
+        if size is not None:
+            self.state.bytes_done = max(self.state.bytes_done, size)
+
+        self.update_rate()
+        self.emit(force=True)
+
+    def end_folder(self, complete=True):
+        # complete: nothing is missing, the listed sizes are what moved.
+        # Otherwise the bytes seen so far stay, a failed folder must not
+        # look fast in the throughput history.
+        if self.folder_start is None:
+            return None
+
+        seconds = time.monotonic() - self.folder_start
+
+        if self.sizes and complete:
+            self.state.files_done = self.state.files_total
+            self.state.bytes_done = max(self.state.bytes_done, self.state.bytes_total)
+
+        self.update_rate()
+        stats = (self.state.folder, self.state.bytes_done, seconds)
+        self.folder_start = None
+
+        # Nothing moved (linked from the previous backup, kept from an
+        # interrupted one): its time says nothing about the throughput
+        if self.state.bytes_done:
+            self.folder_stats.append(stats)
+
+        self.state.eta = None
+        self.emit(force=True)
+
+        return stats
+
+    def next_step(self):
+        self.state.step += 1
+        self.state.bytes_done = 0
+        self.state.bytes_total = 0
+        self.emit(force=True)
+
+    def totals(self):
+        total_bytes = sum(size for _, size, _ in self.folder_stats)
+        total_seconds = sum(seconds for _, _, seconds in self.folder_stats)
+        return total_bytes, total_seconds
+
+
+def watch_files(progress, pairs):
+    # progress.watch when there is a tracker
+    return progress.watch(pairs) if progress else nullcontext()
+
+
+def format_rate(size, seconds):
+    if seconds <= 0:
+        return "-"
+    return f"{size / seconds / 1024 / 1024:.1f} MB/s"
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
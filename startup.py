@@ -0,0 +1,95 @@
+import os
+import time
+from adb import get_adb_version, run_adb_command
+from app_cache import JsonCache
+from config import ADB_PATH, APP_VER, VERSION_URL, UPDATE_CHECK_INTERVAL
+
+# Slow startup work (adb version, update check, adb server) with results
+# cached between runs, so the window never waits for it.
+
+STARTUP_CACHE = "startup.json"
+
+_cache = None
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = JsonCache(STARTUP_CACHE)
+    return _cache
+
+
+def adb_binary_key():
+    # Changes whenever adb.exe is replaced
+    try:
+        stat = os.stat(ADB_PATH)
+    except OSError:
+        return None
+    return [ADB_PATH, stat.st_size, int(stat.st_mtime)]
+
+
+def cached_adb_version():
+    entry = get_cache().get("adb_version")
+
+    if entry and entry.get("key") == adb_binary_key():
+        return entry.get("version")
+
+    return None
+
+
+def refresh_adb_version():
+    version = get_adb_version()
+
+    if version != "No disponible":
+        get_cache().set("adb_version", {"key": adb_binary_key(), "version": version})
+
+    return version
+
+
+def start_adb_server():
+    run_adb_command(["start-server"], capture_output=True)
+
+
+def check_for_updates():
+    # Returns (checked, update data or None); checked is False when offline
+    try:
+        # Imported here so they stay out of the startup path
+        import requests
+        from packaging import version
+
+        response = requests.get(VERSION_URL, timeout=3)
+        data = response.json()
+
+        if version.parse(data["version"]) > version.parse(APP_VER):
+            return True, data
+
+        return True, None
+
+    except Exception as e:
+        print("Update check failed:", e)
+
+    return False, None
+
+
+def cached_update():
+    # Returns (fresh, update data or None) from the last successful check
+    entry = get_cache().get("update_check")
+
+    if not entry or entry.get("app_version") != APP_VER:
+        return False, None
+
+    fresh = time.time() - entry.get("checked_at", 0) < UPDATE_CHECK_INTERVAL
+    return fresh, entry.get("update")
+
+
+def refresh_update():
+    checked, update = check_for_updates()
+
+    if checked:
+        get_cache().set("update_check", {
+            "checked_at": time.time(),
+            "app_version": APP_VER,
+            "update": update,
+        })
+
+    return update
@@ -0,0 +1,117 @@
+from config import (
+    STRATEGY_COSTS, STRATEGY_PRIOR_SECONDS, STRATEGY_LARGE_FILE, STRATEGY_EXPLORE_MARGIN,
+    PULL_BATCH_MAX_FILES
+)
+from throughput import strategy_history
+
+# Strategies that copy a whole directory in one adb call; "pull" can only
+# do that, the rest also take a list of files (a subset of a folder,
+# incremental and resumed backups)
+WHOLE_FOLDER = ("pull", "tar", "tar.gz")
+WHOLE_FOLDER_ONLY = ("pull",)
+
+
+def listing_size(listing):
+    return sum(size for _, size, _ in listing)
+
+
+def folder_kind(files, size):
+    return "large" if files and size / files >= STRATEGY_LARGE_FILE else "small"
+
+
+def adb_calls(strategy, files, whole):
+    # One stream or connection for a directory or for sync, otherwise one
+    # per batch of files
+    if strategy == "sync" or (whole and strategy in WHOLE_FOLDER):
+        return 1
+    return -(-files // PULL_BATCH_MAX_FILES)
+
+
+def prior_seconds(strategy, files, size, calls):
+    setup, per_file, rate = STRATEGY_COSTS[strategy]
+    return calls * setup + files * per_file + size / rate
+
+
+class StrategySelector:
+    # Picks the transfer strategy of each folder: the cost model in
+    # STRATEGY_COSTS, corrected by what was measured for the same model,
+    # firmware, strategy and kind of folder (mostly small or large files).
+    # Folders mixing both can be split, small files with one strategy and
+    # large ones with another.
+
+    def __init__(self, model, firmware, available, lanes=1):
+        # Several lanes change every timing, they are measured apart
+        self.key = f"{model}/{firmware}" if lanes == 1 else f"{model}/{firmware}/x{lanes}"
+        self.available = [strategy for strategy in available if strategy in STRATEGY_COSTS]
+
+    def history_key(self, strategy, kind):
+        return f"{self.key}/{strategy}/{kind}"
+
+    def factor(self, strategy, kind):
+        # Measured / expected time over the history, pulled towards 1 by
+        # STRATEGY_PRIOR_SECONDS while there is little of it
+        measured = STRATEGY_PRIOR_SECONDS
+        expected = STRATEGY_PRIOR_SECONDS
+
+        for files, size, seconds, calls in strategy_history.samples(self.history_key(strategy, kind)):
+            measured += seconds
+            expected += prior_seconds(strategy, files, size, calls)
+
+        return measured / expected
+
+    def estimate(self, strategy, listing, whole=False):
+        files = len(listing)
+        size = listing_size(listing)
+        seconds = prior_seconds(strategy, files, size, adb_calls(strategy, files, whole))
+
+        return seconds * self.factor(strategy, folder_kind(files, size))
+
+    def measured(self, strategy, kind):
+        return bool(strategy_history.samples(self.history_key(strategy, kind)))
+
+    def best(self, listing, whole):
+        estimates = {
+            strategy: self.estimate(strategy, listing, whole)
+            for strategy in self.available
+            if whole or strategy not in WHOLE_FOLDER_ONLY
+        }
+        best = min(estimates, key=estimates.get)
+        kind = folder_kind(len(listing), listing_size(listing))
+
+        # A strategy never measured here that is expected to come close gets
+        # one go, otherwise the priors alone would decide forever
+        for strategy, seconds in estimates.items():
+            if not self.measured(strategy, kind) and seconds <= estimates[best] * STRATEGY_EXPLORE_MARGIN:
+                return strategy
+
+        return best
+
+    def choose(self, listing, whole=False):
+        # [(strategy, listing part)]. whole: the listing is the entire
+        # folder, so whole-directory strategies apply
+        strategy = self.best(listing, whole)
+        parts = [(strategy, listing)]
+        cost = self.estimate(strategy, listing, whole)
+
+        small = [entry for entry in listing if entry[1] < STRATEGY_LARGE_FILE]
+        large = [entry for entry in listing if entry[1] >= STRATEGY_LARGE_FILE]
+
+        if small and large:
+            split = [(self.best(part, False), part) for part in (small, large)]
+
+            if split[0][0] != split[1][0] and sum(self.estimate(s, part) for s, part in split) < cost:
+                parts = split
+
+        return parts
+
+    def record(self, strategy, listing, seconds, whole=False):
+        files = len(listing)
+        size = listing_size(listing)
+
+        if not files or seconds <= 0:
+            return
+
+        strategy_history.append(
+            self.history_key(strategy, folder_kind(files, size)),
+            [files, size, round(seconds, 3), adb_calls(strategy, files, whole)]
+        )
@@ -0,0 +1,89 @@
+# Socket client and sync protocol tests against tools/fake_adb_server.py:
+#
+#   python -m pytest tests
+#
+# Linux only, like the fake server (device commands run in the local bash).
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS = os.path.join(ROOT, "tools")
+
+sys.path.insert(0, ROOT)
+sys.path.insert(0, TOOLS)
+
+from adb_client import AdbClient  # noqa: E402
+from fake_device import create_device  # noqa: E402
+
+SERIAL = "5842R00123"
+
+
+class FakeServer:
+
+    def __init__(self, home, bandwidth=0):
+        self.home = home
+        env = dict(os.environ, FAKE_ADB_HOME=home, FAKE_ADB_LATENCY="0", FAKE_ADB_BANDWIDTH=str(bandwidth))
+
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.join(TOOLS, "fake_adb_server.py"), "--port", "0"],
+            stdout=subprocess.PIPE,
+            env=env,
+            text=True
+        )
+        self.port = int(self.process.stdout.readline())
+
+    def client(self):
+        return AdbClient(port=self.port)
+
+    def sdcard(self, serial=SERIAL):
+        return os.path.join(self.home, serial, "sdcard")
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait()
+
+
+def start_server(tmp_path_factory, bandwidth=0):
+    home = str(tmp_path_factory.mktemp("devices"))
+    create_device(home, SERIAL, "trimble", files=40, median_size=16 * 1024, sigma=1.0, max_size=1024 * 1024)
+    return FakeServer(home, bandwidth)
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    server = start_server(tmp_path_factory)
+    yield server
+    server.stop()
+
+
+@pytest.fixture(scope="module")
+def slow_server(tmp_path_factory):
+    # 2 MB/s: a few MB take long enough to cancel halfway
+    server = start_server(tmp_path_factory, bandwidth=2)
+
+    with open(os.path.join(server.sdcard(), "big.bin"), "wb") as f:
+        f.write(os.urandom(8 * 1024 * 1024))
+
+    yield server
+    server.stop()
+
+
+def device_files(sdcard):
+    # Remote path -> local path of every regular file on the fake device
+    files = {}
+
+    for dirpath, _, filenames in os.walk(sdcard):
+        for name in filenames:
+            local = os.path.join(dirpath, name)
+            files["/sdcard/" + os.path.relpath(local, sdcard).replace(os.sep, "/")] = local
+
+    return files
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
@@ -0,0 +1,123 @@
+import io
+import os
+import threading
+
+import pytest
+
+from adb_client import AdbError, read_frames, parse_device_states
+from conftest import SERIAL, device_files, read
+
+
+def frame(text):
+    data = text.encode("utf-8")
+    return b"%04x" % len(data) + data
+
+
+def test_read_frames_splits_payloads():
+    stream = io.BytesIO(frame("A\tdevice\n") + frame("") + frame("A\tdevice\nB\toffline\n"))
+
+    assert list(read_frames(stream)) == ["A\tdevice\n", "", "A\tdevice\nB\toffline\n"]
+
+
+def test_read_frames_stops_at_truncated_frame():
+    stream = io.BytesIO(frame("A\tdevice\n") + b"0010A\tdev")
+
+    assert list(read_frames(stream)) == ["A\tdevice\n"]
+
+
+def test_read_frames_rejects_bad_header():
+    with pytest.raises(ValueError):
+        list(read_frames(io.BytesIO(b"zzzzA\tdevice\n")))
+
+
+def test_parse_device_states():
+    payload = "A\tdevice\nB\tunauthorized\nC\tno permissions (user in plugdev group)\n\n"
+
+    assert parse_device_states(payload) == {"A": "device", "B": "unauthorized", "C": "no permissions"}
+
+
+def test_devices(server):
+    assert server.client().devices() == {SERIAL: "device"}
+
+
+def test_devices_reports_state(server):
+    path = os.path.join(server.home, "UNAUTH0001")
+    os.makedirs(os.path.join(path, "sdcard"))
+
+    with open(os.path.join(path, "state"), "w", encoding="utf-8") as f:
+        f.write("unauthorized")
+
+    try:
+        assert server.client().devices()["UNAUTH0001"] == "unauthorized"
+    finally:
+        os.remove(os.path.join(path, "state"))
+        os.rmdir(os.path.join(path, "sdcard"))
+        os.rmdir(path)
+
+
+def test_unknown_device_fails(server):
+    with pytest.raises(AdbError, match="not found"):
+        server.client().open_service("NOPE", "exec:true")
+
+
+def test_unknown_service_fails(server):
+    with pytest.raises(AdbError, match="unknown service"):
+        server.client().open_service(SERIAL, "bogus:")
+
+
+def test_exec_stream_is_binary_exact(server):
+    remote, local = sorted(device_files(server.sdcard()).items())[0]
+
+    process = server.client().exec_stream(SERIAL, f"cat \"{remote}\"")
+    try:
+        data = process.stdout.read()
+    finally:
+        process.kill()
+
+    assert data == read(local)
+
+
+def test_shell_session_runs_commands(server):
+    process = server.client().shell_session(SERIAL)
+
+    try:
+        process.stdin.write("echo one\necho two\n")
+        process.stdin.flush()
+
+        assert process.stdout.readline() == "one\n"
+        assert process.stdout.readline() == "two\n"
+    finally:
+        process.kill()
+
+
+def test_track_devices_sends_changes(server):
+    process = server.client().track_devices()
+    frames = read_frames(process.stdout)
+
+    try:
+        assert parse_device_states(next(frames)) == {SERIAL: "device"}
+
+        os.makedirs(os.path.join(server.home, "NEW0000001", "sdcard"))
+        assert parse_device_states(next(frames)) == {SERIAL: "device", "NEW0000001": "device"}
+
+        os.rmdir(os.path.join(server.home, "NEW0000001", "sdcard"))
+        os.rmdir(os.path.join(server.home, "NEW0000001"))
+        assert parse_device_states(next(frames)) == {SERIAL: "device"}
+    finally:
+        process.kill()
+
+
+def test_kill_unblocks_track_devices_reader(server):
+    process = server.client().track_devices()
+    frames = read_frames(process.stdout)
+    next(frames)
+
+    # Nothing changes: the reader blocks until kill()
+    result = []
+    thread = threading.Thread(target=lambda: result.append(list(frames)))
+    thread.start()
+
+    process.kill()
+    thread.join(2)
+
+    assert not thread.is_alive()
@@ -0,0 +1,254 @@
+import os
+import socket
+import stat
+import struct
+import threading
+import time
+
+import pytest
+
+from adb_client import AdbError
+from adb_sync import SyncConnection, SyncError, SyncFailed, recv_files
+from cancellation import CancellationToken
+from conftest import SERIAL, device_files, read
+
+
+def never():
+    return False
+
+
+@pytest.fixture
+def connection(server):
+    connection = SyncConnection.open(server.client(), SERIAL)
+    yield connection
+    connection.quit()
+    connection.close()
+
+
+def test_stat_file(server, connection):
+    remote, local = sorted(device_files(server.sdcard()).items())[0]
+    info = os.stat(local)
+
+    mode, size, mtime = connection.stat(remote)
+
+    assert stat.S_ISREG(mode)
+    assert size == info.st_size
+    assert mtime == int(info.st_mtime)
+
+
+def test_stat_directory(connection):
+    mode, _, _ = connection.stat("/sdcard")
+
+    assert stat.S_ISDIR(mode)
+
+
+def test_stat_missing(connection):
+    assert connection.stat("/sdcard/no/such/file") is None
+
+
+def test_list(server, connection):
+    expected = {
+        entry.name: (entry.is_dir(), None if entry.is_dir() else entry.stat().st_size)
+        for entry in os.scandir(server.sdcard())
+    }
+
+    entries = {
+        name: (stat.S_ISDIR(mode), None if stat.S_ISDIR(mode) else size)
+        for name, mode, size, _ in connection.list("/sdcard")
+    }
+
+    assert entries == expected
+
+
+def test_list_missing_is_empty(connection):
+    assert connection.list("/sdcard/no/such/dir") == []
+
+
+def test_walk_matches_device(server, connection):
+    expected = {remote: os.path.getsize(local) for remote, local in device_files(server.sdcard()).items()}
+
+    walked = {path: size for path, size, _ in connection.walk("/sdcard")}
+
+    assert walked == expected
+
+
+def test_pipelined_stat_answers_in_order(server, connection):
+    # Answers of pipelined requests come back in order on the same socket
+    files = sorted(device_files(server.sdcard()).items())
+
+    answers = list(connection.pipeline(
+        files,
+        lambda pair: connection.send(b"STAT", pair[0]),
+        lambda _: connection.read_stat()
+    ))
+
+    assert [pair for pair, _ in answers] == files
+    assert [answer[1] for _, answer in answers] == [os.path.getsize(local) for _, local in files]
+
+
+def test_recv_files(server, tmp_path):
+    files = sorted(device_files(server.sdcard()).items())
+    pairs = [(remote, str(tmp_path / f"{index}.bin")) for index, (remote, _) in enumerate(files)]
+    seen = []
+
+    received, failed, total = recv_files(
+        server.client(), SERIAL, pairs, never, on_file=lambda remote, size: seen.append((remote, size))
+    )
+
+    sizes = [(remote, os.path.getsize(local)) for remote, local in files]
+    assert received == sizes
+    assert seen == sizes
+    assert failed == []
+    assert total == sum(size for _, size in sizes)
+
+    for (_, local), (_, copy) in zip(files, pairs):
+        assert read(copy) == read(local)
+
+
+def test_recv_files_reports_data_progress(server, tmp_path):
+    remote, local = max(device_files(server.sdcard()).items(), key=lambda item: os.path.getsize(item[1]))
+    progress = []
+
+    recv_files(
+        server.client(), SERIAL, [(remote, str(tmp_path / "copy"))], never,
+        on_data=lambda path, done: progress.append((path, done))
+    )
+
+    assert progress
+    assert all(path == remote for path, _ in progress)
+    assert progress[-1][1] == os.path.getsize(local)
+    assert [done for _, done in progress] == sorted(done for _, done in progress)
+
+
+def test_recv_files_missing_files(server, tmp_path):
+    # Each FAIL ends the device session: the files after it still arrive
+    files = sorted(device_files(server.sdcard()).items())[:6]
+    remotes = [remote for remote, _ in files]
+    remotes.insert(2, "/sdcard/missing-1.bin")
+    remotes.insert(5, "/sdcard/missing-2.bin")
+    remotes.append("/sdcard/missing-3.bin")
+    pairs = [(remote, str(tmp_path / f"{index}.bin")) for index, remote in enumerate(remotes)]
+
+    received, failed, total = recv_files(server.client(), SERIAL, pairs, never)
+
+    assert [remote for remote, _ in received] == [remote for remote, _ in files]
+    assert [remote for remote, _ in failed] == ["/sdcard/missing-1.bin", "/sdcard/missing-2.bin", "/sdcard/missing-3.bin"]
+    assert all("No such file" in message for _, message in failed)
+    assert total == sum(os.path.getsize(local) for _, local in files)
+
+    copies = dict(pairs)
+    for remote, local in files:
+        assert read(copies[remote]) == read(local)
+    for remote, _ in failed:
+        assert not os.path.exists(copies[remote])
+
+
+def test_recv_files_unknown_device(server, tmp_path):
+    with pytest.raises(AdbError, match="not found"):
+        recv_files(server.client(), "NOPE", [("/sdcard/a", str(tmp_path / "a"))], never)
+
+
+def test_fail_answer_to_list():
+    device, host = socket.socketpair()
+    message = b"/sdcard/private: Permission denied"
+    device.sendall(b"FAIL" + struct.pack("<I", len(message)) + message)
+
+    connection = SyncConnection(host)
+    try:
+        with pytest.raises(SyncFailed, match="Permission denied"):
+            connection.read_list()
+    finally:
+        connection.close()
+        device.close()
+
+
+def test_truncated_answer():
+    device, host = socket.socketpair()
+    device.sendall(b"DATA" + struct.pack("<I", 100) + b"x" * 10)
+    device.close()
+
+    connection = SyncConnection(host)
+    try:
+        with pytest.raises(SyncError):
+            connection.receive_file(os.devnull, never)
+    finally:
+        connection.close()
+
+
+def test_unexpected_answer():
+    device, host = socket.socketpair()
+    device.sendall(b"OKAY" + struct.pack("<I", 0))
+
+    connection = SyncConnection(host)
+    try:
+        with pytest.raises(SyncError, match="RECV"):
+            connection.receive_file(os.devnull, never)
+    finally:
+        connection.close()
+        device.close()
+
+
+def test_oversized_data_block():
+    device, host = socket.socketpair()
+    device.sendall(b"DATA" + struct.pack("<I", 1024 * 1024))
+
+    connection = SyncConnection(host)
+    try:
+        with pytest.raises(SyncError, match="demasiado grande"):
+            connection.receive_file(os.devnull, never)
+    finally:
+        connection.close()
+        device.close()
+
+
+def test_cancel_mid_recv(slow_server, tmp_path):
+    # 8 MB at 2 MB/s: cancelled from another thread once the first data
+    # arrived, the blocked read returns at once and the partial file goes
+    token = CancellationToken()
+    local_file = tmp_path / "big.bin"
+    started = threading.Event()
+
+    def on_data(remote, done):
+        started.set()
+
+    def cancel():
+        started.wait(5)
+        token.cancel()
+
+    thread = threading.Thread(target=cancel)
+    thread.start()
+
+    begin = time.monotonic()
+    with pytest.raises((SyncError, OSError)):
+        recv_files(slow_server.client(), SERIAL, [("/sdcard/big.bin", str(local_file))], token, on_data=on_data)
+    thread.join()
+
+    assert started.is_set()
+    assert token.latency() < 1
+    assert time.monotonic() - begin < 3
+    assert not local_file.exists()
+
+
+def test_cancel_between_files(slow_server, tmp_path):
+    # Cancelled once two files landed: those are kept whole, the one being
+    # received is removed
+    files = sorted(item for item in device_files(slow_server.sdcard()).items() if item[0] != "/sdcard/big.bin")[:2]
+    pairs = [(remote, str(tmp_path / f"{index}.bin")) for index, (remote, _) in enumerate(files)]
+    pairs.append(("/sdcard/big.bin", str(tmp_path / "big.bin")))
+    token = CancellationToken()
+    landed = []
+
+    def on_file(remote, size):
+        landed.append(remote)
+        if len(landed) == 2:
+            token.cancel()
+
+    try:
+        recv_files(slow_server.client(), SERIAL, pairs, token, on_file=on_file)
+    except (SyncError, OSError):
+        pass
+
+    assert landed == [remote for remote, _ in files]
+    for (_, local), (_, copy) in zip(files, pairs):
+        assert read(copy) == read(local)
+    assert not os.path.exists(pairs[2][1])
@@ -0,0 +1,46 @@
+from app_cache import JsonCache
+from config import THROUGHPUT_HISTORY_SAMPLES
+
+THROUGHPUT_CACHE = "throughput.json"
+STRATEGY_CACHE = "strategies.json"
+
+
+class ThroughputHistory(JsonCache):
+    # Measured transfers, the last THROUGHPUT_HISTORY_SAMPLES per key. For
+    # whole backups the key is model and strategy, samples [bytes, seconds]
+
+    def __init__(self, name=THROUGHPUT_CACHE):
+        super().__init__(name)
+
+    @staticmethod
+    def key(model, strategy):
+        return f"{model}/{strategy}"
+
+    def append(self, key, sample):
+        with self.lock:
+            samples = self.data.get(key, []) + [sample]
+            self.data[key] = samples[-THROUGHPUT_HISTORY_SAMPLES:]
+            self.save()
+
+    def samples(self, key):
+        return self.get(key) or []
+
+    def record(self, model, strategy, size, seconds):
+        if size <= 0 or seconds <= 0:
+            return
+
+        self.append(self.key(model, strategy), [size, round(seconds, 3)])
+
+    def rate(self, model, strategy):
+        # Bytes per second over the recorded backups, None without history
+        samples = self.samples(self.key(model, strategy))
+        size = sum(sample[0] for sample in samples)
+        seconds = sum(sample[1] for sample in samples)
+
+        return size / seconds if seconds else None
+
+
+# Shared by every backup thread: whole backups, and single transfers for
+# the strategy selector
+throughput_history = ThroughputHistory()
+strategy_history = ThroughputHistory(STRATEGY_CACHE)
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# Throughput benchmark of backup_core against tools/fake_adb.py and
+# tools/fake_adb_server.py (socket client; --exe spawns adb for everything).
+# Reports wall time, adb spawns, MB/s and peak Python heap per scenario;
+# --baseline fails (exit 1) when a scenario got slower than the tolerance or
+# spawns more adb.
+#
+#   python tools/benchmark.py --files 2000 --latency 0.005 --bandwidth 40 --json bench.json
+#   python tools/benchmark.py --files 2000 --latency 0.005 --bandwidth 40 --baseline bench.json
+#
+# --lanes 1,2,4 runs every scenario with each count of parallel transfer
+# lanes (config.TRANSFER_LANES), results named "scenario@lanes".
+#
+# cancel_backup cancels a backup once its first file landed; its time is
+# how long run_backup took to return after that, and it fails when over
+# CANCEL_LATENCY_MAX. Use --bandwidth so the copy is still running.
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+TOOLS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(TOOLS)
+
+sys.path.insert(0, TOOLS)
+
+from fake_device import create_device  # noqa: E402
+
+SERIAL = "5842R00123"
+SCENARIOS = ("device_info", "pull_folder", "deep_scan", "run_backup", "run_backup_incremental", "cancel_backup")
+
+# Seconds from cancel() to run_backup returning
+CANCEL_LATENCY_MAX = 1.0
+
+
+def folder_size(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            total += os.path.getsize(os.path.join(dirpath, name))
+    return total
+
+
+def copied_files(backup_path):
+    # Journal and manifest sit in the backup root, copies in the folders below
+    for dirpath, _, filenames in os.walk(backup_path):
+        if filenames and dirpath != backup_path:
+            return True
+    return False
+
+
+def count_spawns(home):
+    path = os.path.join(home, "spawns.log")
+    if not os.path.exists(path):
+        return 0
+    with open(path, encoding="utf-8") as f:
+        return sum(1 for _ in f)
+
+
+class Bench:
+
+    def __init__(self, home, work, profile, strategy, lanes=1):
+        import adb
+        import backup_core
+        from config import DEVICE_PROFILES
+
+        self.adb = adb
+        self.core = backup_core
+        self.home = home
+        self.work = work
+        self.profile = profile
+        self.strategy = strategy
+        self.lanes = lanes
+        self.folders = [folder for folder, checked in DEVICE_PROFILES[profile]["folders"] if checked]
+        self.runs = 0
+        # Set by scenarios that time only part of their run
+        self.elapsed = None
+
+    def output(self):
+        self.runs += 1
+        path = os.path.join(self.work, f"out{self.runs}")
+        os.makedirs(path)
+        return path
+
+    def log(self, line):
+        pass
+
+    def never(self):
+        return False
+
+    # Scenarios return the bytes that ended up on disk
+
+    def device_info(self):
+        info = self.adb.get_device_info(SERIAL)
+        assert info.serial == SERIAL, info
+        return 0
+
+    def pull_folder(self):
+        path = self.output()
+        for folder in self.folders:
+            self.core.pull_folder(
+                SERIAL, folder, path, self.log, self.never, self.profile, self.strategy, lanes=self.lanes
+            )
+        return folder_size(path)
+
+    def deep_scan(self):
+        path = self.output()
+        self.core.scan_and_pull_extra_directories(
+            SERIAL, path, self.folders, self.log, self.never, self.profile, self.strategy, lanes=self.lanes
+        )
+        return folder_size(path)
+
+    def backup(self, incremental):
+        created = []
+        ok = self.core.run_backup(
+            SERIAL, "TSC510", SERIAL, f"{self.runs}", "T-0", self.log, self.never, "11",
+            self.folders, True, self.profile, self.strategy, incremental,
+            on_backup_created=created.append,
+            lanes=self.lanes
+        )
+        self.runs += 1
+        assert ok and created, "run_backup falló"
+        return folder_size(created[0])
+
+    def run_backup(self):
+        return self.backup(False)
+
+    def run_backup_incremental(self):
+        # Needs a finished backup of the same serial to link against
+        if not self.core.find_previous_backup("TSC510", SERIAL):
+            self.backup(False)
+        return self.backup(True)
+
+    def cancel_backup(self):
+        from cancellation import CancellationToken
+
+        token = CancellationToken()
+        created = []
+
+        thread = threading.Thread(target=self.core.run_backup, args=(
+            SERIAL, "TSC510", SERIAL, f"{self.runs}", "T-0", self.log, token, "11",
+            self.folders, True, self.profile, self.strategy
+        ), kwargs={"on_backup_created": created.append, "lanes": self.lanes})
+        thread.start()
+        self.runs += 1
+
+        # "pull" reports nothing until a folder is done: watch the disk
+        while thread.is_alive() and not (created and copied_files(created[0])):
+            time.sleep(0.01)
+
+        token.cancel()
+        thread.join()
+
+        self.elapsed = token.latency()
+        assert self.elapsed <= CANCEL_LATENCY_MAX, f"cancelar tardó {self.elapsed:.3f}s"
+        return folder_size(created[0]) if created else 0
+
+    def measure(self, name, trace=False):
+        # Fresh shell session each time so its spawn is counted
+        self.adb.close_all_shells()
+        scenario = getattr(self, name)
+
+        spawns = count_spawns(self.home)
+
+        if trace:
+            tracemalloc.start()
+
+        self.elapsed = None
+        start = time.perf_counter()
+        size = scenario()
+        total = time.perf_counter() - start
+        wall = total if self.elapsed is None else self.elapsed
+
+        peak = None
+        if trace:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        return {
+            "wall": wall,
+            "spawns": count_spawns(self.home) - spawns,
+            "bytes": size,
+            "mb_s": size / total / 1024 / 1024 if total else 0.0,
+            "peak_mb": peak / 1024 / 1024 if peak is not None else None,
+        }
+
+
+def run(args):
+    base = tempfile.mkdtemp(prefix="tbu_bench_")
+    home = os.path.join(base, "devices")
+    work = os.path.join(base, "work")
+    os.makedirs(home)
+    os.makedirs(work)
+
+    # Must be set before config is imported
+    os.environ["TBU_ADB_PATH"] = os.path.join(TOOLS, "fake_adb.py")
+    os.environ["FAKE_ADB_HOME"] = home
+    os.environ["FAKE_ADB_LATENCY"] = str(args.latency)
+    os.environ["FAKE_ADB_BANDWIDTH"] = str(args.bandwidth)
+    os.environ["TBU_ADB_NATIVE"] = "0" if args.exe else "1"
+    sys.path.insert(0, ROOT)
+
+    server = None
+    if not args.exe:
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(TOOLS, "fake_adb_server.py"), "--port", "0"],
+            stdout=subprocess.PIPE,
+            text=True
+        )
+        os.environ["ANDROID_ADB_SERVER_PORT"] = server.stdout.readline().strip()
+
+    files, total = create_device(
+        home, SERIAL, args.profile, args.files, args.median_size, args.sigma, seed=args.seed
+    )
+    print(
+        f"Dispositivo {args.profile}: {files} archivos, {total / 1024 / 1024:.1f} MB, "
+        f"latencia {args.latency * 1000:.0f} ms, ancho de banda "
+        + (f"{args.bandwidth:g} MB/s" if args.bandwidth else "sin límite")
+    )
+
+    # BACKUP_ROOT is relative
+    cwd = os.getcwd()
+    os.chdir(work)
+
+    try:
+        bench = Bench(home, work, args.profile, args.strategy)
+        results = {}
+
+        for lanes in args.lanes:
+            bench.lanes = lanes
+
+            for name in args.scenarios:
+                timings = [bench.measure(name) for _ in range(args.repeat)]
+                best = min(timings, key=lambda result: result["wall"])
+
+                # Separate traced run: tracemalloc slows everything down
+                best["peak_mb"] = bench.measure(name, trace=True)["peak_mb"]
+                results[name if len(args.lanes) == 1 else f"{name}@{lanes}"] = best
+
+        bench.adb.close_all_shells()
+
+    finally:
+        os.chdir(cwd)
+        if server is not None:
+            server.terminate()
+            server.wait()
+        if not args.keep:
+            shutil.rmtree(base, ignore_errors=True)
+
+    return {
+        "params": {
+            "profile": args.profile,
+            "files": args.files,
+            "median_size": args.median_size,
+            "sigma": args.sigma,
+            "seed": args.seed,
+            "latency": args.latency,
+            "bandwidth": args.bandwidth,
+            "strategy": args.strategy,
+            "lanes": args.lanes,
+            "native": not args.exe,
+        },
+        "results": results,
+    }
+
+
+def print_results(results):
+    print(f"{'escenario':<24}{'tiempo (s)':>12}{'spawns':>8}{'MB':>10}{'MB/s':>9}{'pico MB':>10}")
+
+    for name, result in results.items():
+        print(
+            f"{name:<24}{result['wall']:>12.3f}{result['spawns']:>8}"
+            f"{result['bytes'] / 1024 / 1024:>10.1f}{result['mb_s']:>9.1f}{result['peak_mb']:>10.1f}"
+        )
+
+
+def compare(results, baseline, tolerance):
+    # Returns the regressions found against a previous --json report
+    regressions = []
+
+    for name, result in results.items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+
+        if result["wall"] > previous["wall"] * (1 + tolerance):
+            regressions.append(f"{name}: {previous['wall']:.3f}s -> {result['wall']:.3f}s")
+
+        if result["spawns"] > previous["spawns"]:
+            regressions.append(f"{name}: {previous['spawns']} -> {result['spawns']} spawns de adb")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de respaldo contra tools/fake_adb.py")
+    parser.add_argument("--profile", choices=("trimble", "spectra"), default="trimble")
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--median-size", type=int, default=64 * 1024, help="bytes")
+    parser.add_argument("--sigma", type=float, default=1.5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.005, help="segundos por spawn y por comando")
+    parser.add_argument("--bandwidth", type=float, default=0, help="MB/s, 0 = sin límite")
+    parser.add_argument("--strategy", default="pull")
+    parser.add_argument("--lanes", default="1", help="transferencias simultáneas, ej: 1,2,4")
+    parser.add_argument("--exe", action="store_true", help="sin cliente de socket, todo vía adb")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="guardar resultados")
+    parser.add_argument("--baseline", help="resultados previos (--json) a comparar")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="fracción de tiempo extra aceptada")
+    parser.add_argument("--keep", action="store_true", help="no borrar la carpeta temporal")
+    args = parser.parse_args()
+
+    args.scenarios = [name for name in args.scenarios.split(",") if name]
+
+    try:
+        args.lanes = [int(lanes) for lanes in args.lanes.split(",") if lanes]
+    except ValueError:
+        parser.error(f"--lanes espera números separados por comas: {args.lanes}")
+
+    if not args.lanes or min(args.lanes) < 1:
+        parser.error("--lanes necesita al menos una cantidad mayor que 0")
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"escenarios desconocidos: {', '.join(sorted(unknown))}")
+
+    report = run(args)
+    print_results(report["results"])
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+        if baseline.get("params") != report["params"]:
+            print("ADVERTENCIA: la línea base se midió con otros parámetros.")
+
+        regressions = compare(report["results"], baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESIÓN {regression}")
+
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# Stand-in for adb.exe that serves synthetic devices from a local folder, so
+# backups can be measured without collectors attached. Point TBU_ADB_PATH at
+# this file and FAKE_ADB_HOME at a folder made by tools/fake_device.py:
+#
+#   FAKE_ADB_HOME/<serial>/sdcard/   device storage, seen as /sdcard
+#   FAKE_ADB_HOME/<serial>/bin/      getprop, dumpsys
+#   FAKE_ADB_HOME/<serial>/state     optional adb state ("unauthorized", ...)
+#
+#   FAKE_ADB_LATENCY     seconds added to every spawn and every shell command
+#   FAKE_ADB_BANDWIDTH   MB/s cap for pull, exec-out and sync (0 = unlimited),
+#                        shared by all the streams of a device like its USB link
+#
+# Every invocation is appended to FAKE_ADB_HOME/spawns.log.
+# Linux only: device commands run in the local bash with GNU find/stat/tar.
+
+import fcntl
+import os
+import subprocess
+import sys
+import threading
+import time
+
+HOME = os.environ.get("FAKE_ADB_HOME", "")
+LATENCY = float(os.environ.get("FAKE_ADB_LATENCY") or 0)
+BANDWIDTH = float(os.environ.get("FAKE_ADB_BANDWIDTH") or 0) * 1024 * 1024
+
+SPAWN_LOG = "spawns.log"
+BUS_FILE = "bus"
+DEVICE_ROOT = "/sdcard"
+CHUNK = 64 * 1024
+
+
+def log_spawn(args):
+    with open(os.path.join(HOME, SPAWN_LOG), "a", encoding="utf-8") as f:
+        f.write(" ".join(args) + "\n")
+
+
+def device_states():
+    states = {}
+
+    if not os.path.isdir(HOME):
+        return states
+
+    for name in sorted(os.listdir(HOME)):
+        if not os.path.isdir(os.path.join(HOME, name, "sdcard")):
+            continue
+
+        try:
+            with open(os.path.join(HOME, name, "state"), encoding="utf-8") as f:
+                states[name] = f.read().strip() or "device"
+        except OSError:
+            states[name] = "device"
+
+    return states
+
+
+def list_devices():
+    return [serial for serial, state in device_states().items() if state == "device"]
+
+
+def device_list(states):
+    return "".join(f"{serial}\t{state}\n" for serial, state in states.items())
+
+
+class Throttle:
+    # Every chunk books its time on the device "bus": the time it is free
+    # again lives in FAKE_ADB_HOME/<serial>/bus, advanced under a file lock
+    # so concurrent pulls, streams and sync connections share BANDWIDTH
+
+    def __init__(self, device):
+        self.path = os.path.join(device.path, BUS_FILE)
+
+    def __call__(self, size):
+        if not BANDWIDTH:
+            return
+
+        with open(self.path, "a+", encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+
+            try:
+                free = float(f.read() or 0)
+            except ValueError:
+                free = 0.0
+
+            now = time.time()
+            done = max(now, free) + size / BANDWIDTH
+
+            f.seek(0)
+            f.truncate()
+            f.write(repr(done))
+
+        if done > now:
+            time.sleep(done - now)
+
+
+class Device:
+
+    def __init__(self, serial):
+        self.serial = serial
+        self.path = os.path.join(HOME, serial)
+        self.sdcard = os.path.join(self.path, "sdcard")
+
+    def to_local(self, data):
+        return data.replace(DEVICE_ROOT.encode(), self.sdcard.encode())
+
+    def to_device(self, data):
+        return data.replace(self.sdcard.encode(), DEVICE_ROOT.encode())
+
+    def local_path(self, remote):
+        remote = remote.rstrip("/") or "/"
+        if remote == DEVICE_ROOT or remote.startswith(DEVICE_ROOT + "/"):
+            return self.sdcard + remote[len(DEVICE_ROOT):]
+        return remote
+
+    def spawn(self, command=None, **kwargs):
+        env = dict(os.environ)
+        env["PATH"] = os.path.join(self.path, "bin") + os.pathsep + env.get("PATH", "")
+
+        args = ["bash", "--norc", "--noprofile"]
+        if command is not None:
+            args += ["-c", self.to_local(command.encode()).decode()]
+
+        return subprocess.Popen(args, cwd=self.path, env=env, **kwargs)
+
+
+def write_out(data):
+    sys.stdout.buffer.write(data)
+    sys.stdout.buffer.flush()
+
+
+def shell_command(device, command):
+    process = device.spawn(command, stdout=subprocess.PIPE)
+
+    for line in iter(process.stdout.readline, b""):
+        write_out(device.to_device(line))
+
+    return process.wait()
+
+
+def interactive_shell(device):
+    # Persistent session: commands from stdin go to one bash, output comes
+    # back with the local paths mapped to /sdcard
+    process = device.spawn(stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def pump():
+        for line in iter(process.stdout.readline, b""):
+            write_out(device.to_device(line))
+
+    thread = threading.Thread(target=pump, daemon=True)
+    thread.start()
+
+    try:
+        for line in iter(sys.stdin.buffer.readline, b""):
+            # One USB round trip per command block
+            if line.startswith(b"{ ") and LATENCY:
+                time.sleep(LATENCY)
+
+            process.stdin.write(device.to_local(line))
+            process.stdin.flush()
+
+        process.stdin.close()
+    except BrokenPipeError:
+        pass
+
+    status = process.wait()
+    thread.join()
+    return status
+
+
+def exec_out(device, command):
+    process = device.spawn(command, stdout=subprocess.PIPE)
+    throttle = Throttle(device)
+
+    while True:
+        data = os.read(process.stdout.fileno(), CHUNK)
+        if not data:
+            break
+
+        write_out(data)
+        throttle(len(data))
+
+    return process.wait()
+
+
+def copy_file(source, target, throttle):
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        while True:
+            data = src.read(CHUNK)
+            if not data:
+                break
+
+            dst.write(data)
+            throttle(len(data))
+
+    return os.path.getsize(target)
+
+
+def copy_tree(source, target, throttle):
+    files = 0
+    size = 0
+
+    for dirpath, _, filenames in os.walk(source):
+        local_dir = os.path.join(target, os.path.relpath(dirpath, source))
+        os.makedirs(local_dir, exist_ok=True)
+
+        for name in filenames:
+            size += copy_file(os.path.join(dirpath, name), os.path.join(local_dir, name), throttle)
+            files += 1
+
+    return files, size
+
+
+def pull(device, args):
+    args = [arg for arg in args if not arg.startswith("-")]
+
+    if len(args) < 2:
+        sys.stderr.write("adb: pull requires an argument\n")
+        return 1
+
+    *sources, dest = args
+    throttle = Throttle(device)
+    status = 0
+
+    for source in sources:
+        local = device.local_path(source)
+        start = time.monotonic()
+
+        if os.path.isdir(local):
+            target = os.path.join(dest, os.path.basename(local)) if os.path.isdir(dest) else dest
+            files, size = copy_tree(local, target, throttle)
+        elif os.path.isfile(local):
+            target = os.path.join(dest, os.path.basename(local)) if os.path.isdir(dest) else dest
+            files, size = 1, copy_file(local, target, throttle)
+        else:
+            sys.stderr.write(
+                f"adb: error: failed to stat remote object '{source}': No such file or directory\n"
+            )
+            status = 1
+            continue
+
+        elapsed = max(time.monotonic() - start, 0.001)
+        write_out(
+            f"{source}: {files} file{'' if files == 1 else 's'} pulled, 0 skipped. "
+            f"{size / elapsed / 1024 / 1024:.1f} MB/s ({size} bytes in {elapsed:.3f}s)\n".encode()
+        )
+
+    return status
+
+
+def track_devices():
+    # A framed device list now and on every change (devices added, removed
+    # or a state file edited)
+    last = None
+
+    try:
+        while True:
+            states = device_states()
+
+            if states != last:
+                body = device_list(states).encode()
+                write_out(f"{len(body):04x}".encode() + body)
+                last = states
+
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        return 0
+
+
+def main(argv):
+    if HOME:
+        log_spawn(argv)
+
+    if LATENCY:
+        time.sleep(LATENCY)
+
+    serial = os.environ.get("ANDROID_SERIAL")
+    args = list(argv)
+
+    while args and args[0] in ("-s", "-d", "-e", "-H", "-P"):
+        option = args.pop(0)
+        if option in ("-s", "-H", "-P") and args:
+            value = args.pop(0)
+            if option == "-s":
+                serial = value
+
+    if not args:
+        sys.stderr.write("adb: no command\n")
+        return 1
+
+    command, args = args[0], args[1:]
+
+    if command == "version":
+        write_out(b"Android Debug Bridge version 1.0.41\nVersion 35.0.0-fake\n")
+        return 0
+
+    if command in ("start-server", "kill-server", "disconnect", "reconnect"):
+        return 0
+
+    if command == "devices":
+        write_out(f"List of devices attached\n{device_list(device_states())}\n".encode())
+        return 0
+
+    if command == "track-devices":
+        return track_devices()
+
+    devices = list_devices()
+
+    if serial is None:
+        if len(devices) != 1:
+            sys.stderr.write("adb: more than one device/emulator\n" if devices else "adb: no devices/emulators found\n")
+            return 1
+        serial = devices[0]
+
+    if serial not in devices:
+        sys.stderr.write(f"adb: device '{serial}' not found\n")
+        return 1
+
+    device = Device(serial)
+
+    if command == "get-state":
+        write_out(b"device\n")
+        return 0
+
+    if command == "get-serialno":
+        write_out(f"{serial}\n".encode())
+        return 0
+
+    if command == "shell":
+        if not args:
+            return interactive_shell(device)
+        return shell_command(device, " ".join(args))
+
+    if command == "exec-out":
+        return exec_out(device, " ".join(args))
+
+    if command == "pull":
+        return pull(device, args)
+
+    sys.stderr.write(f"adb: unknown command {command}\n")
+    return 1
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main(sys.argv[1:]))
+    except BrokenPipeError:
+        sys.exit(1)
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# Stand-in for the adb server's host protocol (adb_client.py), serving the
+# same synthetic devices as tools/fake_adb.py from FAKE_ADB_HOME, with the
+# same FAKE_ADB_LATENCY and FAKE_ADB_BANDWIDTH. Prints the port it listens
+# on as the first line of output.
+#
+#   FAKE_ADB_HOME=/tmp/devices python tools/fake_adb_server.py --port 5037
+#
+# host:version, host:devices, host:track-devices, host-serial:<s>:get-state,
+# host:transport:<s>, host:transport-any, then shell:, shell,raw:, exec:
+# and sync: (STAT, LIST, RECV, QUIT).
+
+import argparse
+import os
+import queue
+import socket
+import socketserver
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_adb import (  # noqa: E402
+    CHUNK, LATENCY, Device, Throttle, device_list, device_states, list_devices
+)
+
+
+def recv_exact(sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def read_request(sock):
+    header = recv_exact(sock, 4)
+    if header is None:
+        return None
+
+    payload = recv_exact(sock, int(header, 16))
+    return payload.decode("utf-8") if payload is not None else None
+
+
+def hex_string(text):
+    data = text.encode("utf-8")
+    return b"%04x" % len(data) + data
+
+
+def fail(sock, message):
+    sock.sendall(b"FAIL" + hex_string(message))
+
+
+class Handler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        sock = self.request
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        serial = None
+
+        while True:
+            service = read_request(sock)
+            if service is None:
+                return
+
+            if LATENCY:
+                time.sleep(LATENCY)
+
+            if service.startswith("host:transport"):
+                devices = list_devices()
+
+                if service == "host:transport-any":
+                    serial = devices[0] if len(devices) == 1 else None
+                else:
+                    serial = service[len("host:transport:"):]
+
+                if serial not in devices:
+                    fail(sock, f"device '{serial}' not found")
+                    return
+
+                # Same socket, next request goes to the device
+                sock.sendall(b"OKAY")
+                continue
+
+            if serial is None:
+                self.host_service(sock, service)
+            else:
+                self.device_service(sock, Device(serial), service)
+            return
+
+    def host_service(self, sock, service):
+        if service == "host:version":
+            sock.sendall(b"OKAY" + hex_string("%04x" % 41))
+
+        elif service in ("host:devices", "host:devices-l"):
+            sock.sendall(b"OKAY" + hex_string(device_list(device_states())))
+
+        elif service == "host:track-devices":
+            sock.sendall(b"OKAY")
+            self.track_devices(sock)
+
+        elif service.startswith("host-serial:") and service.endswith(":get-state"):
+            state = device_states().get(service.split(":")[1])
+            if state is None:
+                fail(sock, "device not found")
+            else:
+                sock.sendall(b"OKAY" + hex_string(state))
+
+        else:
+            fail(sock, f"unknown host service {service}")
+
+    def track_devices(self, sock):
+        last = None
+
+        try:
+            while True:
+                states = device_states()
+
+                if states != last:
+                    sock.sendall(hex_string(device_list(states)))
+                    last = states
+
+                time.sleep(0.2)
+        except OSError:
+            return
+
+    def device_service(self, sock, device, service):
+        name, _, command = service.partition(":")
+
+        if name.split(",")[0] == "shell":
+            sock.sendall(b"OKAY")
+            if command:
+                self.run_command(sock, device, command, binary=False)
+            else:
+                self.interactive_shell(sock, device)
+
+        elif name == "exec":
+            sock.sendall(b"OKAY")
+            self.run_command(sock, device, command, binary=True)
+
+        elif name == "sync":
+            sock.sendall(b"OKAY")
+            self.sync(sock, device)
+
+        else:
+            fail(sock, f"unknown service {service}")
+
+    def run_command(self, sock, device, command, binary):
+        process = device.spawn(command, stdout=subprocess.PIPE)
+        throttle = Throttle(device)
+
+        try:
+            if binary:
+                while True:
+                    data = os.read(process.stdout.fileno(), CHUNK)
+                    if not data:
+                        break
+                    sock.sendall(data)
+                    throttle(len(data))
+            else:
+                for line in iter(process.stdout.readline, b""):
+                    sock.sendall(device.to_device(line))
+        except OSError:
+            process.kill()
+
+        process.wait()
+
+    def interactive_shell(self, sock, device):
+        process = device.spawn(stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+        def pump():
+            try:
+                for line in iter(process.stdout.readline, b""):
+                    sock.sendall(device.to_device(line))
+            except OSError:
+                pass
+
+            # Shell exited: the client sees EOF
+            try:
+                sock.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+
+        thread = threading.Thread(target=pump, daemon=True)
+        thread.start()
+
+        reader = sock.makefile("rb")
+
+        try:
+            for line in iter(reader.readline, b""):
+                if line.startswith(b"{ ") and LATENCY:
+                    time.sleep(LATENCY)
+
+                process.stdin.write(device.to_local(line))
+                process.stdin.flush()
+        except OSError:
+            pass
+
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+        thread.join()
+
+    def sync(self, sock, device):
+        # Requests are read as they arrive and each answer waits until
+        # LATENCY after its request came in: pipelined requests overlap
+        # their round trips like on USB
+        requests = queue.Queue()
+
+        def reader():
+            try:
+                while True:
+                    header = recv_exact(sock, 8)
+                    if header is None:
+                        break
+
+                    ident, size = header[:4], struct.unpack("<I", header[4:])[0]
+                    path = recv_exact(sock, size) if size else b""
+                    requests.put((time.monotonic(), ident, (path or b"").decode("utf-8")))
+
+                    if ident == b"QUIT":
+                        return
+            except OSError:
+                pass
+
+            requests.put(None)
+
+        threading.Thread(target=reader, daemon=True).start()
+        throttle = Throttle(device)
+
+        try:
+            while True:
+                request = requests.get()
+                if request is None:
+                    return
+
+                arrived, ident, path = request
+                if ident == b"QUIT":
+                    return
+
+                delay = arrived + LATENCY - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+                local = device.local_path(path)
+
+                if ident == b"STAT":
+                    try:
+                        st = os.stat(local)
+                        sock.sendall(b"STAT" + struct.pack(
+                            "<III", st.st_mode, st.st_size & 0xFFFFFFFF, int(st.st_mtime)
+                        ))
+                    except OSError:
+                        sock.sendall(b"STAT" + bytes(12))
+
+                elif ident == b"LIST":
+                    data = []
+                    try:
+                        for entry in os.scandir(local):
+                            st = entry.stat(follow_symlinks=False)
+                            name = entry.name.encode("utf-8")
+                            data.append(b"DENT" + struct.pack(
+                                "<IIII", st.st_mode, st.st_size & 0xFFFFFFFF, int(st.st_mtime), len(name)
+                            ) + name)
+                    except OSError:
+                        pass
+                    sock.sendall(b"".join(data) + b"DONE" + bytes(16))
+
+                elif ident == b"RECV":
+                    try:
+                        f = open(local, "rb")
+                    except OSError as e:
+                        # adbd ends the session after a FAIL
+                        self.sync_fail(sock, requests, f"{path}: {e.strerror}")
+                        return
+
+                    with f:
+                        while True:
+                            data = f.read(CHUNK)
+                            if not data:
+                                break
+                            sock.sendall(b"DATA" + struct.pack("<I", len(data)) + data)
+                            throttle(len(data))
+
+                    sock.sendall(b"DONE" + bytes(4))
+
+                else:
+                    self.sync_fail(sock, requests, "unknown sync command")
+                    return
+
+        except OSError:
+            return
+
+    def sync_fail(self, sock, requests, message):
+        # Closing with requests still unread would reset the connection and
+        # the client could lose the answers before the FAIL: stop writing
+        # and drop whatever it still sends until it closes
+        message = message.encode("utf-8")
+        sock.sendall(b"FAIL" + struct.pack("<I", len(message)) + message)
+        sock.shutdown(socket.SHUT_WR)
+
+        while requests.get() is not None:
+            pass
+
+
+class Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor adb de prueba")
+    parser.add_argument("--port", type=int, default=5037, help="0 = puerto libre")
+    args = parser.parse_args()
+
+    with Server(("127.0.0.1", args.port), Handler) as server:
+        print(server.server_address[1], flush=True)
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
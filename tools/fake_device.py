@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# Builds synthetic collectors for tools/fake_adb.py: a /sdcard tree with the
+# Trimble or Spectra layout, log-normal file sizes and fixed mtimes, plus
+# getprop/dumpsys answers. Same seed, same tree.
+#
+#   python tools/fake_device.py FAKE_ADB_HOME --serial 5842R00123 --files 2000
+
+import argparse
+import math
+import os
+import random
+import shutil
+import stat
+
+MTIME = 1700000000
+
+# (folder, extensions, share of the files, size factor); "{project}" is
+# replaced by one of PROJECTS project folders
+LAYOUTS = {
+    "trimble": [
+        ("Trimble Data/Projects/{project}", (".job", ".jxl", ".csv", ".dxf"), 30, 1),
+        ("Trimble Data/GNSS Data", (".T02", ".T04"), 10, 20),
+        ("Trimble Data/System Files", (".xml", ".dat"), 10, 1),
+        ("Documents", (".pdf", ".csv"), 5, 2),
+        ("Download", (".zip", ".apk"), 3, 10),
+        ("Pictures/Screenshots", (".png",), 5, 4),
+        ("DCIM/Camera", (".jpg",), 10, 8),
+        ("Android/data/com.trimble.fieldsurvey/files", (".log", ".dat"), 15, 1),
+        ("Survey/Export", (".csv", ".dxf", ".t02"), 10, 1),
+        ("", (".csv", ".txt"), 2, 1),
+    ],
+    "spectra": [
+        ("Spectra Geospatial Data/Projects/{project}", (".job", ".csv", ".shp", ".dbf", ".prj"), 30, 1),
+        ("Spectra Geospatial Data/GNSS Data", (".T04", ".rnx"), 10, 20),
+        ("Spectra Geospatial Data/System Files", (".xml", ".dat"), 10, 1),
+        ("Documents", (".pdf", ".csv"), 5, 2),
+        ("Download", (".zip", ".apk"), 3, 10),
+        ("Pictures/Screenshots", (".png",), 5, 4),
+        ("DCIM/Camera", (".jpg",), 10, 8),
+        ("Android/data/com.spectra.origin/files", (".log", ".dat"), 15, 1),
+        ("MobileMapper/Export", (".kml", ".csv", ".gml"), 10, 1),
+        ("", (".csv", ".txt"), 2, 1),
+    ],
+}
+
+PROJECTS = 8
+
+PROPERTIES = {
+    "trimble": {
+        "ro.product.model": "TSC510",
+        "ro.product.manufacturer": "Trimble",
+        "ro.build.display.id": "TSC510_1.2.3",
+    },
+    "spectra": {
+        "ro.product.model": "MobileMapper60",
+        "ro.product.manufacturer": "Spectra Geospatial",
+        "ro.build.display.id": "MM60_2.0.1",
+    },
+}
+
+GETPROP = """#!/bin/sh
+cat "$(dirname "$0")/../getprop.txt"
+"""
+
+DUMPSYS = """#!/bin/sh
+[ "$1" = battery ] && printf 'Current Battery Service state:\\n  AC powered: false\\n  USB powered: true\\n  status: 2\\n  level: 87\\n'
+"""
+
+
+def write_script(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+
+def write_properties(path, serial, profile):
+    props = {
+        "ro.serialno": serial,
+        "ro.build.version.release": "11",
+        "ro.build.type": "user",
+        "ro.build.fingerprint": f"{profile}/{serial}/fake:11/RP1A/1:user/release-keys",
+    }
+    props.update(PROPERTIES[profile])
+
+    with open(os.path.join(path, "getprop.txt"), "w", encoding="utf-8") as f:
+        for key in sorted(props):
+            f.write(f"[{key}]: [{props[key]}]\n")
+
+
+def create_device(home, serial, profile="trimble", files=1000, median_size=64 * 1024, sigma=1.5,
+                  max_size=256 * 1024 * 1024, seed=0):
+    # Returns (files, bytes) written under home/serial/sdcard
+    path = os.path.join(home, serial)
+    sdcard = os.path.join(path, "sdcard")
+    bin_dir = os.path.join(path, "bin")
+
+    if os.path.exists(path):
+        shutil.rmtree(path)
+
+    os.makedirs(sdcard)
+    os.makedirs(bin_dir)
+
+    write_properties(path, serial, profile)
+    write_script(os.path.join(bin_dir, "getprop"), GETPROP)
+    write_script(os.path.join(bin_dir, "dumpsys"), DUMPSYS)
+
+    rng = random.Random(seed)
+    layout = LAYOUTS[profile]
+    weights = [share for _, _, share, _ in layout]
+
+    # Incompressible filler, each file gets a unique header
+    filler = rng.randbytes(1024 * 1024)
+    total = 0
+
+    for index in range(files):
+        folder, extensions, _, factor = rng.choices(layout, weights)[0]
+        folder = folder.format(project=f"Project{rng.randrange(PROJECTS):02d}")
+
+        size = int(rng.lognormvariate(math.log(median_size), sigma) * factor)
+        size = max(1, min(size, max_size))
+
+        local_dir = os.path.join(sdcard, folder)
+        os.makedirs(local_dir, exist_ok=True)
+
+        file = os.path.join(local_dir, f"file{index:06d}{rng.choice(extensions)}")
+
+        with open(file, "wb") as f:
+            header = f"{serial}:{index}\n".encode()
+            f.write(header[:size])
+
+            left = size - min(len(header), size)
+            while left > 0:
+                chunk = filler[:min(left, len(filler))]
+                f.write(chunk)
+                left -= len(chunk)
+
+        os.utime(file, (MTIME + index, MTIME + index))
+        total += size
+
+    return files, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic collector for tools/fake_adb.py")
+    parser.add_argument("home", help="FAKE_ADB_HOME folder")
+    parser.add_argument("--serial", default="5842R00123")
+    parser.add_argument("--profile", choices=sorted(LAYOUTS), default="trimble")
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--median-size", type=int, default=64 * 1024, help="bytes")
+    parser.add_argument("--sigma", type=float, default=1.5, help="log-normal spread of sizes")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    files, total = create_device(
+        args.home, args.serial, args.profile, args.files, args.median_size, args.sigma, seed=args.seed
+    )
+    print(f"{args.serial}: {files} archivos, {total / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
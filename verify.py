@@ -0,0 +1,184 @@
+import os
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from config import VERIFY_BATCH_MAX_FILES, VERIFY_LOCAL_WORKERS
+from adb import stream_shell_command
+from manifest import quote_paths
+from object_store import hash_file
+
+CHECKSUM_FILE = "checksums.md5"
+# Local checksums that could not be compared with the device
+UNVERIFIED_CHECKSUM_FILE = "checksums.unverified.md5"
+
+
+def device_checksums(device, remote_files, is_cancelled):
+    # md5sum over many files per call, all through the device shell session
+    checksums = {}
+
+    for i in range(0, len(remote_files), VERIFY_BATCH_MAX_FILES):
+        if is_cancelled():
+            break
+
+        batch = remote_files[i:i + VERIFY_BATCH_MAX_FILES]
+
+        for line in stream_shell_command(device, f"md5sum {quote_paths(batch)}", is_cancelled):
+            digest, _, path = line.partition("  ")
+            if len(digest) == 32 and path:
+                checksums[path] = digest
+
+    return checksums
+
+
+def local_checksums(paths, is_cancelled):
+    def checksum(path):
+        if is_cancelled() or not os.path.isfile(path):
+            return path, None
+        return path, hash_file(path, "md5")
+
+    with ThreadPoolExecutor(max_workers=VERIFY_LOCAL_WORKERS) as pool:
+        return dict(pool.map(checksum, paths))
+
+
+def read_checksum_file(backup_path):
+    path = os.path.join(backup_path, CHECKSUM_FILE)
+    checksums = {}
+
+    if not os.path.isfile(path):
+        return checksums
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            digest, _, rel = line.rstrip("\n").partition("  ")
+            if rel:
+                checksums[rel] = digest
+
+    return checksums
+
+
+def write_checksum_file(backup_path, checksums, name=CHECKSUM_FILE):
+    path = os.path.join(backup_path, name)
+
+    # md5sum -c compatible
+    with open(path, "w", encoding="utf-8") as f:
+        for rel in sorted(checksums):
+            f.write(f"{checksums[rel]}  {rel}\n")
+
+
+def checksum_key(rel):
+    return rel.replace(os.sep, "/")
+
+
+def repull(device, pairs, log, is_cancelled):
+    from backup_core import pull_files
+
+    # pairs: (remote file, local file), grouped per directory pair so the
+    # batched pull keeps each file in place
+    groups = {}
+    for remote, local_file in pairs:
+        # Break hardlinks first so a shared copy is never overwritten in place
+        if os.path.exists(local_file):
+            os.remove(local_file)
+
+        key = (posixpath.dirname(remote), os.path.dirname(local_file))
+        groups.setdefault(key, []).append(remote)
+
+    for (remote_dir, local_dir), files in groups.items():
+        if not pull_files(device, files, remote_dir, local_dir, log, is_cancelled):
+            return False
+
+    return True
+
+
+def verify_backup(device, manifest, log, is_cancelled, previous=None, retries=1):
+    # True when verified, False on mismatches or cancel, None when the
+    # device cannot checksum: the local sums are kept apart as unverified
+    log("\nVerificando integridad...")
+
+    root = manifest.root
+    local_for = {
+        remote: os.path.join(root, entry[2])
+        for remote, entry in manifest.entries.items()
+    }
+
+    # Files linked from the previous backup keep its checksums
+    previous_checksums = read_checksum_file(previous.root) if previous is not None else {}
+    reused = {}
+    to_check = []
+
+    for remote, local_file in local_for.items():
+        if previous is not None and os.path.normpath(local_file) in previous.linked:
+            rel = checksum_key(previous.entries[remote][2])
+            if rel in previous_checksums:
+                reused[checksum_key(manifest.entries[remote][2])] = previous_checksums[rel]
+                continue
+        to_check.append(remote)
+
+    remote_sums = device_checksums(device, to_check, is_cancelled)
+
+    if is_cancelled():
+        return False
+
+    local_sums = local_checksums([local_for[remote] for remote in to_check], is_cancelled)
+
+    def checksums():
+        result = dict(reused)
+        for remote in to_check:
+            digest = local_sums.get(local_for[remote])
+            if digest:
+                result[checksum_key(manifest.entries[remote][2])] = digest
+        return result
+
+    if to_check and not remote_sums:
+        if is_cancelled():
+            return False
+
+        write_checksum_file(root, checksums(), UNVERIFIED_CHECKSUM_FILE)
+        log(
+            "No se pudo calcular checksums en el dispositivo (md5sum no disponible): "
+            f"respaldo SIN VERIFICAR, checksums locales en {UNVERIFIED_CHECKSUM_FILE}."
+        )
+        return None
+
+    mismatched = [
+        remote for remote in to_check
+        if remote in remote_sums and local_sums.get(local_for[remote]) != remote_sums[remote]
+    ]
+
+    for _ in range(retries):
+        if not mismatched or is_cancelled():
+            break
+
+        log(f"{len(mismatched)} archivos no coinciden, volviendo a copiarlos...")
+        for remote in mismatched:
+            log(f"  {remote}")
+
+        if not repull(device, [(remote, local_for[remote]) for remote in mismatched], log, is_cancelled):
+            return False
+
+        local_sums.update(local_checksums([local_for[remote] for remote in mismatched], is_cancelled))
+
+        mismatched = [
+            remote for remote in mismatched
+            if local_sums.get(local_for[remote]) != remote_sums[remote]
+        ]
+
+    if is_cancelled():
+        return False
+
+    write_checksum_file(root, checksums())
+
+    unchecked = len(to_check) - len(remote_sums)
+
+    if mismatched:
+        log(f"ERROR: {len(mismatched)} archivos siguen sin coincidir con el dispositivo:")
+        for remote in mismatched:
+            log(f"  {remote}")
+        return False
+
+    log(
+        f"Integridad verificada: {len(remote_sums)} archivos OK"
+        + (f", {len(reused)} sin cambios" if reused else "")
+        + (f", {unchecked} sin checksum en el dispositivo" if unchecked else "")
+    )
+
+    return True